@@ -0,0 +1,92 @@
+# Benchmark the CDPH recalls page parsing paths against a saved copy of the page.
+#
+#   curl -A "Mozilla/5.0" -o DeviceRecalls.html \
+#       https://www.cdph.ca.gov/Programs/CEH/DFDCS/Pages/FDBPrograms/DeviceRecalls.aspx
+#   python benchmarks/bench_cdph_parse.py DeviceRecalls.html --query heart
+#
+# Without a saved page, --synthetic N builds a page with N recall links instead.
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import cdph  # noqa: E402
+
+
+def original_search(content, device_name, firm_name):
+    # The per-request path /cdph used before: full html.parser tree, four fresh regexes per link
+    soup = BeautifulSoup(content, "html.parser")
+    results = []
+    for link in soup.find_all("a", href=True):
+        if ((device_name and re.search(r'\b{}\b'.format(re.escape(device_name)), link.text, re.IGNORECASE)) or
+                (firm_name and re.search(r'\b{}\b'.format(re.escape(firm_name)), link.text, re.IGNORECASE)) or
+                (device_name and re.search(r'\b{}\b'.format(re.escape(device_name)), link["href"], re.IGNORECASE)) or
+                (firm_name and re.search(r'\b{}\b'.format(re.escape(firm_name)), link["href"], re.IGNORECASE))):
+            results.append(link.text.strip())
+    return results
+
+
+def strainer_search(content, device_name, firm_name):
+    links = cdph.parse_links_soup(content)
+    return [text.strip() for text, _ in cdph.matching_links(links, cdph.compile_patterns(device_name, firm_name))]
+
+
+def lxml_search(content, device_name, firm_name):
+    links = cdph.parse_links(content)
+    return [text.strip() for text, _ in cdph.matching_links(links, cdph.compile_patterns(device_name, firm_name))]
+
+
+DEVICES = ["Heart Monitor", "Infusion Pump", "Ventilator", "Insulin Pen", "Catheter", "Defibrillator",
+           "Pulse Oximeter", "Surgical Stapler", "Hip Implant", "Glucose Meter", "Dialysis Set", "Syringe"]
+
+
+def synthetic_page(count):
+    filler = "<div class='ms-rtestate-field'><p>" + "Lorem ipsum dolor sit amet. " * 20 + "</p></div>"
+    rows = [
+        f"<tr><td>{filler}</td><td><a href='/Programs/CEH/DFDCS/CDPH%20Document%20Library/Recall-{i}.pdf'>"
+        f"Firm {i} {DEVICES[i % len(DEVICES)]} Model {i} Recall</a></td></tr>"
+        for i in range(count)
+    ]
+    return ("<html><head><title>Device Recalls</title></head><body><table>" + "".join(rows) + "</table></body></html>").encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("page", nargs="?", help="saved copy of DeviceRecalls.aspx")
+    parser.add_argument("--synthetic", type=int, default=1500, help="number of links in a generated page")
+    parser.add_argument("--query", default="ventilator")
+    parser.add_argument("--firm", default="")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.page:
+        with open(args.page, "rb") as file:
+            content = file.read()
+    else:
+        content = synthetic_page(args.synthetic)
+    print(f"page size: {len(content) / 1024:.0f} KiB")
+
+    snapshot = cdph.Snapshot(cdph.parse_links(content))
+    paths = [
+        ("html.parser + re.search per link", lambda: original_search(content, args.query, args.firm)),
+        ("html.parser + SoupStrainer", lambda: strainer_search(content, args.query, args.firm)),
+        ("lxml anchors only", lambda: lxml_search(content, args.query, args.firm)),
+        ("indexed snapshot lookup", lambda: snapshot.search(args.query, args.firm)),
+    ]
+
+    expected = len(original_search(content, args.query, args.firm))
+    baseline = None
+    for name, func in paths:
+        assert len(func()) == expected, name
+        seconds = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        baseline = baseline or seconds
+        print(f"{name:36s} {seconds * 1000:9.3f} ms  {baseline / seconds:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
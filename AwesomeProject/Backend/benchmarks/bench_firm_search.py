@@ -0,0 +1,66 @@
+# Benchmark typo correction in /firm-search over a synthetic license table.
+#
+#   python benchmarks/bench_firm_search.py --rows 300000
+#
+# Times close_terms() for misspelled words two ways: the first-letter scan of the FTS
+# vocabulary it used to do (every term sharing the word's first letter through difflib)
+# and the trigram TermIndex. Also times a whole search() for each typo query, and reports
+# what each way corrects the word to.
+
+import argparse
+import difflib
+import os
+import sys
+import tempfile
+import timeit
+
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import firm_search  # noqa: E402
+import listing  # noqa: E402
+from bench_license_search import load  # noqa: E402
+from models import Contact, License  # noqa: E402
+
+TYPOS = ["pacfic", "medcal", "surgcal", "sacramneto", "xardio", "bakersfeld"]
+
+
+def first_letter_scan(conn, word, limit=3):
+    candidates = conn.execute(
+        text("SELECT term FROM firm_fts_vocab WHERE term >= :low AND term < :high"),
+        {"low": word[0], "high": chr(ord(word[0]) + 1)},
+    ).scalars().all()
+    return difflib.get_close_matches(word, candidates, n=limit, cutoff=0.75)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=300000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'licenses.db')}")
+        load(engine, args.rows)
+        Contact.__table__.create(engine)
+        firm_search.ensure_index(engine)
+        listing.ensure_versions(engine, [License.__table__, Contact.__table__])
+
+        with engine.connect() as conn:
+            vocabulary = conn.execute(text("SELECT COUNT(*) FROM firm_fts_vocab")).scalar()
+            build = timeit.timeit(lambda: firm_search.TermIndex(
+                conn.execute(text("SELECT term FROM firm_fts_vocab")).scalars().all()), number=1)
+            firm_search.term_index(conn)
+            print(f"{args.rows} synthetic license rows, {vocabulary} terms; trigram index built in {build * 1000:.0f}ms\n")
+
+            print(f"{'word':12s} {'first letter':>13s} {'trigrams':>10s} {'search':>9s}  corrections (scan / trigrams)")
+            for word in TYPOS:
+                scan = min(timeit.repeat(lambda: first_letter_scan(conn, word), number=1, repeat=args.repeat))
+                index = min(timeit.repeat(lambda: firm_search.close_terms(conn, word), number=1, repeat=args.repeat))
+                search = min(timeit.repeat(lambda: firm_search.search(engine, f"{word} inc"), number=1, repeat=args.repeat))
+                print(f"{word:12s} {scan * 1000:11.2f}ms {index * 1000:8.2f}ms {search * 1000:7.2f}ms  "
+                      f"{first_letter_scan(conn, word)} / {firm_search.close_terms(conn, word)}")
+
+
+if __name__ == "__main__":
+    main()
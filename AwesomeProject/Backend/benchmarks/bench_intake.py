@@ -0,0 +1,91 @@
+# Benchmark photo intake: the old full decode against intake.load, on full-resolution photos.
+#
+#   python benchmarks/bench_intake.py                      # synthetic 12 MP phone photos
+#   python benchmarks/bench_intake.py --images ~/device-photos
+#
+# Without --images, test/ventilator.jpg is upscaled to 4032x3024 and saved as a portrait
+# phone JPEG (EXIF orientation 6). For /predict the old path decoded the whole photo and
+# copied it into an RGB array; for /serpapi-upload it stored the upload as is. The table
+# reports time per photo, the pixels decoded and the bytes Google has to fetch.
+
+import argparse
+import glob
+import io
+import os
+import sys
+import timeit
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import intake  # noqa: E402
+
+VENTILATOR = os.path.join(os.path.dirname(__file__), "..", "test", "ventilator.jpg")
+
+
+def synthetic_photos(count):
+    base = Image.open(VENTILATOR).convert("RGB").resize((4032, 3024), Image.BICUBIC)
+    exif = Image.Exif()
+    exif[intake.ORIENTATION_TAG] = 6
+    photos = []
+    for quality in range(92, 92 - count, -1):
+        buffer = io.BytesIO()
+        base.save(buffer, format="JPEG", quality=quality, exif=exif)
+        photos.append(buffer.getvalue())
+    return photos
+
+
+def read_photos(directory):
+    files = sorted(f for f in glob.glob(os.path.join(directory, "*")) if f.lower().endswith((".jpg", ".jpeg", ".png")))
+    photos = []
+    for file in files:
+        with open(file, "rb") as photo:
+            photos.append(photo.read())
+    return photos
+
+
+def full_decode(data):
+    return np.array(Image.open(io.BytesIO(data)).convert("RGB"))
+
+
+def model_intake(data):
+    return intake.load(data, intake.MODEL_INPUT_SIZE).to_model_array()
+
+
+def search_intake(data):
+    return intake.load(data, intake.SEARCH_MAX_SIDE).to_jpeg()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", help="directory of photos (default: synthetic 12 MP JPEGs)")
+    parser.add_argument("--count", type=int, default=5, help="synthetic photos to generate")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    photos = read_photos(args.images) if args.images else synthetic_photos(args.count)
+    if not photos:
+        raise SystemExit(f"No photos in {args.images}")
+    upload_bytes = sum(len(photo) for photo in photos) / len(photos)
+    print(f"{len(photos)} photos, {upload_bytes / 1e6:.1f}MB each on average\n")
+
+    paths = {
+        "predict: full decode": full_decode,
+        "predict: intake": model_intake,
+        "search: intake + jpeg": search_intake,
+    }
+    print(f"{'path':24s} {'per photo':>10s} {'decoded':>10s} {'output':>9s}")
+    for name, path in paths.items():
+        seconds = min(timeit.repeat(lambda: [path(photo) for photo in photos], number=1, repeat=args.repeat))
+        output = path(photos[0])
+        if isinstance(output, bytes):
+            decoded, size = intake.load(photos[0], intake.SEARCH_MAX_SIDE).image.size, f"{len(output) / 1e6:7.2f}MB"
+        else:
+            decoded, size = (output.shape[1], output.shape[0]), f"{output.nbytes / 1e6:7.2f}MB"
+        print(f"{name:24s} {seconds / len(photos) * 1000:8.1f}ms {decoded[0]:>5d}x{decoded[1]:<4d} {size}")
+    print(f"{'search: stored as is':24s} {'-':>10s} {'-':>10s} {upload_bytes / 1e6:7.2f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# Benchmark /license-search queries over a synthetic license table.
+#
+#   python benchmarks/bench_license_search.py --rows 300000
+#
+# Builds a throwaway SQLite database with the License schema and its indexes, prints the
+# query plan of each search (every one should SEARCH an index rather than SCAN license)
+# and times it with and without the indexes.
+
+import argparse
+import os
+import random
+import string
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import sqlite
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import licenses  # noqa: E402
+from models import License  # noqa: E402
+
+CITIES = ["Sacramento", "Los Angeles", "San Diego", "Fresno", "Oakland", "San Jose", "Irvine", "Riverside",
+          "Long Beach", "Bakersfield", "Anaheim", "Santa Ana", "Stockton", "Modesto", "Chula Vista"]
+WORDS = ["Medical", "Health", "Device", "Surgical", "Pharma", "Bio", "Labs", "Supply", "Care", "Systems",
+         "Ortho", "Dental", "Vision", "Cardio", "Neuro", "Precision", "Pacific", "Golden", "Sierra", "Coastal"]
+
+QUERIES = {
+    "business name prefix": {"businessName": "pacific med"},
+    "city + zip": {"city": "fresno", "zip": "937"},
+    "county + expiration date": {"countyCode": "19", "expirationDate": "2026-03-15"},
+    "status code, second page": {"licenseStatusCode": "IN", "cursor": 150000},
+    "address prefix": {"addressLine1": "1200 "},
+}
+
+
+def synthetic_rows(count, seed=42):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    for i in range(1, count + 1):
+        name = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {''.join(rng.choices(string.ascii_uppercase, k=3))} Inc"
+        city = rng.choice(CITIES)
+        yield {
+            "license_address_id": i,
+            "license_id": i,
+            "license_number": 100000 + i,
+            "license_code_description": rng.choice(["MDM", "HMM", "DMM"]),
+            "license_status_code": rng.choice(["AC", "IN", "EX", "RV"]),
+            "expiration_date": start + timedelta(days=rng.randrange(730)),
+            "corporate_name": name,
+            "business_name": name,
+            "address_line_1": f"{rng.randrange(1, 9999)} {rng.choice(WORDS)} Ave",
+            "city": city,
+            "state": "CA",
+            "zip": f"9{rng.randrange(0, 6)}{rng.randrange(0, 999):03d}",
+            "county_code": str(rng.randrange(1, 59)),
+        }
+
+
+def load(engine, rows, chunk_size=20000):
+    License.__table__.create(engine)
+    chunk = []
+    with engine.begin() as conn:
+        for row in synthetic_rows(rows):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                conn.execute(License.__table__.insert(), chunk)
+                chunk = []
+        if chunk:
+            conn.execute(License.__table__.insert(), chunk)
+        conn.execute(text("ANALYZE"))
+
+
+def run_queries(engine, repeat, show_plan):
+    timings = {}
+    with engine.connect() as conn:
+        for name, filters in QUERIES.items():
+            query, _ = licenses.build_search(filters, cursor=filters.get("cursor"))
+            compiled = query.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+            if show_plan:
+                plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").fetchall()
+                print(f"{name}:")
+                for row in plan:
+                    print(f"    {row[-1]}")
+            timings[name] = min(timeit.repeat(lambda: conn.execute(query).all(), number=1, repeat=repeat))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=300000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'licenses.db')}")
+        load(engine, args.rows)
+        print(f"{args.rows} synthetic license rows\n")
+
+        indexed = run_queries(engine, args.repeat, show_plan=True)
+
+        with engine.begin() as conn:
+            for index in License.__table__.indexes:
+                conn.exec_driver_sql(f"DROP INDEX {index.name}")
+            conn.exec_driver_sql("ANALYZE")
+        unindexed = run_queries(engine, args.repeat, show_plan=False)
+
+    print(f"\n{'query':28s} {'no index':>10s} {'indexed':>10s}")
+    for name in QUERIES:
+        print(f"{name:28s} {unindexed[name] * 1000:8.2f}ms {indexed[name] * 1000:8.2f}ms  "
+              f"{unindexed[name] / indexed[name]:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Benchmark License serialization: ORM objects + to_json() + jsonify against Core rows + orjson.
+#
+#   python benchmarks/bench_serialize.py --rows 100000
+#
+# Each path selects every row of a synthetic license table and encodes the JSON body the
+# /licenses route sends; the table reports rows per second end to end.
+
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+from flask import Flask
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import serialize  # noqa: E402
+from bench_license_search import load  # noqa: E402
+from models import License  # noqa: E402
+
+
+def orm_to_json(engine, app):
+    with Session(engine) as session:
+        return app.json.dumps([license.to_json() for license in session.query(License)]).encode()
+
+
+def core_rows(engine):
+    with engine.connect() as conn:
+        return serialize.dumps(serialize.LICENSE.to_dicts(conn.execute(serialize.LICENSE.select())))
+
+
+def core_rows_stdlib_json(engine):
+    orjson, serialize.orjson = serialize.orjson, None
+    try:
+        return core_rows(engine)
+    finally:
+        serialize.orjson = orjson
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    paths = {
+        "ORM + to_json + jsonify": lambda: orm_to_json(engine, app),
+        "Core rows + json": lambda: core_rows_stdlib_json(engine),
+        "Core rows + orjson": lambda: core_rows(engine),
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'licenses.db')}")
+        load(engine, args.rows)
+        print(f"{args.rows} synthetic license rows\n")
+
+        sizes = {name: len(path()) for name, path in paths.items()}
+        timings = {name: min(timeit.repeat(path, number=1, repeat=args.repeat)) for name, path in paths.items()}
+
+    baseline = timings["ORM + to_json + jsonify"]
+    print(f"{'path':26s} {'time':>9s} {'rows/s':>10s} {'body':>9s} {'speedup':>8s}")
+    for name, seconds in timings.items():
+        print(f"{name:26s} {seconds:8.2f}s {args.rows / seconds:10.0f} {sizes[name] / 1e6:7.1f}MB "
+              f"{baseline / seconds:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
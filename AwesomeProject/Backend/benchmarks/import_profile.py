@@ -0,0 +1,76 @@
+# Import-time profile of main.py, checked against a startup budget.
+#
+#   python benchmarks/import_profile.py --budget-ms 1500
+#
+# Imports main in a fresh interpreter under `python -X importtime`, prints the slowest
+# modules main pulls in, and exits non-zero if the import took longer than the budget or
+# loaded any module that is meant to stay off the import path (the model stack, serpapi).
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Loaded on first use only: by /predict or the warm-up thread, and by /serpapi-upload
+DEFERRED_MODULES = ["torch", "ultralytics", "cv2", "serpapi", "bs4"]
+
+_LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+import main
+print(time.perf_counter() - started)
+print(" ".join(name for name in {deferred!r} if name in sys.modules))
+"""
+
+
+def profile():
+    """Return (seconds, deferred modules that were loaded, [(self_us, cumulative_us, depth, name)])."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(deferred=DEFERRED_MODULES)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    seconds, loaded = completed.stdout.splitlines()[-2:]
+    modules = []
+    for line in completed.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            modules.append((int(match.group(1)), int(match.group(2)), depth, match.group(4)))
+    return float(seconds), loaded.split(), modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--runs", type=int, default=3, help="best of N fresh interpreters")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [profile() for _ in range(args.runs)]
+    seconds, loaded, modules = min(runs, key=lambda run: run[0])
+
+    # Direct imports of main, by cumulative time
+    main_index = next(index for index, module in enumerate(modules) if module[3] == "main")
+    direct = [module for module in modules[:main_index] if module[2] == 1]
+    print(f"{'module imported by main':32s} {'cumulative':>11s}")
+    for _, cumulative, _, name in sorted(direct, key=lambda module: -module[1])[:args.top]:
+        print(f"{name:32s} {cumulative / 1000:9.1f}ms")
+
+    print(f"\nimport main: {seconds * 1000:.0f}ms (budget {args.budget_ms:.0f}ms, best of {args.runs})")
+    failed = False
+    if seconds * 1000 > args.budget_ms:
+        print("FAIL: over the startup budget")
+        failed = True
+    if loaded:
+        print(f"FAIL: deferred modules imported at startup: {', '.join(loaded)}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
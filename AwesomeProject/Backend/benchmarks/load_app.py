@@ -0,0 +1,49 @@
+# Stand-in app for sizing gunicorn workers and threads without the YOLO model or API keys.
+#
+#   LOAD_APP_DB=/tmp/load.db gunicorn -c gunicorn.conf.py --chdir benchmarks load_app:app
+#
+# /licenses is served by the same database, listing and serialize code as main.py over
+# synthetic rows; /upstream waits UPSTREAM_LATENCY seconds the way an openFDA or SerpAPI
+# call does. Drive it with load_test.py.
+
+import os
+import sys
+import time
+
+from flask import Flask, Response, jsonify, request
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import database  # noqa: E402
+import listing  # noqa: E402
+import serialize  # noqa: E402
+from bench_license_search import load  # noqa: E402
+from models import db  # noqa: E402
+
+DB_PATH = os.getenv('LOAD_APP_DB', '/tmp/load_app.db')
+ROWS = int(os.getenv('LOAD_APP_ROWS', 50000))
+UPSTREAM_LATENCY = float(os.getenv('UPSTREAM_LATENCY', 1.0))
+
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{DB_PATH}")
+app = Flask(__name__)
+database.init_app(app, db)
+with app.app_context():
+    if not os.path.exists(DB_PATH) or os.path.getsize(DB_PATH) == 0:
+        load(db.engine, ROWS)
+
+
+@app.route("/licenses")
+def licenses():
+    cursor, limit = listing.parse_page(request.args)
+    rows = listing.page(db.session, serialize.LICENSE, cursor, limit or listing.DEFAULT_LIMIT)
+    return Response(serialize.dumps(rows), mimetype='application/json')
+
+
+@app.route("/upstream", methods=["GET", "POST"])
+def upstream():
+    time.sleep(UPSTREAM_LATENCY)
+    return jsonify({"meta": {}, "results": []})
+
+
+def init_worker():
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,104 @@
+# Closed-loop HTTP load test for the backend.
+#
+#   python benchmarks/load_test.py --url http://localhost:8080/licenses?limit=100 \
+#       --slow-url http://localhost:8080/ --slow-json '{"productDescription": "pump"}' \
+#       --slow-share 0.2 --concurrency 32 --duration 30
+#
+# Each of --concurrency clients sends requests back to back for --duration seconds. A
+# --slow-share fraction of them go to --slow-url (an upstream-bound route such as an
+# openFDA search), so the report shows whether slow calls hold up the fast ones.
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(targets, concurrency, duration):
+    """targets: list of (name, method, url, json_body, share). Returns {name: [latencies]} and error counts."""
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(index):
+        session = requests.Session()
+        # Spread the clients over the targets by share, deterministically
+        position, sent = (index + 0.5) / concurrency, 0
+        name, method, url, body = targets[-1][:4]
+        for target in targets:
+            sent += target[4]
+            if position < sent:
+                name, method, url, body = target[:4]
+                break
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, json=body, timeout=60)
+                ok = response.status_code < 500
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    latencies[name].append(elapsed)
+                else:
+                    errors[name] += 1
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def report(latencies, errors, duration):
+    print(f"{'route':8s} {'requests':>9s} {'req/s':>8s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'errors':>7s}")
+    for name in sorted(set(latencies) | set(errors)):
+        values = latencies[name]
+        print(f"{name:8s} {len(values):9d} {len(values) / duration:8.1f} "
+              f"{percentile(values, 0.5) * 1000:7.0f}ms {percentile(values, 0.95) * 1000:7.0f}ms "
+              f"{percentile(values, 0.99) * 1000:7.0f}ms {errors[name]:7d}")
+    total = sum(len(values) for values in latencies.values())
+    mean = statistics.mean(v for values in latencies.values() for v in values) if total else float("nan")
+    print(f"{'total':8s} {total:9d} {total / duration:8.1f}   mean {mean * 1000:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", required=True, help="fast route")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--json", help="JSON body for --url")
+    parser.add_argument("--slow-url", help="upstream-bound route mixed into the load")
+    parser.add_argument("--slow-method", default="POST")
+    parser.add_argument("--slow-json", help="JSON body for --slow-url")
+    parser.add_argument("--slow-share", type=float, default=0.2, help="fraction of clients on --slow-url")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    args = parser.parse_args()
+
+    targets = []
+    if args.slow_url:
+        targets.append(("slow", args.slow_method, args.slow_url,
+                        json.loads(args.slow_json) if args.slow_json else None, args.slow_share))
+    targets.append(("fast", args.method, args.url, json.loads(args.json) if args.json else None,
+                    1 - (args.slow_share if args.slow_url else 0)))
+
+    latencies, errors = run(targets, args.concurrency, args.duration)
+    report(latencies, errors, args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# Response cache for the openFDA proxy routes.
+#
+# Keys are built from the normalized search clauses so that "Heart", " heart " and a
+# different field order all hit the same entry. Entries expire after a per-endpoint TTL
+# and the cache is size bounded with least-recently-used eviction.
+#
+# Two backends are available:
+#   memory - an in-process OrderedDict (default, one cache per worker)
+#   sqlite - an on-disk table shared by every worker on the host
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+DEFAULT_TTL = int(os.getenv('FDA_CACHE_TTL', 12 * 3600))
+MAX_ENTRIES = int(os.getenv('FDA_CACHE_MAX_ENTRIES', 2048))
+
+_CLAUSE_RE = re.compile(r'^\s*([\w.]+)\s*:\s*(.*?)\s*$', re.DOTALL)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_clause(clause):
+    """Fold case and whitespace of one `field:"value"` search clause."""
+    match = _CLAUSE_RE.match(clause)
+    if not match:
+        return _WHITESPACE_RE.sub(' ', clause.strip()).lower()
+    field, value = match.group(1).lower(), _WHITESPACE_RE.sub(' ', match.group(2))
+    # .exact fields are matched case-sensitively by openFDA, so keep their case
+    if not field.endswith('.exact'):
+        value = value.lower()
+    return f'{field}:{value}'
+
+
+def make_key(query_params, **extra):
+    """Cache key for a list of search clauses plus any paging arguments."""
+    clauses = sorted(normalize_clause(clause) for clause in query_params if clause)
+    key = ' AND '.join(clauses)
+    for name in sorted(extra):
+        key += f'&{name}={extra[name]}'
+    return key
+
+
+class MemoryBackend:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    def __init__(self, path, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+
+    @property
+    def conn(self):
+        # SQLite connections must not cross a fork, so every worker opens its own
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn_pid = os.getpid()
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS response_cache ('
+                ' key TEXT PRIMARY KEY,'
+                ' value TEXT NOT NULL,'
+                ' expires_at REAL NOT NULL,'
+                ' last_access REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS ix_response_cache_last_access ON response_cache (last_access)')
+        return self._conn
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute('SELECT value, expires_at FROM response_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self.conn.execute('DELETE FROM response_cache WHERE key = ?', (key,))
+                return None
+            self.conn.execute('UPDATE response_cache SET last_access = ? WHERE key = ?', (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO response_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value), now + ttl, now),
+            )
+            # Drop expired rows first, then the least recently used ones over the bound
+            self.conn.execute('DELETE FROM response_cache WHERE expires_at <= ?', (now,))
+            self.conn.execute(
+                'DELETE FROM response_cache WHERE key IN ('
+                ' SELECT key FROM response_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute('DELETE FROM response_cache')
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM response_cache').fetchone()[0]
+
+
+class ResponseCache:
+    def __init__(self, backend, ttls=None, default_ttl=DEFAULT_TTL):
+        self.backend = backend
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, endpoint, key):
+        value = self.backend.get(f'{endpoint}|{key}')
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, endpoint, key, value):
+        ttl = self.ttls.get(endpoint, self.default_ttl)
+        if ttl > 0:
+            self.backend.set(f'{endpoint}|{key}', value, ttl)
+
+    def stats(self):
+        return {"backend": type(self.backend).__name__, "entries": len(self.backend),
+                "hits": self.hits, "misses": self.misses}
+
+
+def create_cache(ttls=None):
+    """Build the cache selected by FDA_CACHE_BACKEND (memory or sqlite)."""
+    backend_name = os.getenv('FDA_CACHE_BACKEND', 'memory').lower()
+    if backend_name == 'sqlite':
+        path = os.getenv('FDA_CACHE_PATH', 'fda_cache.db')
+        backend = SQLiteBackend(path)
+        logging.info(f"Using SQLite response cache at {path}")
+    else:
+        backend = MemoryBackend()
+    return ResponseCache(backend, ttls=ttls)
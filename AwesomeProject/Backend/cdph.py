@@ -0,0 +1,181 @@
+# Local snapshot of the CDPH medical device recalls page.
+#
+# The page is fetched in the background (with a conditional GET so an unchanged page
+# costs a 304), its links are parsed once, and a token -> link inverted index makes
+# every /cdph search a local lookup instead of a download and a full-page scan.
+#
+# parse_links() is the one place the page is parsed (dataretrieval_CDPHsafetypage.py uses
+# it too). Only anchors are handed back and kept: with lxml when it is installed, through
+# iterparse(tag="a"), each anchor freed once read; otherwise with a SoupStrainer'd
+# BeautifulSoup that builds nodes for the anchors alone.
+
+import io
+import logging
+import os
+import re
+import threading
+import time
+from urllib.parse import urljoin
+
+import upstream
+
+try:
+    import lxml.etree
+except ImportError:  # lxml is optional, fall back to BeautifulSoup's pure-Python parser
+    lxml = None
+
+
+BASE_URL = "https://www.cdph.ca.gov"
+RECALLS_URL = BASE_URL + "/Programs/CEH/DFDCS/Pages/FDBPrograms/DeviceRecalls.aspx"
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
+}  # Some websites require a User-Agent header to mimic a web browser
+REFRESH_INTERVAL = int(os.getenv('CDPH_REFRESH_INTERVAL', 3600))
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(value):
+    return _TOKEN_RE.findall(value.lower())
+
+
+class Snapshot:
+    """Parsed links of one version of the recalls page plus their inverted index."""
+
+    def __init__(self, links, etag=None, last_modified=None):
+        # links: list of (text, href) tuples in page order
+        self.links = links
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = time.time()
+        self.index = {}
+        for link_id, (text, href) in enumerate(links):
+            for token in set(tokenize(text)) | set(tokenize(href)):
+                self.index.setdefault(token, []).append(link_id)
+
+    def candidates(self, query):
+        """Ids of links containing every word of `query`, or None if it has no words."""
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        postings = [self.index.get(token, ()) for token in tokens]
+        postings.sort(key=len)
+        ids = set(postings[0])
+        for posting in postings[1:]:
+            ids.intersection_update(posting)
+        return ids
+
+    def search(self, device_name, firm_name):
+        ids = set()
+        for query in (device_name, firm_name):
+            if not query:
+                continue
+            query_ids = self.candidates(query)
+            ids.update(range(len(self.links)) if query_ids is None else query_ids)
+
+        # The index narrows the links down; the word-boundary patterns decide the match
+        candidates = [self.links[link_id] for link_id in sorted(ids)]
+        matches = matching_links(candidates, compile_patterns(device_name, firm_name))
+        return [{"text": text.strip(), "url": urljoin(BASE_URL, href)} for text, href in matches]
+
+
+def parse_links(content):
+    """Return (text, href) for every <a href> on the page, in page order."""
+    if lxml is not None:
+        return parse_links_lxml(content)
+    return parse_links_soup(content)
+
+
+def parse_links_lxml(content):
+    links = []
+    for _, link in lxml.etree.iterparse(io.BytesIO(content), events=("end",), tag="a", html=True):
+        if link.get("href") is not None:
+            links.append(("".join(link.itertext()), link.get("href")))
+        link.clear(keep_tail=True)
+    return links
+
+
+def parse_links_soup(content):
+    from bs4 import BeautifulSoup, SoupStrainer  # only needed without lxml
+
+    # Only build tree nodes for anchors; everything else on the page is skipped
+    soup = BeautifulSoup(content, "html.parser", parse_only=SoupStrainer("a", href=True))
+    return [(link.text, link["href"]) for link in soup.find_all("a", href=True)]
+
+
+def compile_patterns(*queries):
+    """Word-boundary patterns for the non-empty queries, built once per search."""
+    return [re.compile(r'\b{}\b'.format(re.escape(query)), re.IGNORECASE) for query in queries if query]
+
+
+def matching_links(links, patterns):
+    """Filter (text, href) pairs to those where any pattern matches the text or href."""
+    return [(text, href) for text, href in links
+            if any(pattern.search(text) or pattern.search(href) for pattern in patterns)]
+
+
+_snapshot = None
+_refresh_lock = threading.Lock()
+_refresher_pid = None
+
+
+def refresh():
+    """Re-fetch the recalls page if it changed and swap in a new snapshot."""
+    global _snapshot
+    with _refresh_lock:
+        headers = dict(HEADERS)
+        if _snapshot is not None:
+            if _snapshot.etag:
+                headers["If-None-Match"] = _snapshot.etag
+            if _snapshot.last_modified:
+                headers["If-Modified-Since"] = _snapshot.last_modified
+
+        response = upstream.get(RECALLS_URL, headers=headers)
+        if response.status_code == 304 and _snapshot is not None:
+            _snapshot.fetched_at = time.time()
+            logging.info("CDPH recalls page not modified")
+            return _snapshot
+        if response.status_code != 200:
+            raise Exception("Failed to retrieve data from the website.")
+
+        _snapshot = Snapshot(
+            parse_links(response.content),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        logging.info(f"Loaded CDPH recalls snapshot with {len(_snapshot.links)} links")
+        return _snapshot
+
+
+def _refresh_forever():
+    while True:
+        time.sleep(REFRESH_INTERVAL)
+        try:
+            refresh()
+        except Exception as e:
+            # Keep serving the previous snapshot until the page comes back
+            logging.error(f"Error refreshing CDPH recalls snapshot: {e}")
+
+
+def start_refresher():
+    """Start the background refresh thread once per process."""
+    global _refresher_pid
+    if _refresher_pid == os.getpid():
+        return
+    with _refresh_lock:
+        if _refresher_pid == os.getpid():
+            return
+        _refresher_pid = os.getpid()
+    threading.Thread(target=_refresh_forever, name="cdph-refresher", daemon=True).start()
+
+
+def get_snapshot():
+    start_refresher()
+    snapshot = _snapshot
+    if snapshot is None:
+        snapshot = refresh()
+    return snapshot
+
+
+def search(device_name, firm_name):
+    return get_snapshot().search(device_name, firm_name)
@@ -0,0 +1,97 @@
+# Database engine configuration for the Flask app.
+#
+# The URI comes from the environment so a deployment can move from the bundled SQLite
+# file to the MySQL database of config.py without code changes:
+#
+#   DATABASE_URL=...            any SQLAlchemy URI, used as is
+#   DB_BACKEND=mysql            mysql+pymysql://DB_USER:DB_PASSWORD@DB_HOST/DB_NAME (PyMySQL)
+#   (neither)                   sqlite:///contact_info.db
+#
+# SQLite connections are switched to WAL on connect so the /contacts and /licenses readers
+# of every worker keep reading while a writer commits, and wait on a busy database instead
+# of failing with "database is locked". The pool is per process: each worker holds at most
+# DB_POOL_SIZE + DB_MAX_OVERFLOW connections, which should cover its request threads.
+
+import logging
+import os
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+DEFAULT_URI = 'sqlite:///contact_info.db'
+
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 8))
+MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 4))
+POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 10))
+# MySQL closes connections idle for wait_timeout (8 hours by default); recycle well before
+POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),  # ms
+    # NORMAL is safe with WAL: a crash may lose the last commits but never corrupts the file
+    "synchronous": "NORMAL",
+    "mmap_size": int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    "cache_size": -16000,  # KiB
+    "temp_store": "MEMORY",
+}
+
+
+def database_uri():
+    if os.getenv('DATABASE_URL'):
+        return os.environ['DATABASE_URL']
+    if os.getenv('DB_BACKEND', 'sqlite').lower() == 'mysql':
+        return "mysql+pymysql://{db_user}:{db_password}@{db_host}/{db_name}".format(
+            db_user=os.environ['DB_USER'],
+            db_password=os.environ['DB_PASSWORD'],
+            # docker-compose passes an unset DB_HOST as an empty string
+            db_host=os.getenv('DB_HOST') or 'localhost',
+            db_name=os.environ['DB_NAME'],
+        )
+    return DEFAULT_URI
+
+
+def engine_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for `uri`."""
+    url = make_url(uri)
+    options = {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+    }
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            # An in-memory database exists once per connection; keep sqlite's own pool
+            return {}
+        # Connections are handed between request threads by the pool
+        options["connect_args"] = {"check_same_thread": False, "timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000}
+    else:
+        options["pool_recycle"] = POOL_RECYCLE
+        options["pool_pre_ping"] = True
+    return options
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def init_app(app, db):
+    """Point `db` at the configured database and tune its engine."""
+    uri = database_uri()
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(uri)
+    db.init_app(app)
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, "connect", set_sqlite_pragmas)
+    logging.info(f"Using database {make_url(uri).render_as_string(hide_password=True)}")
+
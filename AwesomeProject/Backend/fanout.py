@@ -0,0 +1,63 @@
+# Run several independent lookups concurrently, each with its own deadline.
+#
+# Used by /search/firm so that one inspector search costs as long as the slowest
+# backend instead of the sum of all of them. Each source runs under upstream.deadline(),
+# so its HTTP calls stop at its deadline instead of holding a pool thread through the
+# full upstream timeouts and retries after the search has reported it as timed out.
+
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import upstream
+
+
+MAX_WORKERS = int(os.getenv('FANOUT_MAX_WORKERS', 16))
+
+# Shared across requests; threads are only started on first submit, so it is fork safe
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="fanout")
+
+
+def _call(func, at):
+    # Queued behind other searches until past its deadline: nobody is waiting any more
+    if time.monotonic() >= at:
+        raise TimeoutError("Deadline passed before the source started")
+    with upstream.deadline(at):
+        return func()
+
+
+def run(tasks, deadlines, default_deadline=10.0):
+    """Run `tasks` ({name: zero-argument callable}) concurrently.
+
+    Yields one dict per source as soon as it finishes, in completion order:
+    {"source", "status" ("ok" | "error" | "timeout"), "elapsed", "results" or "error"}.
+    Sources still running when their deadline passes are reported as timeouts; their
+    upstream calls give up at that deadline and their results are discarded.
+    """
+    started = time.monotonic()
+    pending = {
+        executor.submit(_call, func, started + deadlines.get(name, default_deadline)): name
+        for name, func in tasks.items()
+    }
+
+    while pending:
+        elapsed = time.monotonic() - started
+        for future, name in list(pending.items()):
+            if elapsed >= deadlines.get(name, default_deadline):
+                del pending[future]
+                future.cancel()
+                yield {"source": name, "status": "timeout", "elapsed": round(elapsed, 3)}
+        if not pending:
+            break
+
+        next_deadline = min(deadlines.get(name, default_deadline) for name in pending.values())
+        done, _ = wait(pending, timeout=next_deadline - elapsed, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = pending.pop(future)
+            elapsed = round(time.monotonic() - started, 3)
+            try:
+                yield {"source": name, "status": "ok", "elapsed": elapsed, "results": future.result()}
+            except Exception as e:
+                logging.error(f"Error fetching {name} results: {e}")
+                yield {"source": name, "status": "error", "elapsed": elapsed, "error": str(e)}
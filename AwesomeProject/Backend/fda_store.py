@@ -0,0 +1,324 @@
+# Local copy of the openFDA device datasets.
+#
+# openFDA publishes the full device/enforcement, device/510k and device/event datasets as
+# zipped JSON files (listed in https://api.fda.gov/download.json). `python fda_store.py
+# ingest` streams each zip member through ijson so a multi-gigabyte partition is never
+# decompressed or parsed in one piece, and loads the records into SQLite with B-tree
+# indexes on the exact-match and date columns and an FTS5 index on the text columns.
+#
+# When FDA_LOCAL_STORE points at that database, openfda.search() answers the /, /k510
+# and /maude searches from it instead of calling the API.
+
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import zipfile
+
+import upstream
+
+
+DOWNLOAD_INDEX_URL = "https://api.fda.gov/download.json"
+STORE_PATH = os.getenv('FDA_LOCAL_STORE', '')
+BATCH_SIZE = 5000
+
+# Per dataset: the openFDA search fields the store can answer, mapped to
+# (column, kind) where kind is "text" (FTS5 phrase match), "exact" or "date"
+DATASETS = {
+    "enforcement": {
+        "fields": {
+            "product_description": ("product_description", "text"),
+            "recalling_firm": ("recalling_firm", "text"),
+            "recall_number": ("recall_number", "exact"),
+            "classification": ("classification", "exact"),
+            "report_date": ("report_date", "date"),
+        },
+        "extract": lambda record: {
+            "product_description": record.get("product_description"),
+            "recalling_firm": record.get("recalling_firm"),
+            "recall_number": record.get("recall_number"),
+            "classification": record.get("classification"),
+            "report_date": record.get("report_date"),
+        },
+        "order_by": "report_date DESC",
+    },
+    "510k": {
+        "fields": {
+            "k_number": ("k_number", "exact"),
+            "k_number.exact": ("k_number", "exact"),
+            "applicant": ("applicant", "text"),
+            "device_name": ("device_name", "text"),
+            "decision_date": ("decision_date", "date"),
+        },
+        "extract": lambda record: {
+            "k_number": record.get("k_number"),
+            "applicant": record.get("applicant"),
+            "device_name": record.get("device_name"),
+            "decision_date": record.get("decision_date"),
+        },
+        "order_by": "decision_date DESC",
+    },
+    "event": {
+        "fields": {
+            "mdr_report_key": ("mdr_report_key", "exact"),
+            "device.generic_name": ("generic_name", "text"),
+            "device.manufacturer_d_name": ("manufacturer_name", "text"),
+            "date_received": ("date_received", "date"),
+        },
+        "extract": lambda record: {
+            "mdr_report_key": record.get("mdr_report_key"),
+            "generic_name": " ".join(device.get("generic_name") or "" for device in record.get("device", [])),
+            "manufacturer_name": " ".join(device.get("manufacturer_d_name") or "" for device in record.get("device", [])),
+            "date_received": record.get("date_received"),
+        },
+        "order_by": "date_received DESC",
+    },
+}
+
+_CLAUSE_RE = re.compile(r'^\s*([\w.]+)\s*:\s*"(.*)"\s*$', re.DOTALL)
+_RANGE_RE = re.compile(r'^\s*([\w.]+)\s*:\s*\[\s*(\S+)\s+TO\s+(\S+)\s*\]\s*$')
+
+
+def table_name(endpoint):
+    return "fda_" + endpoint
+
+
+def columns(endpoint):
+    return list(DATASETS[endpoint]["extract"]({}).keys())
+
+
+def _columns_of_kind(endpoint, kind):
+    found = []
+    for column, column_kind in DATASETS[endpoint]["fields"].values():
+        if column_kind == kind and column not in found:
+            found.append(column)
+    return found
+
+
+def create_schema(conn, endpoint):
+    table = table_name(endpoint)
+    column_defs = ", ".join(f"{column} TEXT" for column in columns(endpoint))
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, {column_defs}, data TEXT NOT NULL)")
+    for column in _columns_of_kind(endpoint, "exact") + _columns_of_kind(endpoint, "date"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})")
+    text_columns = ", ".join(_columns_of_kind(endpoint, "text"))
+    conn.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5"
+        f"({text_columns}, content='{table}', content_rowid='id')"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS ingest_log (endpoint TEXT PRIMARY KEY, records INTEGER, files TEXT, loaded_at TEXT)")
+
+
+# --- Ingestion ---------------------------------------------------------------------------
+
+def partition_urls(endpoint):
+    """Zip file URLs of every partition of a dataset, from openFDA's download index."""
+    response = upstream.get(DOWNLOAD_INDEX_URL)
+    response.raise_for_status()
+    return [partition["file"] for partition in response.json()["results"]["device"][endpoint]["partitions"]]
+
+
+def download(url, directory):
+    """Stream one zip partition to disk; zipfile needs a seekable file, not the whole body in memory."""
+    path = os.path.join(directory, url.rsplit("/", 1)[-1])
+    with upstream.get(url, stream=True) as response:
+        response.raise_for_status()
+        with open(path, "wb") as file:
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                file.write(chunk)
+    return path
+
+
+def download_each(urls, directory):
+    """Download partitions one at a time, deleting each once it has been loaded."""
+    for url in urls:
+        path = download(url, directory)
+        try:
+            yield path
+        finally:
+            os.remove(path)
+
+
+def iter_records(zip_path):
+    """Yield the records of every JSON member of a partition zip one at a time."""
+    import ijson  # only needed for ingestion, not to serve requests
+
+    with zipfile.ZipFile(zip_path) as archive:
+        for member in archive.namelist():
+            if not member.endswith(".json"):
+                continue
+            with archive.open(member) as stream:
+                # use_float keeps numbers JSON-serializable instead of Decimal
+                yield from ijson.items(stream, "results.item", use_float=True)
+
+
+def ingest(endpoint, db_path, zip_paths):
+    """Replace the stored copy of `endpoint` with the records from the `zip_paths` iterable."""
+    table = table_name(endpoint)
+    extract = DATASETS[endpoint]["extract"]
+    column_names = columns(endpoint)
+    insert_sql = (f"INSERT INTO {table} ({', '.join(column_names)}, data) "
+                  f"VALUES ({', '.join('?' for _ in range(len(column_names) + 1))})")
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    create_schema(conn, endpoint)
+
+    count = 0
+    loaded_files = []
+    conn.execute("BEGIN")
+    try:
+        conn.execute(f"DELETE FROM {table}")
+        batch = []
+        for zip_path in zip_paths:
+            logging.info(f"Loading {zip_path} into {table}")
+            loaded_files.append(os.path.basename(zip_path))
+            for record in iter_records(zip_path):
+                values = extract(record)
+                batch.append([values[column] for column in column_names] + [json.dumps(record, separators=(",", ":"))])
+                if len(batch) >= BATCH_SIZE:
+                    conn.executemany(insert_sql, batch)
+                    count += len(batch)
+                    batch = []
+        if batch:
+            conn.executemany(insert_sql, batch)
+            count += len(batch)
+
+        # Build the full-text index in one pass instead of row by row
+        conn.execute(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+        conn.execute(
+            "INSERT OR REPLACE INTO ingest_log (endpoint, records, files, loaded_at) VALUES (?, ?, ?, datetime('now'))",
+            (endpoint, count, json.dumps(loaded_files)),
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.close()
+
+    logging.info(f"Loaded {count} {endpoint} records into {db_path}")
+    return count
+
+
+# --- Queries -----------------------------------------------------------------------------
+
+_local = threading.local()
+
+
+def _connect():
+    # One read-only connection per thread (and per process after a fork)
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid() or _local.path != STORE_PATH:
+        conn = sqlite3.connect(f"file:{STORE_PATH}?mode=ro", uri=True, check_same_thread=False)
+        _local.conn, _local.pid, _local.path = conn, os.getpid(), STORE_PATH
+    return conn
+
+
+_available = {}
+
+
+def available(endpoint):
+    """True when a local store is configured and holds `endpoint`."""
+    if not STORE_PATH or endpoint not in DATASETS:
+        return False
+    if endpoint not in _available:
+        try:
+            row = _connect().execute("SELECT records FROM ingest_log WHERE endpoint = ?", (endpoint,)).fetchone()
+            _available[endpoint] = bool(row and row[0])
+        except sqlite3.Error:
+            _available[endpoint] = False
+    return _available[endpoint]
+
+
+def parse_clauses(endpoint, query_params):
+    """Map `field:"value"` search clauses to store filters, or None if any can't be answered locally."""
+    filters = []
+    fields = DATASETS[endpoint]["fields"]
+    for clause in query_params:
+        range_match = _RANGE_RE.match(clause)
+        if range_match and fields.get(range_match.group(1), (None, None))[1] == "date":
+            column, kind = fields[range_match.group(1)]
+            filters.append((column, "range", (range_match.group(2), range_match.group(3))))
+            continue
+        match = _CLAUSE_RE.match(clause)
+        if not match or match.group(1) not in fields:
+            return None
+        column, kind = fields[match.group(1)]
+        filters.append((column, kind, match.group(2)))
+    return filters
+
+
+def can_answer(endpoint, query_params):
+    return available(endpoint) and parse_clauses(endpoint, query_params) is not None
+
+
+def _build_where(endpoint, filters):
+    table = table_name(endpoint)
+    joins, conditions, params = "", [], []
+    phrases = []
+    for column, kind, value in filters:
+        if kind == "text":
+            phrases.append('{}:"{}"'.format(column, value.replace('"', '""')))
+        elif kind == "range":
+            # Dates are stored as openFDA's YYYYMMDD strings, which sort chronologically
+            conditions.append(f"t.{column} BETWEEN ? AND ?")
+            params.extend(value)
+        else:
+            conditions.append(f"t.{column} = ?")
+            params.append(value)
+    if phrases:
+        joins = f" JOIN {table}_fts f ON f.rowid = t.id"
+        conditions.insert(0, f"{table}_fts MATCH ?")
+        params.insert(0, " AND ".join(phrases))
+    where = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+    return joins + where, params
+
+
+def iter_search(endpoint, query_params, limit=None, skip=0):
+    """Return (total, generator of records) for a search answered from the store."""
+    table = table_name(endpoint)
+    clause, params = _build_where(endpoint, parse_clauses(endpoint, query_params))
+    conn = _connect()
+    total = conn.execute(f"SELECT COUNT(*) FROM {table} t{clause}", params).fetchone()[0]
+
+    sql = f"SELECT t.data FROM {table} t{clause} ORDER BY t.{DATASETS[endpoint]['order_by']} LIMIT ? OFFSET ?"
+    cursor = conn.execute(sql, params + [-1 if limit is None else limit, skip])
+    return total, (json.loads(row[0]) for row in cursor)
+
+
+def search(endpoint, query_params, limit=100, skip=0):
+    """Answer a search from the store in the same shape openFDA returns."""
+    total, records = iter_search(endpoint, query_params, limit=limit, skip=skip)
+    return {
+        "meta": {"results": {"skip": skip, "limit": limit, "total": total}, "source": "local"},
+        "results": list(records),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load openFDA bulk downloads into the local store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = subparsers.add_parser("ingest")
+    ingest_parser.add_argument("endpoints", nargs="+", choices=sorted(DATASETS))
+    ingest_parser.add_argument("--db", default=STORE_PATH or "openfda.db")
+    ingest_parser.add_argument("--files", nargs="*", help="already downloaded partition zips (one endpoint only)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    for endpoint in args.endpoints:
+        if args.files:
+            ingest(endpoint, args.db, args.files)
+            continue
+        with tempfile.TemporaryDirectory() as directory:
+            ingest(endpoint, args.db, download_each(partition_urls(endpoint), directory))
+
+
+if __name__ == "__main__":
+    main()
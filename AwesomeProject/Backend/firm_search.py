@@ -0,0 +1,230 @@
+# Ranked, typo-tolerant firm name search over the License and Contact tables.
+#
+# On SQLite a single FTS5 table (firm_fts) indexes the license business, corporate and
+# DBA names and addresses together with the district attorney contacts. Triggers keep it
+# in sync with inserts, updates and deletes on both tables. Rows are keyed by rowid:
+# license_address_id * 2 for licenses and contact.id * 2 + 1 for contacts.
+#
+# Every query word is matched as a prefix (so "pac med" autocompletes), and words that do
+# not occur in the index are widened with close spellings taken from the FTS vocabulary.
+# Those are looked up in a trigram index of the vocabulary kept per process, so a typo
+# costs a few posting lists rather than a pass over every term; the index is rebuilt when
+# the license or contact version counters (see listing.py) move.
+# Other databases fall back to a LIKE search.
+
+import difflib
+import logging
+import re
+import threading
+import weakref
+from collections import Counter, defaultdict
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.exc import OperationalError
+
+from licenses import integer_param
+from listing import VERSION_TABLE
+from models import Contact, License
+
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+# bm25 weights for name, corporate_name, doing_business_as, address, city
+RANK_WEIGHTS = "10.0, 8.0, 8.0, 1.0, 1.0"
+
+_WORD_RE = re.compile(r'\w+')
+# Close spellings differ in length by at most this much, and only the terms sharing the
+# most trigrams with the word are handed to difflib
+LENGTH_WINDOW = 2
+MAX_CANDIDATES = 50
+
+SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS firm_fts USING fts5("
+    " name, corporate_name, doing_business_as, address, city,"
+    " tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS firm_fts_vocab USING fts5vocab(firm_fts, 'row')",
+
+    "CREATE TRIGGER IF NOT EXISTS license_firm_fts_insert AFTER INSERT ON license BEGIN"
+    " INSERT INTO firm_fts (rowid, name, corporate_name, doing_business_as, address, city)"
+    " VALUES (new.license_address_id * 2, new.business_name, new.corporate_name, new.doing_business_as,"
+    " new.address_line_1, new.city); END",
+    "CREATE TRIGGER IF NOT EXISTS license_firm_fts_delete AFTER DELETE ON license BEGIN"
+    " DELETE FROM firm_fts WHERE rowid = old.license_address_id * 2; END",
+    "CREATE TRIGGER IF NOT EXISTS license_firm_fts_update AFTER UPDATE ON license BEGIN"
+    " DELETE FROM firm_fts WHERE rowid = old.license_address_id * 2;"
+    " INSERT INTO firm_fts (rowid, name, corporate_name, doing_business_as, address, city)"
+    " VALUES (new.license_address_id * 2, new.business_name, new.corporate_name, new.doing_business_as,"
+    " new.address_line_1, new.city); END",
+
+    "CREATE TRIGGER IF NOT EXISTS contact_firm_fts_insert AFTER INSERT ON contact BEGIN"
+    " INSERT INTO firm_fts (rowid, name, address, city)"
+    " VALUES (new.id * 2 + 1, new.name, new.address, new.county); END",
+    "CREATE TRIGGER IF NOT EXISTS contact_firm_fts_delete AFTER DELETE ON contact BEGIN"
+    " DELETE FROM firm_fts WHERE rowid = old.id * 2 + 1; END",
+    "CREATE TRIGGER IF NOT EXISTS contact_firm_fts_update AFTER UPDATE ON contact BEGIN"
+    " DELETE FROM firm_fts WHERE rowid = old.id * 2 + 1;"
+    " INSERT INTO firm_fts (rowid, name, address, city)"
+    " VALUES (new.id * 2 + 1, new.name, new.address, new.county); END",
+]
+
+REBUILD = [
+    "DELETE FROM firm_fts",
+    "INSERT INTO firm_fts (rowid, name, corporate_name, doing_business_as, address, city)"
+    " SELECT license_address_id * 2, business_name, corporate_name, doing_business_as, address_line_1, city"
+    " FROM license",
+    "INSERT INTO firm_fts (rowid, name, address, city) SELECT id * 2 + 1, name, address, county FROM contact",
+]
+
+
+def is_supported(engine):
+    return engine.dialect.name == 'sqlite'
+
+
+def ensure_index(engine):
+    """Create the FTS table and sync triggers, and backfill it from existing rows."""
+    if not is_supported(engine):
+        return
+    with engine.begin() as conn:
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+        indexed = conn.execute(text("SELECT COUNT(*) FROM firm_fts")).scalar()
+        rows = (conn.execute(text("SELECT COUNT(*) FROM license")).scalar()
+                + conn.execute(text("SELECT COUNT(*) FROM contact")).scalar())
+        if indexed != rows:
+            for statement in REBUILD:
+                conn.execute(text(statement))
+            logging.info(f"Rebuilt firm search index with {rows} rows")
+
+
+def trigrams(term):
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TermIndex:
+    """Trigram index over the terms of the FTS vocabulary."""
+
+    def __init__(self, terms):
+        self.postings = defaultdict(list)
+        for term in terms:
+            for gram in trigrams(term):
+                self.postings[gram].append(term)
+
+    def candidates(self, word, window=LENGTH_WINDOW, limit=MAX_CANDIDATES):
+        """Terms within `window` characters of the word's length sharing the most trigrams with it."""
+        shared = Counter()
+        low, high = len(word) - window, len(word) + window
+        for gram in trigrams(word):
+            for term in self.postings.get(gram, ()):
+                if low <= len(term) <= high:
+                    shared[term] += 1
+        return [term for term, _ in shared.most_common(limit)]
+
+
+_term_indexes = weakref.WeakKeyDictionary()  # engine -> (vocabulary version, TermIndex)
+_term_indexes_lock = threading.Lock()
+
+
+def _vocabulary_version(conn):
+    try:
+        return tuple(conn.execute(
+            text(f"SELECT name, version FROM {VERSION_TABLE} WHERE name IN ('license', 'contact') ORDER BY name")
+        ).all())
+    except OperationalError:
+        # No version counters: the index is built once per process
+        return None
+
+
+def term_index(conn):
+    """The TermIndex of the connection's database, rebuilt when its rows have changed."""
+    version = _vocabulary_version(conn)
+    with _term_indexes_lock:
+        cached = _term_indexes.get(conn.engine)
+        if cached is None or cached[0] != version:
+            terms = conn.execute(text("SELECT term FROM firm_fts_vocab")).scalars().all()
+            cached = (version, TermIndex(terms))
+            _term_indexes[conn.engine] = cached
+    return cached[1]
+
+
+def close_terms(conn, word, limit=3):
+    """Indexed terms spelled like `word`."""
+    candidates = term_index(conn).candidates(word)
+    return difflib.get_close_matches(word, candidates, n=limit, cutoff=0.75)
+
+
+def build_match(conn, query):
+    """FTS5 MATCH expression: every word as a prefix, misspelled words OR'ed with close terms."""
+    groups = []
+    for word in _WORD_RE.findall(query.lower()):
+        alternatives = [f'"{word}"*']
+        known = conn.execute(
+            text("SELECT 1 FROM firm_fts_vocab WHERE term >= :word AND term < :high LIMIT 1"),
+            {"word": word, "high": word + "\uffff"},
+        ).first()
+        if not known and len(word) > 2:
+            alternatives += [f'"{term}"' for term in close_terms(conn, word)]
+        groups.append("(" + " OR ".join(alternatives) + ")")
+    return " AND ".join(groups)
+
+
+def _row_to_result(row):
+    return {
+        "source": "license" if row.rowid % 2 == 0 else "contact",
+        "id": row.rowid // 2,
+        "name": row.name,
+        "corporateName": row.corporate_name,
+        "doingBusinessAs": row.doing_business_as,
+        "address": row.address,
+        "city": row.city,
+        "score": round(-row.rank, 3),
+    }
+
+
+def search(engine, query, limit=DEFAULT_LIMIT):
+    """Best matching licenses and contacts for `query`, highest score first; raises ValueError on a bad limit."""
+    limit = max(1, min(integer_param(limit or DEFAULT_LIMIT, 'limit'), MAX_LIMIT))
+    if not is_supported(engine):
+        return _like_search(engine, query, limit)
+
+    with engine.connect() as conn:
+        match = build_match(conn, query)
+        if not match:
+            return []
+        rows = conn.execute(
+            text(f"SELECT rowid, name, corporate_name, doing_business_as, address, city,"
+                 f" bm25(firm_fts, {RANK_WEIGHTS}) AS rank"
+                 f" FROM firm_fts WHERE firm_fts MATCH :match ORDER BY rank LIMIT :limit"),
+            {"match": match, "limit": limit},
+        ).all()
+    return [_row_to_result(row) for row in rows]
+
+
+def suggest(engine, prefix, limit=10):
+    """Distinct firm names for autocompletion as the inspector types."""
+    names = []
+    for result in search(engine, prefix, limit=limit * 3):
+        if result["name"] and result["name"] not in names:
+            names.append(result["name"])
+    return names[:limit]
+
+
+def _like_search(engine, query, limit):
+    pattern = f"%{query.strip()}%"
+    with engine.connect() as conn:
+        licenses = conn.execute(
+            select(License.license_address_id, License.business_name, License.corporate_name,
+                   License.doing_business_as, License.address_line_1, License.city)
+            .where(or_(License.business_name.ilike(pattern), License.corporate_name.ilike(pattern),
+                       License.doing_business_as.ilike(pattern)))
+            .limit(limit)
+        ).all()
+        contacts = conn.execute(
+            select(Contact.id, Contact.name, Contact.address, Contact.county)
+            .where(Contact.name.ilike(pattern)).limit(limit)
+        ).all()
+    results = [{"source": "license", "id": row[0], "name": row[1], "corporateName": row[2],
+                "doingBusinessAs": row[3], "address": row[4], "city": row[5], "score": None} for row in licenses]
+    results += [{"source": "contact", "id": row[0], "name": row[1], "corporateName": None,
+                 "doingBusinessAs": None, "address": row[2], "city": row[3], "score": None} for row in contacts]
+    return results[:limit]
@@ -0,0 +1,46 @@
+# Production server settings: gunicorn -c gunicorn.conf.py main:app
+#
+# Every setting can be overridden from the environment; see DEPLOYMENT.md for how the
+# worker and thread counts were chosen and how to re-measure them.
+
+import importlib
+import os
+
+
+bind = os.getenv('BIND', '0.0.0.0:80')
+
+# Processes: each one holds its own YOLO model (several hundred MB), so size this by
+# memory and CPU cores, not by expected concurrency
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+# Threads per process: requests mostly wait on openFDA, CDPH, SerpAPI and the chat
+# upstream, so a worker keeps serving while some of its threads are blocked on I/O
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', 8))
+
+# Import the app once in the master before forking (the database is created and seeded
+# beforehand by `flask --app main init-db`, see the Dockerfile); post_fork below does the
+# per-process setup
+preload_app = os.getenv('WEB_PRELOAD', 'true').lower() == 'true'
+
+# YOLO on CPU and multi-page openFDA pulls can take a while
+timeout = int(os.getenv('WEB_TIMEOUT', 120))
+# On HUP or TERM, workers finish their in-flight requests for up to this long
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# Recycle workers now and then so slow leaks in native libraries do not build up
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+# The heartbeat file lives in memory; Docker's /tmp may be on a slow overlay filesystem
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = '-'
+loglevel = os.getenv('WEB_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    # init_worker() sits next to the app object, in the module named by the app URI (main:app)
+    module = importlib.import_module(server.app.app_uri.split(':')[0])
+    module.init_worker()
+    server.log.info(f"Worker {worker.pid} ready")
@@ -0,0 +1,196 @@
+# Result cache for repeated device photos, keyed on a perceptual hash of the image.
+#
+# Inspectors often shoot the same device several times from nearly the same angle. Each
+# upload is reduced to a 64-bit pHash (or dHash), and a stored result is reused when an
+# earlier image of the same kind of request is within MAX_DISTANCE bits (Hamming distance)
+# of it. /predict then skips YOLO and /serpapi-upload skips a paid reverse image search.
+#
+# Results live in a SQLite file shared by every worker on the host and survive restarts.
+# Each process keeps only the hashes in memory, picks up rows other workers added since
+# its last lookup, and reads the result itself from disk on a hit. Each namespace holds at
+# most MAX_ENTRIES results; the least recently used are evicted beyond that.
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+CACHE_PATH = os.getenv('IMAGE_CACHE_PATH', 'image_cache.db')
+HASH_ALGORITHM = os.getenv('IMAGE_CACHE_HASH', 'phash')
+MAX_DISTANCE = int(os.getenv('IMAGE_CACHE_DISTANCE', 6))
+MAX_ENTRIES = int(os.getenv('IMAGE_CACHE_MAX_ENTRIES', 2000))
+DEFAULT_TTL = int(os.getenv('IMAGE_CACHE_TTL', 30 * 86400))
+
+
+# --- Hashing -----------------------------------------------------------------------------
+
+def _bits_to_int(bits):
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def dhash(image, size=8):
+    """Difference hash: whether each pixel is brighter than its right neighbour."""
+    import numpy as np
+    from PIL import Image
+
+    pixels = np.asarray(image.convert("L").resize((size + 1, size), Image.BILINEAR), dtype=np.int16)
+    return _bits_to_int((pixels[:, 1:] > pixels[:, :-1]).flatten())
+
+
+def phash(image, size=8, scale=4):
+    """DCT hash: the lowest `size` x `size` frequencies of the image against their median."""
+    import numpy as np
+    from PIL import Image
+
+    n = size * scale
+    pixels = np.asarray(image.convert("L").resize((n, n), Image.BILINEAR), dtype=np.float64)
+    # 2-D DCT-II as two matrix products
+    k = np.arange(n)
+    basis = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    low = (basis @ pixels @ basis.T)[:size, :size]
+    return _bits_to_int((low > np.median(low)).flatten())
+
+
+HASHES = {"phash": phash, "dhash": dhash}
+
+
+def hash_image(image, algorithm=HASH_ALGORITHM):
+    """Perceptual hash of a decoded, oriented PIL image (see intake.load)."""
+    return HASHES[algorithm](image)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def _to_signed(value):
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+# --- Cache -------------------------------------------------------------------------------
+
+class ImageCache:
+    def __init__(self, path=CACHE_PATH, max_distance=MAX_DISTANCE, max_entries=MAX_ENTRIES, ttls=None,
+                 default_ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        # namespace -> {hash: row id}, and the highest row id already indexed
+        self._index = {}
+        self._synced_id = 0
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    @property
+    def conn(self):
+        # SQLite connections must not cross a fork, so every worker opens its own
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn_pid = os.getpid()
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS image_cache ('
+                ' id INTEGER PRIMARY KEY,'
+                ' namespace TEXT NOT NULL,'
+                ' hash INTEGER NOT NULL,'
+                ' value TEXT NOT NULL,'
+                ' expires_at REAL NOT NULL,'
+                ' last_access REAL NOT NULL,'
+                ' UNIQUE (namespace, hash))'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS ix_image_cache_last_access ON image_cache (namespace, last_access)')
+            self._index, self._synced_id = {}, 0
+        return self._conn
+
+    def _sync(self):
+        """Index the hashes stored since the last lookup, by this or any other worker."""
+        rows = self.conn.execute('SELECT id, namespace, hash FROM image_cache WHERE id > ?', (self._synced_id,)).fetchall()
+        for row_id, namespace, value in rows:
+            self._index.setdefault(namespace, {})[_to_unsigned(value)] = row_id
+            self._synced_id = max(self._synced_id, row_id)
+
+    def _nearest(self, namespace, image_hash):
+        hashes = self._index.get(namespace, {})
+        if image_hash in hashes:
+            return image_hash, 0
+        best, best_distance = None, self.max_distance + 1
+        for candidate in hashes:
+            distance = hamming(candidate, image_hash)
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+        return best, best_distance
+
+    def get(self, namespace, image_hash):
+        """The result stored for the closest image within max_distance, or None."""
+        now = time.time()
+        with self._lock:
+            self._sync()
+            while True:
+                match, distance = self._nearest(namespace, image_hash)
+                if match is None:
+                    self.misses += 1
+                    return None
+                row_id = self._index[namespace][match]
+                row = self.conn.execute('SELECT value, expires_at FROM image_cache WHERE id = ?', (row_id,)).fetchone()
+                if row is not None and row[1] > now:
+                    break
+                # Evicted by another worker or expired: forget it and try the next closest
+                del self._index[namespace][match]
+                if row is not None:
+                    self.conn.execute('DELETE FROM image_cache WHERE id = ?', (row_id,))
+            self.conn.execute('UPDATE image_cache SET last_access = ? WHERE id = ?', (now, row_id))
+            self.hits += 1
+            if distance:
+                self.near_hits += 1
+        return json.loads(row[0])
+
+    def set(self, namespace, image_hash, value):
+        now = time.time()
+        ttl = self.ttls.get(namespace, self.default_ttl)
+        with self._lock:
+            self.conn.execute(
+                'INSERT INTO image_cache (namespace, hash, value, expires_at, last_access) VALUES (?, ?, ?, ?, ?)'
+                ' ON CONFLICT (namespace, hash) DO UPDATE SET value = excluded.value,'
+                ' expires_at = excluded.expires_at, last_access = excluded.last_access',
+                (namespace, _to_signed(image_hash), json.dumps(value), now + ttl, now),
+            )
+            evicted = self.conn.execute(
+                'SELECT id, hash FROM image_cache WHERE namespace = ? ORDER BY last_access DESC LIMIT -1 OFFSET ?',
+                (namespace, self.max_entries),
+            ).fetchall()
+            for row_id, stored_hash in evicted:
+                self.conn.execute('DELETE FROM image_cache WHERE id = ?', (row_id,))
+                self._index.get(namespace, {}).pop(_to_unsigned(stored_hash), None)
+            self._sync()
+
+    def stats(self):
+        with self._lock:
+            self._sync()
+            entries = {namespace: len(hashes) for namespace, hashes in self._index.items()}
+        return {"algorithm": HASH_ALGORITHM, "max_distance": self.max_distance, "entries": entries,
+                "hits": self.hits, "near_hits": self.near_hits, "misses": self.misses}
+
+
+def create_cache():
+    """The shared cache, or None when IMAGE_CACHE_PATH is set to an empty string."""
+    if not CACHE_PATH:
+        return None
+    logging.info(f"Using image result cache at {CACHE_PATH}")
+    return ImageCache(CACHE_PATH)
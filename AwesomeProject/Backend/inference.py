@@ -0,0 +1,287 @@
+# YOLO device detection for /predict.
+#
+# The model (and torch with it) is loaded once per process, never at import: by a warm-up
+# thread started in each gunicorn worker (YOLO_WARMUP=background, the default) or by the
+# first /predict (YOLO_WARMUP=lazy). Requests arriving mid warm-up wait on the lock.
+#
+# Inference runs entirely in memory: nothing is saved by ultralytics, and the annotated
+# image is JPEG-encoded into a buffer rather than written to and read back from disk.
+#
+# Concurrent /predict requests are micro-batched: request threads queue their image and
+# wait, and INFERENCE_THREADS batcher threads each take up to BATCH_SIZE queued images,
+# waiting at most BATCH_WAIT_MS for the batch to fill, run one model.predict over them
+# and hand every request its own result. Each gunicorn worker process has its own batcher.
+#
+# The model can run on PyTorch (last.pt) or on an export of it made by model_export.py:
+# ONNX Runtime or OpenVINO, optionally int8. YOLO_RUNTIME picks one; with "auto" (the
+# default) the fastest backend that passed validation against PyTorch in the last
+# `model_export.py benchmark` run is used, and PyTorch itself when none has. The benchmark
+# records the SHA-256 of the weights it validated; once last.pt is replaced its results
+# no longer count until the exports are redone and benchmarked again.
+
+import base64
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+MODEL_PATH = os.getenv('YOLO_MODEL', 'last.pt')
+RUNTIME = os.getenv('YOLO_RUNTIME', 'auto')
+BENCHMARK_PATH = os.getenv('YOLO_BENCHMARK', 'model_benchmark.json')
+YOLO_WARMUP = os.getenv('YOLO_WARMUP', 'background')
+JPEG_QUALITY = int(os.getenv('PREDICT_JPEG_QUALITY', 90))
+
+BATCH_SIZE = int(os.getenv('BATCH_SIZE', 8))
+BATCH_WAIT_MS = float(os.getenv('BATCH_WAIT_MS', 10))
+INFERENCE_THREADS = int(os.getenv('INFERENCE_THREADS', 1))
+PREDICT_TIMEOUT = float(os.getenv('PREDICT_TIMEOUT', 60))
+
+# backend -> (file or directory derived from MODEL_PATH, module its runtime needs)
+BACKENDS = {
+    "torch": ("{stem}.pt", "torch"),
+    "onnx": ("{stem}.onnx", "onnxruntime"),
+    "onnx-int8": ("{stem}.int8.onnx", "onnxruntime"),
+    "openvino": ("{stem}_openvino_model", "openvino"),
+    "openvino-int8": ("{stem}_int8_openvino_model", "openvino"),
+}
+
+_model = None
+_model_lock = threading.Lock()
+_backend = None
+
+
+def backend_path(backend, model_path=MODEL_PATH):
+    stem = os.path.splitext(model_path)[0]
+    return BACKENDS[backend][0].format(stem=stem)
+
+
+def available_backends(model_path=MODEL_PATH):
+    """Backends whose exported model exists and whose runtime is installed."""
+    return [backend for backend, (_, module) in BACKENDS.items()
+            if os.path.exists(backend_path(backend, model_path)) and importlib.util.find_spec(module) is not None]
+
+
+def weights_digest(model_path=MODEL_PATH):
+    """SHA-256 of the PyTorch weights, or None if there are none."""
+    digest = hashlib.sha256()
+    try:
+        with open(model_path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def select_backend(runtime=RUNTIME, model_path=MODEL_PATH, benchmark_path=BENCHMARK_PATH):
+    """The backend to load: `runtime` if not auto, else the fastest validated one, else torch."""
+    if runtime != 'auto':
+        return runtime
+    available = available_backends(model_path)
+    try:
+        with open(benchmark_path) as file:
+            benchmark = json.load(file)
+        results = benchmark["backends"]
+        # Results for other weights say nothing about the exports of these ones
+        if benchmark.get("weights_sha256") != weights_digest(model_path):
+            logging.warning(f"{benchmark_path} was made for other weights than {model_path}; ignoring it")
+            results = {}
+    except (OSError, ValueError, KeyError):
+        results = {}
+    validated = [backend for backend in available if results.get(backend, {}).get("valid")]
+    if validated:
+        return max(validated, key=lambda backend: results[backend]["images_per_second"])
+    # An export nobody has checked against torch is never served
+    return "torch"
+
+
+def load_model(backend=None):
+    global _backend
+    from ultralytics import YOLO
+    backend = backend or select_backend()
+    started = time.perf_counter()
+    model = YOLO(backend_path(backend), task="detect")
+    _backend = backend
+    logging.info(f"Loaded YOLO model ({backend}) in process {os.getpid()} in {time.perf_counter() - started:.1f}s")
+    return model
+
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = load_model()
+    return _model
+
+
+def warm_up():
+    try:
+        get_model()
+    except Exception as e:
+        # /predict will retry the load and report the error
+        logging.error(f"Error warming up YOLO model: {e}")
+
+
+def start_warm_up():
+    if YOLO_WARMUP == 'background':
+        threading.Thread(target=warm_up, name="yolo-warmup", daemon=True).start()
+
+
+class Batcher:
+    """Queue of images waiting for inference and the threads that run them in batches."""
+
+    def __init__(self, run_batch, batch_size=BATCH_SIZE, wait_ms=BATCH_WAIT_MS, threads=INFERENCE_THREADS):
+        # run_batch(thread_index, images) -> one result per image
+        self.run_batch = run_batch
+        self.batch_size = batch_size
+        self.wait = wait_ms / 1000
+        self.queue = queue.Queue()
+        self.started_at = time.time()
+        self._stats_lock = threading.Lock()
+        self._stats = {"batches": 0, "images": 0, "errors": 0, "inference_seconds": 0.0,
+                       "queue_wait_seconds": 0.0, "max_queue_depth": 0}
+        for index in range(threads):
+            threading.Thread(target=self._run, args=(index,), name=f"inference-{index}", daemon=True).start()
+
+    def submit(self, image):
+        """Queue one image; the returned Future resolves to its result."""
+        future = Future()
+        self.queue.put((image, future, time.perf_counter()))
+        depth = self.queue.qsize()
+        with self._stats_lock:
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], depth)
+        return future
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.perf_counter() + self.wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, index):
+        while True:
+            batch = self._next_batch()
+            started = time.perf_counter()
+            waited = sum(started - queued_at for _, _, queued_at in batch)
+            try:
+                results = self.run_batch(index, [image for image, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                with self._stats_lock:
+                    self._stats["errors"] += len(batch)
+                continue
+            elapsed = time.perf_counter() - started
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+            with self._stats_lock:
+                self._stats["batches"] += 1
+                self._stats["images"] += len(batch)
+                self._stats["inference_seconds"] += elapsed
+                self._stats["queue_wait_seconds"] += waited
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        images, batches = stats["images"], stats["batches"]
+        stats.update({
+            "queue_depth": self.queue.qsize(),
+            "batch_size": self.batch_size,
+            "batch_wait_ms": self.wait * 1000,
+            "mean_batch_size": round(images / batches, 2) if batches else 0,
+            "mean_queue_wait_ms": round(stats["queue_wait_seconds"] / images * 1000, 1) if images else 0,
+            "images_per_inference_second": round(images / stats["inference_seconds"], 2) if stats["inference_seconds"] else 0,
+            "images_per_second": round(images / (time.time() - self.started_at), 3),
+        })
+        return stats
+
+
+def _predict_batch(thread_index, images):
+    # The first batcher thread uses the warmed-up model; ultralytics models are not safe to
+    # share between threads, so any further threads load their own copy
+    model = get_model() if thread_index == 0 else _thread_model()
+    return model.predict(source=images, save=False, verbose=False)
+
+
+_thread_local = threading.local()
+
+
+def _thread_model():
+    if getattr(_thread_local, "model", None) is None:
+        _thread_local.model = load_model()
+    return _thread_local.model
+
+
+_batcher = None
+_batcher_pid = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher():
+    """The process's batcher, started on first use (and again in each forked worker)."""
+    global _batcher, _batcher_pid
+    if _batcher_pid != os.getpid():
+        with _batcher_lock:
+            if _batcher_pid != os.getpid():
+                _batcher = Batcher(_predict_batch)
+                _batcher_pid = os.getpid()
+    return _batcher
+
+
+def predict(image):
+    """Run the model on one BGR image array (see intake.Photo) and return its ultralytics Result."""
+    return get_batcher().submit(image).result(timeout=PREDICT_TIMEOUT)
+
+
+def stats():
+    if _batcher is None or _batcher_pid != os.getpid():
+        return {"batches": 0, "images": 0, "queue_depth": 0, "backend": _backend}
+    return dict(_batcher.stats(), backend=_backend)
+
+
+def detections(result, scale=1.0):
+    """Boxes, classes and confidences of a Result as JSON-ready dicts, boxes multiplied by `scale`."""
+    boxes = result.boxes
+    names = result.names
+    return [
+        {
+            "class": names[int(class_id)],
+            "classId": int(class_id),
+            "confidence": round(float(confidence), 4),
+            "box": [round(float(value) * scale, 1) for value in box],  # x1, y1, x2, y2 in pixels
+        }
+        for box, class_id, confidence in zip(boxes.xyxy.tolist(), boxes.cls.tolist(), boxes.conf.tolist())
+    ]
+
+
+def rescale(detections, from_size, to_size):
+    """`detections` with their boxes moved from an image of `from_size` to one of `to_size` (width, height)."""
+    x_scale = to_size[0] / from_size[0]
+    y_scale = to_size[1] / from_size[1]
+    return [
+        dict(detection, box=[round(value * scale, 1)
+                             for value, scale in zip(detection["box"], (x_scale, y_scale, x_scale, y_scale))])
+        for detection in detections
+    ]
+
+
+def encode_jpeg(image, quality=JPEG_QUALITY):
+    """Base64 of `image` (a BGR array) encoded as JPEG in memory."""
+    import cv2
+
+    ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Failed to encode the annotated image")
+    return base64.b64encode(buffer).decode("ascii")
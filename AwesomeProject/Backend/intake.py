@@ -0,0 +1,78 @@
+# Shared decoding of uploaded photos for /predict and /serpapi-upload.
+#
+# A 12 MP phone photo is decoded once, at the size it is needed:
+#   - JPEG "draft" mode makes libjpeg decode at 1/2, 1/4 or 1/8 scale directly, so a
+#     4032x3024 upload never exists in memory at full resolution;
+#   - EXIF orientation is applied, so a portrait shot is not seen sideways;
+#   - the image is resized once, to the model input size (its longest side) for YOLO,
+#     which then only pads it, or to SEARCH_MAX_SIDE for a reverse image search.
+# The same decoded image feeds the perceptual hash of image_cache.
+
+import io
+import os
+
+
+MODEL_INPUT_SIZE = int(os.getenv('MODEL_INPUT_SIZE', 640))
+SEARCH_MAX_SIDE = int(os.getenv('SEARCH_MAX_SIDE', 1600))
+SEARCH_MAX_BYTES = int(os.getenv('SEARCH_MAX_BYTES', 1024 * 1024))
+SEARCH_JPEG_QUALITY = 85
+SEARCH_MIN_JPEG_QUALITY = 40
+ORIENTATION_TAG = 0x0112
+
+
+class Photo:
+    """A decoded upload, oriented and scaled to at most `max_side` pixels."""
+
+    def __init__(self, image, original_size):
+        self.image = image
+        # Size of the oriented upload before scaling, for mapping boxes back
+        self.original_size = original_size
+
+    @property
+    def scale(self):
+        """Factor from this image's pixels back to the original upload's."""
+        return self.original_size[0] / self.image.width
+
+    def to_model_array(self):
+        """Array for ultralytics, which expects BGR channel order like cv2.imread."""
+        import numpy as np
+
+        # Reversing the channel axis is a view, not a copy
+        return np.asarray(self.image)[:, :, ::-1]
+
+    def to_jpeg(self, max_bytes=SEARCH_MAX_BYTES, quality=SEARCH_JPEG_QUALITY):
+        """Re-encode as a JPEG of at most `max_bytes`, lowering the quality, then the size, if needed."""
+        from PIL import Image
+
+        image = self.image
+        while True:
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=quality, optimize=True)
+            if buffer.tell() <= max_bytes:
+                return buffer.getvalue()
+            if quality > SEARCH_MIN_JPEG_QUALITY:
+                quality = max(SEARCH_MIN_JPEG_QUALITY, quality - 15)
+            else:
+                image = image.resize((max(1, image.width * 3 // 4), max(1, image.height * 3 // 4)), Image.BILINEAR)
+
+
+def load(data, max_side):
+    """Decode image bytes into a Photo no larger than `max_side`; raises on unreadable data."""
+    from PIL import Image, ImageOps
+
+    image = Image.open(io.BytesIO(data))
+    width, height = image.size
+    # Orientations 5 to 8 turn the photo by 90 degrees
+    if image.getexif().get(ORIENTATION_TAG, 1) in (5, 6, 7, 8):
+        width, height = height, width
+
+    # Let the JPEG decoder do most of the downscaling (no-op for other formats)
+    image.draft("RGB", (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if max(image.size) > max_side:
+        ratio = max_side / max(image.size)
+        image = image.resize((max(1, round(image.width * ratio)), max(1, round(image.height * ratio))),
+                             Image.BILINEAR, reducing_gap=2.0)
+    return Photo(image, (width, height))
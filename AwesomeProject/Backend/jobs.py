@@ -0,0 +1,260 @@
+# Background jobs for the slow endpoints.
+#
+# /serpapi-upload, /predict and /maude take `?async=true` (or a `Prefer: respond-async`
+# header): the request is validated and its input read as usual, then the slow part (the
+# reverse image search, inference, the openFDA pull) is queued and the caller gets
+# 202 Accepted with a job id right away. GET /jobs/<id> reports the job's status and, once
+# it is done, its result; with ?wait=<seconds> it long-polls until the job finishes. A
+# `callback` URL, if given, is POSTed the finished job; it must match an entry of
+# JOB_CALLBACK_ALLOW (a host name, or a URL prefix) and resolve to public addresses only,
+# so callers cannot point the server at localhost, the LAN or a metadata endpoint.
+# Without JOB_CALLBACK_ALLOW callbacks are refused.
+#
+# Jobs run on a pool of JOB_WORKERS threads in the worker process that accepted them, so
+# the WSGI threads go straight back to the fast lookups. Their state lives in a SQLite
+# table shared by every worker on the host, so any worker can answer the poll. Finished
+# jobs are deleted JOB_TTL seconds later. Jobs whose worker exited (recycled, killed, or a
+# container restart) before finishing them are reported as failed.
+
+import contextlib
+import ipaddress
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+import serialize
+
+
+JOB_DB_PATH = os.getenv('JOB_DB_PATH', 'jobs.db')
+WORKERS = int(os.getenv('JOB_WORKERS', 4))
+TTL = int(os.getenv('JOB_TTL', 86400))
+MAX_WAIT = float(os.getenv('JOB_MAX_WAIT', 30))
+# How often a long-poll re-reads the table for a job another worker is running
+POLL_INTERVAL = 0.25
+# Comma-separated hosts (hooks.example.com) or URL prefixes (https://example.com/hooks/)
+CALLBACK_ALLOW = [entry.strip() for entry in os.getenv('JOB_CALLBACK_ALLOW', '').split(',') if entry.strip()]
+CALLBACK_TIMEOUT = (3.05, 10)
+# Most records an async openFDA pull may collect: its result is built and stored whole
+MAX_RECORDS = int(os.getenv('JOB_MAX_RECORDS', 5000))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+COLUMNS = ("id", "kind", "status", "pid", "callback", "result", "error", "created_at", "started_at", "finished_at")
+
+
+def _public(host, port):
+    """True if every address `host` resolves to is a public one."""
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError):
+        return False
+    return bool(addresses) and all(ipaddress.ip_address(address.split('%')[0]).is_global for address in addresses)
+
+
+def callback_allowed(url, allow=None):
+    """True if `url` is an http(s) URL on the allow-list that resolves to public addresses only."""
+    allow = CALLBACK_ALLOW if allow is None else allow
+    try:
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+    except ValueError:
+        return False
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        return False
+
+    def matches(entry):
+        if '://' in entry:
+            prefix = entry.rstrip('/') + '/'
+            return url == entry.rstrip('/') or url.startswith(prefix)
+        return parts.hostname == entry.lower()
+
+    return any(matches(entry) for entry in allow) and _public(parts.hostname, port)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobQueue:
+    def __init__(self, path=JOB_DB_PATH, workers=WORKERS, ttl=TTL, context=None):
+        self.path = path
+        self.workers = workers
+        self.ttl = ttl
+        # Factory of the context manager every job runs in, e.g. the Flask app context
+        self.context = context or contextlib.nullcontext
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._executor = None
+        self._executor_pid = None
+        # job id -> Event set when it finishes, for the jobs of this process
+        self._finished = {}
+        self.counts = {"submitted": 0, DONE: 0, FAILED: 0}
+
+    @property
+    def conn(self):
+        # SQLite connections must not cross a fork, so every worker opens its own
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn_pid = os.getpid()
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA busy_timeout=5000')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                ' id TEXT PRIMARY KEY,'
+                ' kind TEXT NOT NULL,'
+                ' status TEXT NOT NULL,'
+                ' pid INTEGER NOT NULL,'
+                ' callback TEXT,'
+                ' result BLOB,'
+                ' error TEXT,'
+                ' created_at REAL NOT NULL,'
+                ' started_at REAL,'
+                ' finished_at REAL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS ix_jobs_finished_at ON jobs (finished_at)')
+        return self._conn
+
+    @property
+    def executor(self):
+        # Threads don't survive a fork either: each worker starts its own pool on first submit
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+            self._executor_pid = os.getpid()
+            self._finished = {}
+        return self._executor
+
+    def submit(self, kind, func, *args, callback=None):
+        """Queue func(*args) and return the new job's id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        executor = self.executor
+        with self._lock:
+            # Finished jobs past their TTL go whenever a new one comes in
+            self.conn.execute('DELETE FROM jobs WHERE finished_at < ?', (now - self.ttl,))
+            self.conn.execute(
+                'INSERT INTO jobs (id, kind, status, pid, callback, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, kind, QUEUED, os.getpid(), callback, now),
+            )
+            self._finished[job_id] = threading.Event()
+            self.counts["submitted"] += 1
+        executor.submit(self._run, job_id, func, args)
+        return job_id
+
+    def _run(self, job_id, func, args):
+        with self._lock:
+            self.conn.execute('UPDATE jobs SET status = ?, started_at = ? WHERE id = ?', (RUNNING, time.time(), job_id))
+        try:
+            with self.context():
+                result = func(*args)
+            self._finish(job_id, DONE, result=serialize.dumps(result))
+        except Exception as e:
+            logging.error(f"Job {job_id} failed: {e}")
+            self._finish(job_id, FAILED, error=str(e))
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._lock:
+            self.conn.execute(
+                'UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?',
+                (status, result, error, time.time(), job_id),
+            )
+            self.counts[status] += 1
+            event = self._finished.pop(job_id, None)
+        if event is not None:
+            event.set()
+        job = self._load(job_id)
+        if job is not None and job["callback"]:
+            self._notify(job)
+
+    def _notify(self, job):
+        # Checked again at send time, in case the name now resolves elsewhere. A plain request,
+        # not the upstream session: no retries, and no redirects to somewhere not allowed.
+        if not callback_allowed(job["callback"]):
+            logging.warning(f"Callback for job {job['id']} to {job['callback']} is no longer allowed")
+            return
+        try:
+            requests.post(job["callback"], data=serialize.dumps(to_json(job)), timeout=CALLBACK_TIMEOUT,
+                          allow_redirects=False, headers={"Content-Type": "application/json"}).raise_for_status()
+        except Exception as e:
+            logging.warning(f"Callback for job {job['id']} to {job['callback']} failed: {e}")
+
+    def _load(self, job_id):
+        with self._lock:
+            row = self.conn.execute(f'SELECT {", ".join(COLUMNS)} FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = dict(zip(COLUMNS, row))
+            if job["status"] not in FINISHED and job["pid"] != os.getpid() and not _alive(job["pid"]):
+                job.update(status=FAILED, error="The worker running this job exited before it finished",
+                           finished_at=time.time())
+                self.conn.execute('UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?',
+                                  (FAILED, job["error"], job["finished_at"], job_id))
+        return job
+
+    def get(self, job_id, wait=0):
+        """The job as a dict, or None if unknown; waits up to `wait` seconds for it to finish."""
+        deadline = time.monotonic() + min(MAX_WAIT, max(0, wait))
+        while True:
+            job = self._load(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in FINISHED or remaining <= 0:
+                return job
+            event = self._finished.get(job_id) if self._executor_pid == os.getpid() else None
+            if event is not None:
+                # Our own job: woken as soon as it finishes
+                event.wait(remaining)
+            else:
+                # Another worker's job: watch the table
+                time.sleep(min(POLL_INTERVAL, remaining))
+
+    def fail_interrupted(self):
+        """Mark every unfinished job failed; run at startup, before any worker takes jobs."""
+        with self._lock:
+            failed = self.conn.execute(
+                'UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status IN (?, ?)',
+                (FAILED, "Interrupted by a restart", time.time(), QUEUED, RUNNING),
+            ).rowcount
+        if failed:
+            logging.info(f"Marked {failed} interrupted jobs failed")
+        return failed
+
+    def stats(self):
+        with self._lock:
+            statuses = dict(self.conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+            local = dict(self.counts, pending=len(self._finished) if self._executor_pid == os.getpid() else 0)
+        return {"workers": self.workers, "jobs": statuses, "worker_process": local}
+
+
+def to_json(job):
+    """API view of a job dict: camelCase, the result decoded, unset fields left out."""
+    view = {
+        "jobId": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "createdAt": job["created_at"],
+    }
+    if job["started_at"] is not None:
+        view["startedAt"] = job["started_at"]
+    if job["finished_at"] is not None:
+        view["finishedAt"] = job["finished_at"]
+    if job["status"] == DONE:
+        view["result"] = json.loads(job["result"])
+    elif job["error"] is not None:
+        view["error"] = job["error"]
+    return view
@@ -0,0 +1,88 @@
+# Query building for /license-search.
+#
+# Text filters are case-insensitive. businessName, addressLine1 and zip are prefix
+# matches, written as a range on lower(column) so SQLite and MySQL can use the lower()
+# indexes on License instead of a LIKE scan. Results are paged by keyset on the
+# primary key: the caller passes back the last license_address_id it saw as `cursor`.
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from models import License
+
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def prefix_range(column, prefix):
+    """Conditions matching values of `column` starting with `prefix`, usable by a B-tree index."""
+    prefix = prefix.lower()
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return [column >= prefix, column < upper]
+
+
+def text_filter(filters, key):
+    """The stripped string value of `key`, '' when absent; raises ValueError for other JSON types."""
+    value = filters.get(key)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise ValueError(f"{key} must be a string")
+    return value.strip()
+
+
+def integer_param(value, name):
+    """`value` (a JSON number or numeric string) as an int; raises ValueError otherwise."""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"{name} must be an integer")
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+
+
+def build_search(filters, cursor=None, limit=DEFAULT_LIMIT):
+    """Build the select for a /license-search body; raises ValueError on bad input."""
+    conditions = []
+
+    business_name = text_filter(filters, 'businessName')
+    if business_name:
+        conditions += prefix_range(func.lower(License.business_name), business_name)
+    address_line1 = text_filter(filters, 'addressLine1')
+    if address_line1:
+        conditions += prefix_range(func.lower(License.address_line_1), address_line1)
+    city = text_filter(filters, 'city')
+    if city:
+        conditions.append(func.lower(License.city) == city.lower())
+    zip_code = text_filter(filters, 'zip')
+    if zip_code:
+        conditions += prefix_range(License.zip, zip_code)
+
+    exact_filters = {
+        'licenseCodeDescription': License.license_code_description,
+        'licenseStatusCode': License.license_status_code,
+        'licenseAddressTypeDescription': License.license_address_type_description,
+        'state': License.state,
+        'countyCode': License.county_code,
+    }
+    for key, column in exact_filters.items():
+        value = text_filter(filters, key)
+        if value:
+            conditions.append(column == value)
+
+    expiration_date = text_filter(filters, 'expirationDate')
+    if expiration_date:
+        try:
+            day = datetime.strptime(expiration_date[:10], '%Y-%m-%d')
+        except ValueError:
+            raise ValueError("expirationDate must be YYYY-MM-DD")
+        # expiration_date is a DATETIME, so match the whole day as an index range
+        conditions += [License.expiration_date >= day, License.expiration_date < day + timedelta(days=1)]
+
+    if cursor is not None:
+        conditions.append(License.license_address_id > integer_param(cursor, 'cursor'))
+
+    limit = max(1, min(integer_param(limit or DEFAULT_LIMIT, 'limit'), MAX_LIMIT))
+    return select(License).where(*conditions).order_by(License.license_address_id).limit(limit), limit
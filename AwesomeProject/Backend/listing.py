@@ -0,0 +1,106 @@
+# Paging, conditional requests and streamed exports for the /contacts and /licenses collections.
+#
+# Rows are read as plain column tuples (see serialize.py) in keyset chunks on the primary
+# key, so a full export holds one chunk in memory whatever the table size. Each table's
+# ETag comes from a version counter that triggers bump on every insert, update and delete
+# (SQLite), or from its row count and highest id on other databases.
+
+import hashlib
+
+from sqlalchemy import func, select, text
+
+from serialize import dumps
+
+
+CHUNK_SIZE = 1000
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+VERSION_TABLE = "collection_version"
+
+
+def ensure_versions(engine, tables):
+    """Create the version counter and its triggers for each of `tables` (SQLite only)."""
+    if engine.dialect.name != 'sqlite':
+        return
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (name TEXT PRIMARY KEY, version INTEGER NOT NULL)"))
+        for table in tables:
+            conn.execute(text(f"INSERT OR IGNORE INTO {VERSION_TABLE} (name, version) VALUES (:name, 1)"), {"name": table.name})
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {table.name}_version_{event.lower()} AFTER {event} ON {table.name}"
+                    f" BEGIN UPDATE {VERSION_TABLE} SET version = version + 1 WHERE name = '{table.name}'; END"
+                ))
+
+
+def collection_version(session, table, key):
+    """Opaque string that changes whenever rows of `table` change."""
+    if session.get_bind().dialect.name == 'sqlite':
+        version = session.execute(
+            text(f"SELECT version FROM {VERSION_TABLE} WHERE name = :name"), {"name": table.name}
+        ).scalar()
+        if version is not None:
+            return str(version)
+    count, highest = session.execute(select(func.count(), func.max(key)).select_from(table)).one()
+    return f"{count}-{highest}"
+
+
+def etag(session, serializer, args):
+    """ETag for one representation (page, format) of the collection."""
+    representation = "&".join(f"{name}={value}" for name, value in sorted(args.items()))
+    version = collection_version(session, serializer.table, serializer.primary_key)
+    return hashlib.md5(f"{serializer.table.name}:{version}:{representation}".encode()).hexdigest()
+
+
+def parse_page(args):
+    """(cursor, limit) from the query string; limit is None for a full export."""
+    cursor = args.get('cursor')
+    limit = args.get('limit')
+    try:
+        cursor = int(cursor) if cursor else None
+        limit = max(1, min(int(limit), MAX_LIMIT)) if limit else None
+    except ValueError:
+        raise ValueError("cursor and limit must be numbers")
+    if cursor is not None and limit is None:
+        limit = DEFAULT_LIMIT
+    return cursor, limit
+
+
+def page(session, serializer, cursor=None, limit=DEFAULT_LIMIT):
+    """One page of rows after `cursor` as dicts, in primary key order."""
+    key = serializer.primary_key
+    query = serializer.select().order_by(key).limit(limit)
+    if cursor is not None:
+        query = query.where(key > cursor)
+    return serializer.to_dicts(session.execute(query))
+
+
+def iter_chunks(session, serializer, chunk_size=CHUNK_SIZE):
+    """Yield every row of the table in lists of `chunk_size` dicts."""
+    cursor = None
+    while True:
+        rows = page(session, serializer, cursor, chunk_size)
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        cursor = rows[-1][serializer.primary_key_name]
+
+
+def stream_json_array(chunks):
+    """A JSON array written a chunk at a time, for clients that expect one list."""
+    yield b"["
+    first = True
+    for rows in chunks:
+        # Encode the chunk as one list and drop its brackets
+        body = dumps(rows)[1:-1]
+        yield body if first else b"," + body
+        first = False
+    yield b"]"
+
+
+def stream_ndjson(chunks):
+    for rows in chunks:
+        yield b"".join(dumps(row) + b"\n" for row in rows)
@@ -1,24 +1,29 @@
 import logging
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, url_for
 from flask_cors import CORS
 import requests
-from flask_sqlalchemy import SQLAlchemy
-import sqlite3
-import csv
 import os
-from bs4 import BeautifulSoup
 import re
-from urllib.parse import urljoin
-import time, uuid
-import serpapi
-from flask import send_from_directory, flash, redirect
-from ultralytics import YOLO
-from PIL import Image
-import io
-import numpy as np
+from flask import send_from_directory, flash, redirect, Response, stream_with_context
+import json
 import base64
-import cv2
-import requests as rq
+import cdph
+import database
+import fanout
+import licenses
+import listing
+import fda_store
+import firm_search
+import image_cache
+import inference
+import intake
+import jobs
+import openfda
+import seed
+import serialize
+from models import db, User, Contact, License
+import upstream
+import uploads
 from datetime import datetime
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
@@ -28,6 +33,7 @@ from flask_jwt_extended import JWTManager, create_access_token, jwt_required, ge
 UPLOAD_FOLDER = "/uploads"
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg"}
 MAX_FILE_TIME = 3 * 86400
+IMMUTABLE_MAX_AGE = 365 * 86400
 PUBLIC_IP = "api.healthly.dev"
 
 # Initialize the Flask application
@@ -55,170 +61,50 @@ def construct_warning_letter_url(case_injunction_id, action_date, legal_name):
     normalized_legal_name = normalize_legal_name(legal_name)
     return f"{base_warning_letter_url}/{normalized_legal_name}-{case_injunction_id}-{formatted_date}"
 
-# SQLAlchemy configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///contact_info.db'
+# SQLAlchemy configuration: SQLite in WAL mode by default, or MySQL / DATABASE_URL from the environment
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['JWT_SECRET_KEY'] = 'your_jwt_secret_key'  # Change this to a secure key
 
-db = SQLAlchemy(app)
-
-# User model
-class User(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(150), unique=True, nullable=False)
-    password = db.Column(db.String(150), nullable=False)
-
-# Contact model
-class Contact(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    county = db.Column(db.String(100))
-    name = db.Column(db.String(100))
-    address = db.Column(db.String(200))
-    phone = db.Column(db.String(20))
-    fax = db.Column(db.String(20))
-    link_to_website = db.Column(db.String(100))
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'county': self.county,
-            'name': self.name,
-            'address': self.address,
-            'phone': self.phone,
-            'fax': self.fax,
-            'link_to_website': self.link_to_website
-        }
+database.init_app(app, db)
 
-# licenses
-class License(db.Model):
-    license_address_id = db.Column(db.Integer, primary_key=True) # specify type of field
-    license_id = db.Column(db.Integer) # unique
-    license_number = db.Column(db.Integer) # unique
-    license_code_description = db.Column(db.String(10), unique=True, nullable=True)
-    application_form_type_id = db.Column(db.Integer)
-    license_type_id = db.Column(db.Integer)
-    license_type_code = db.Column(db.String(2), unique=True, nullable=True)
-    license_status_id = db.Column(db.Integer)
-    license_status_code = db.Column(db.String(2), unique=True, nullable=True) # String
-    license_classification_id = db.Column(db.Integer) # edited (db.Datetime, nullable=True, default=datetime.now)
-    license_classification_code = db.Column(db.String(80), unique=False, nullable=True) 
-    license_classification_description = db.Column(db.String(80), unique=False, nullable=True) 
-    expiration_date = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)
-    firm_id = db.Column(db.Integer) # unique
-    corporate_name = db.Column(db.String(80), unique=False, nullable=True)
-    business_name = db.Column(db.String(80), unique=False, nullable=True)
-    doing_business_as = db.Column(db.String(80), unique=False, nullable=True)
-    state_incorporation = db.Column(db.String(80), unique=False, nullable=True)
-    address_line_1 = db.Column(db.String(80), unique=True, nullable=True) # unique
-    address_line_2 = db.Column(db.String(80), unique=False, nullable=True) 
-    city = db.Column(db.String(80), unique=False, nullable=True) 
-    state = db.Column(db.String(80), unique=False, nullable=True) 
-    zip = db.Column(db.String(80), unique=False, nullable=True) 
-    county_id = db.Column(db.Integer)
-    county_code = db.Column(db.String(80), unique=False, nullable=True) 
-    license_address_type_id = db.Column(db.Integer)
-    license_address_type_code = db.Column(db.String(80), unique=False, nullable=True) 
-    license_address_type_description = db.Column(db.String(80), unique=False, nullable=True) 
-    exemptee_last_name = db.Column(db.String(80), unique=False, nullable=True) 
-    exemptee_first_name = db.Column(db.String(80), unique=False, nullable=True)
- 
-
-
-    def to_json(self):
-        return {
-            "licenseAddressId": self.license_address_id,
-            "licenseId": self.license_id,
-            "licenseNumber": self.license_number,
-            "licenseCodeDescription": self.license_code_description,
-            "applicationFormTypeId": self.application_form_type_id,
-            "licenseTypeId": self.license_type_id,
-            "licenseTypeCode": self.license_type_code,
-            "licenseStatusId": self.license_status_id,
-            "licenseStatusCode # String": self.license_status_code,
-            "licenseClassificationId": self.license_classification_id,
-            "licenseClassificationCode": self.license_classification_code,
-            "licenseClassificationDescription": self.license_classification_description,
-            "expirationDate": self.expiration_date,
-            "firmId": self.firm_id,
-            "corporateName": self.corporate_name,
-            "businessName": self.business_name,
-            "doingBusinessAs": self.doing_business_as,
-            "stateIncorporation": self.state_incorporation,
-            "addressLine1": self.address_line_1,
-            "addressLine2": self.address_line_2,
-            "city": self.city,
-            "state": self.state,
-            "zip": self.zip,
-            "countyId": self.county_id,
-            "countyCode": self.county_code,
-            "licenseAddressTypeId": self.license_address_type_id,
-            "licenseAddressTypeCode": self.license_address_type_code,
-            "licenseAddressTypeDescription": self.license_address_type_description,
-            "exempteeLastName": self.exemptee_last_name,
-            "exempteeFirstName": self.exemptee_first_name
-        }
+# Background jobs of /serpapi-upload, /predict and /maude called with ?async=true
+job_queue = jobs.JobQueue(context=app.app_context)
+
+def init_database():
+    """Create the tables and indexes and load the CSVs into empty tables.
+
+    Run once per deployment with `flask --app main init-db` (the container does so before
+    starting gunicorn) rather than on every import of this module.
+    """
+    with app.app_context():
+        db.create_all()
+        # create_all() skips tables that already exist, so add any indexes they are missing
+        for index in License.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+        # Check if the tables are empty and bulk load them from info.csv and license.csv if needed
+        seed.seed_database(db.engine, Contact.__table__, License.__table__)
+        # Built after seeding so a fresh load is indexed in one pass; triggers keep it in sync from then on
+        firm_search.ensure_index(db.engine)
+        # Version counters behind the /contacts and /licenses ETags
+        listing.ensure_versions(db.engine, [Contact.__table__, License.__table__])
+    # Jobs left queued or running by the previous deployment will never finish
+    job_queue.fail_interrupted()
+
+
+@app.cli.command("init-db")
+def init_db_command():
+    """Create and seed the database."""
+    init_database()
+
+
+@app.cli.command("sweep-uploads")
+def sweep_uploads_command():
+    """Delete expired and over-quota reverse image search uploads."""
+    upload_janitor.adopt()
+    totals = upload_janitor.sweep()
+    print(f"Removed {totals['files']} files ({totals['expired']} expired, {totals['over_quota']} over quota), "
+          f"{totals['bytes']} bytes")
 
-# Initialize the database
-with app.app_context():
-    db.create_all()
-    # Check if the database is empty and populate it with data from info.csv if needed
-    if not Contact.query.first():
-        with open('info.csv', mode='r', newline='') as file:
-            csv_reader = csv.reader(file)
-            next(csv_reader)  # Skip header
-            for row in csv_reader:
-                new_contact = Contact(
-                    county=row[0],
-                    name=row[1],
-                    address=row[2],
-                    phone=row[3],
-                    fax=row[4],
-                    link_to_website=row[5]
-                )
-                db.session.add(new_contact)
-            db.session.commit()
-        logging.info("Database populated with initial data from info.csv")
-
-    if not License.query.first():
-        with open('license.csv', mode='r', newline='') as file:
-            csv_reader = csv.reader(file)
-            next(csv_reader)  # Skip header
-            for row in csv_reader:
-                new_contact = License(
-                    license_address_id=int(row[0]),
-                    license_id=int(row[1]),
-                    license_number=int(row[2]),
-                    license_code_description=row[3],
-                    application_form_type_id=int(row[4]),
-                    license_type_id=int(row[5]),
-                    license_type_code=row[6],
-                    license_status_id=int(row[7]),
-                    license_status_code=row[8],
-                    license_classification_id=int(row[9]),
-                    license_classification_code=row[10],
-                    license_classification_description=row[11],
-                    expiration_date=datetime.strptime(row[12], '%Y-%m-%d'),
-                    firm_id=int(row[13]),
-                    corporate_name=row[14],
-                    business_name=row[15],
-                    doing_business_as=row[16],
-                    state_incorporation=row[17],
-                    address_line_1=row[18],
-                    address_line_2=row[19],
-                    city=row[20],
-                    state=row[21],
-                    zip=row[22],
-                    county_id=int(row[23]),
-                    county_code=row[24],
-                    license_address_type_id=int(row[25]),
-                    license_address_type_code=row[26],
-                    license_address_type_description=row[27],
-                    exemptee_last_name=row[28],
-                    exemptee_first_name=row[29]
-                )
-                db.session.add(new_contact)
-            db.session.commit()
-        logging.info("Database populated with initial data from license.csv")
 
 # User registration route
 @app.route('/register', methods=['POST'])
@@ -258,14 +144,47 @@ def protected():
     current_user = get_jwt_identity()
     return jsonify(logged_in_as=current_user), 200
 
+def list_collection(serializer):
+    """GET handler shared by /contacts and /licenses.
+
+    With `limit` (and `cursor`) it returns one keyset page and the next cursor in
+    X-Next-Cursor. Without, it streams the whole table as a JSON array, or as NDJSON for
+    `format=ndjson` / `Accept: application/x-ndjson`. Either way the response carries an
+    ETag and answers a matching If-None-Match with 304 before touching the rows.
+    """
+    try:
+        cursor, limit = listing.parse_page(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    ndjson = request.args.get('format') == 'ndjson' or 'application/x-ndjson' in request.headers.get('Accept', '')
+    tag = listing.etag(db.session, serializer, dict(request.args, format='ndjson' if ndjson else 'json'))
+    if tag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(tag)
+        return response
+
+    if limit is not None:
+        rows = listing.page(db.session, serializer, cursor, limit)
+        response = Response(serialize.dumps(rows), mimetype='application/json')
+        if len(rows) == limit:
+            response.headers['X-Next-Cursor'] = str(rows[-1][serializer.primary_key_name])
+    else:
+        chunks = listing.iter_chunks(db.session, serializer)
+        if ndjson:
+            response = Response(stream_with_context(listing.stream_ndjson(chunks)),
+                                mimetype='application/x-ndjson')
+        else:
+            response = Response(stream_with_context(listing.stream_json_array(chunks)),
+                                mimetype='application/json')
+    response.set_etag(tag)
+    return response
+
 # Define the route for managing district attorney office contacts
 @app.route("/contacts", methods=['GET', 'POST'])
 def manage_contacts():
     if request.method == 'GET':
-        contacts = Contact.query.all()
-        if not contacts:
-            logging.info("No contacts found in the database.")
-        return jsonify([contact.to_dict() for contact in contacts])
+        return list_collection(serialize.CONTACT)
 
     if request.method == 'POST':
         data = request.get_json()
@@ -283,55 +202,115 @@ def manage_contacts():
 
 @app.route("/licenses", methods=['GET'])
 def manage_licenses():
-    licenses = License.query.all()
-    if not licenses:
-        logging.info("No license found in the database.")
-    return jsonify([license.to_json() for license in licenses])
+    return list_collection(serialize.LICENSE)
 
 
 @app.route("/license-search", methods=["POST"])
 def search_licenses():
-    business_name = request.get_json().get('businessName')
-    license_code_description = request.get_json().get('licenseCodeDescription')
-    license_status_code = request.get_json().get('licenseStatusCode')
-    license_address_type_description = request.get_json().get('licenseAddressTypeDescription')
-    address_line1 = request.get_json().get('addressLine1')
-    city = request.get_json().get('city')
-    state = request.get_json().get('state')
-    zip_code = request.get_json().get('zip')
-    county_code = request.get_json().get('countyCode')
-    expiration_date = request.get_json().get('expirationDate')
-
-    # Query the database and apply filtering dynamically using SQLAlchemy
-    query = License.query
-    
-    # Apply filters dynamically only if the parameter exists
-    if business_name:
-        query = query.filter(License.businessName == business_name)
-    if license_code_description:
-        query = query.filter(License.licenseCodeDescription == license_code_description)
-    if license_status_code:
-        query = query.filter(License.licenseStatusCode == license_status_code)
-    if license_address_type_description:
-        query = query.filter(License.licenseAddressTypeDescription == license_address_type_description)
-    if address_line1:
-        query = query.filter(License.addressLine1 == address_line1)
-    if city:
-        query = query.filter(License.city == city)
-    if state:
-        query = query.filter(License.state == state)
-    if zip_code:
-        query = query.filter(License.zip == zip_code)
-    if county_code:
-        query = query.filter(License.countyCode == county_code)
-    if expiration_date:
-        query = query.filter(License.expirationDate == expiration_date)
-
-    # Execute the query and get all matching contacts
-    licenses = query.all()
-    if not licenses:
+    filters = request.get_json() or {}
+    if not isinstance(filters, dict):
+        return jsonify({"error": "The request body must be a JSON object"}), 400
+
+    # Filters are pushed into indexed, case-insensitive SQL conditions; results come back
+    # a page at a time and X-Next-Cursor is the `cursor` to send for the following page
+    try:
+        query, limit = licenses.build_search(filters, cursor=filters.get('cursor'), limit=filters.get('limit'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Plain column tuples instead of License objects, encoded in one go
+    results = serialize.LICENSE.to_dicts(db.session.execute(query.with_only_columns(*serialize.LICENSE.columns)))
+    if not results:
         logging.info("No license found in the database.")
-    return jsonify([license.to_json() for license in licenses])
+
+    response = Response(serialize.dumps(results), mimetype='application/json')
+    if len(results) == limit:
+        response.headers['X-Next-Cursor'] = str(results[-1]['licenseAddressId'])
+    return response
+
+
+@app.route("/firm-search", methods=["GET", "POST"])
+def search_firms():
+    # Ranked, typo-tolerant search over license and DA contact names and addresses
+    data = request.get_json(silent=True) or request.args
+    query = data.get('query')
+    if not isinstance(query, str) or not query.strip():
+        return jsonify({"error": "query is required"}), 400
+    try:
+        return jsonify(firm_search.search(db.engine, query.strip(), limit=data.get('limit')))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route("/firm-search/suggest", methods=["GET"])
+def suggest_firms():
+    # Autocomplete for the firm name box: every word is matched as a prefix
+    prefix = (request.args.get('q') or '').strip()
+    if not prefix:
+        return jsonify([])
+    return jsonify(firm_search.suggest(db.engine, prefix))
+
+
+def wants_all_results(data):
+    """True when the client opted into the paginated `all=true` / `maxResults` mode."""
+    return str(data.get('all', '')).lower() == 'true' or bool(data.get('maxResults'))
+
+def max_results_param(data):
+    """`maxResults` as a positive int, or None when not given; raises ValueError otherwise."""
+    value = data.get('maxResults')
+    if value in (None, ''):
+        return None
+    try:
+        max_results = int(value)
+    except (TypeError, ValueError):
+        max_results = 0
+    if isinstance(value, bool) or max_results <= 0:
+        raise ValueError("maxResults must be a positive integer")
+    return max_results
+
+def wants_async():
+    """True when the client asked for a job id rather than waiting for the result."""
+    return request.args.get('async', '').lower() == 'true' or 'respond-async' in request.headers.get('Prefer', '')
+
+def start_job(kind, func, *args):
+    """Queue func(*args) as a background job and answer 202 with the job's id."""
+    callback = request.args.get('callback')
+    if callback and not jobs.callback_allowed(callback):
+        return jsonify({"error": "callback URL is not allowed"}), 400
+    job_id = job_queue.submit(kind, func, *args, callback=callback)
+    response = jsonify({"jobId": job_id, "status": jobs.QUEUED})
+    response.status_code = 202
+    response.headers['Location'] = url_for('job_status', job_id=job_id)
+    return response
+
+def project_response(response_data, fields):
+    """Trim an openFDA response down to the requested `fields` of each result."""
+    if not fields:
+        return response_data
+    return dict(response_data, results=list(openfda.project(response_data.get('results', []), fields)))
+
+def stream_openfda(endpoint, query_params, apikey, data):
+    """Stream every matching openFDA record back as NDJSON, one record per line."""
+    try:
+        max_results = max_results_param(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    total, records = openfda.search_all(endpoint, query_params, apikey, max_results=max_results)
+    fields = openfda.requested_fields(endpoint, data)
+    if fields:
+        records = openfda.project(records, fields)
+
+    def generate():
+        try:
+            for record in records:
+                yield json.dumps(record) + "\n"
+        except requests.RequestException as e:
+            logging.error(f"Error streaming data from FDA API: {e}")
+            yield json.dumps({"error": "Failed to fetch data from the API", "details": openfda.hide_apikey(str(e), apikey)}) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['X-Total-Count'] = str(total)
+    return response
 
 
 # Define a route for the root URL that accepts POST requests
@@ -354,8 +333,9 @@ def search_fda():
         return jsonify({"error": "Product description is required"}), 400
 
     # Get the FDA API key from the environment variables
+    # (not needed when the search can be answered from the local openFDA store)
     apikey = os.getenv('FDA_API_KEY')
-    if not apikey:
+    if not apikey and not fda_store.available('enforcement'):
         return jsonify({"error": "API key is missing"}), 500
 
     # Build query parameters based on the request data
@@ -368,20 +348,24 @@ def search_fda():
         query_params.append(f'recall_number:"{recall_number}"')
     if recall_class:
         query_params.append(f'classification:"{recall_class}"')
-    # Temporarily remove the date filter to test the basic query
 
-    # Construct the final query string
-    query = ' AND '.join(query_params)
-    url = f'https://api.fda.gov/device/enforcement.json?api_key={apikey}&search={query}&limit=100'
+    # Push the date range down into the openFDA query (or the local store)
+    try:
+        date_clause = openfda.date_range_clause('report_date', from_date, to_date)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if date_clause:
+        query_params.append(date_clause)
 
+    # Query openFDA, answering repeat searches from the response cache
     try:
-        logging.info(f"Sending request to FDA API: {url}")  # Log the API request URL
-        response = requests.get(url)  # Send the request to the FDA API
-        response.raise_for_status()  # Raise an error for bad responses
-        return jsonify(response.json())  # Return the JSON response from the API
+        if wants_all_results(data):
+            return stream_openfda('enforcement', query_params, apikey, data)
+        response_data = openfda.search('enforcement', query_params, apikey)
+        return jsonify(project_response(response_data, openfda.requested_fields('enforcement', data)))  # Return the JSON response from the API
     except requests.RequestException as e:
         logging.error(f"Error fetching data from FDA API: {e}")  # Log any errors
-        return jsonify({"error": "Failed to fetch data from the API", "details": str(e).replace(apikey, "<HIDDEN>")}), 500
+        return jsonify({"error": "Failed to fetch data from the API", "details": openfda.hide_apikey(str(e), apikey)}), 500
 
 # Define a new route for K510 database search
 @app.route("/k510", methods=['POST'])
@@ -402,8 +386,9 @@ def search_k510():
         return jsonify({"error": "At least one search parameter is required"}), 400
 
     # Get the FDA API key from the environment variables
+    # (not needed when the search can be answered from the local openFDA store)
     apikey = os.getenv('FDA_API_KEY')
-    if not apikey:
+    if not apikey and not fda_store.available('510k'):
         return jsonify({"error": "API key is missing"}), 500
 
     # Build query parameters based on the request data
@@ -415,18 +400,23 @@ def search_k510():
     if device_name:
         query_params.append(f'device_name:"{device_name}"')
 
-    # Construct the final query string
-    query = ' AND '.join(query_params)
-    url = f'https://api.fda.gov/device/510k.json?api_key={apikey}&search={query}&limit=100'
+    # Push the date range down into the openFDA query (or the local store)
+    try:
+        date_clause = openfda.date_range_clause('decision_date', from_date, to_date)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if date_clause:
+        query_params.append(date_clause)
 
+    # Query openFDA, answering repeat searches from the response cache
     try:
-        logging.info(f"Sending request to FDA K510 API: {url}")  # Log the API request URL
-        response = requests.get(url)  # Send the request to the FDA API
-        response.raise_for_status()  # Raise an error for bad responses
-        return jsonify(response.json())  # Return the JSON response from the API
+        if wants_all_results(data):
+            return stream_openfda('510k', query_params, apikey, data)
+        response_data = openfda.search('510k', query_params, apikey)
+        return jsonify(project_response(response_data, openfda.requested_fields('510k', data)))  # Return the JSON response from the API
     except requests.RequestException as e:
         logging.error(f"Error fetching data from FDA K510 API: {e}")  # Log any errors
-        return jsonify({"error": "Failed to fetch data from the API", "details": str(e).replace(apikey, "<HIDDEN>")}), 500
+        return jsonify({"error": "Failed to fetch data from the API", "details": openfda.hide_apikey(str(e), apikey)}), 500
 
 # Define a new route for CDPH device recall search
 @app.route("/cdph", methods=['POST'])
@@ -452,34 +442,10 @@ def search_cdph():
         return jsonify({"error": "Failed to fetch data from the CDPH website", "details": str(e)}), 500
 
 def perform_cdph_search(device_name, firm_name):
-    base_url = "https://www.cdph.ca.gov"
-    url = base_url + "/Programs/CEH/DFDCS/Pages/FDBPrograms/DeviceRecalls.aspx"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
-    }  # Some websites require a User-Agent header to mimic a web browser
-
-    response = requests.get(url, headers=headers)
-
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.content, "html.parser")
-        links = soup.find_all("a", href=True)
-
-        results = []
-        for link in links:
-            if ((device_name and re.search(r'\b{}\b'.format(re.escape(device_name)), link.text, re.IGNORECASE)) or
-                (firm_name and re.search(r'\b{}\b'.format(re.escape(firm_name)), link.text, re.IGNORECASE)) or
-                (device_name and re.search(r'\b{}\b'.format(re.escape(device_name)), link["href"], re.IGNORECASE)) or
-                (firm_name and re.search(r'\b{}\b'.format(re.escape(firm_name)), link["href"], re.IGNORECASE))):
-                result = {
-                    "text": link.text.strip(),
-                    "url": urljoin(base_url, link["href"])
-                }
-                results.append(result)
-
-        logging.info(f"CDPH search results: {results}")  # Log the search results
-        return results
-    else:
-        raise Exception("Failed to retrieve data from the website.")
+    # Answered from the locally indexed snapshot that cdph.py keeps fresh in the background
+    results = cdph.search(device_name, firm_name)
+    logging.info(f"CDPH search results: {results}")  # Log the search results
+    return results
 
 # Define a new route for Maude database search
 @app.route("/maude", methods=['POST'])
@@ -499,8 +465,9 @@ def search_maude():
         return jsonify({"error": "At least one search parameter is required"}), 400
 
     # Get the FDA API key from the environment variables
+    # (not needed when the search can be answered from the local openFDA store)
     apikey = os.getenv('FDA_API_KEY')
-    if not apikey:
+    if not apikey and not fda_store.available('event'):
         return jsonify({"error": "API key is missing"}), 500
 
     # Build query parameters based on the request data
@@ -508,18 +475,82 @@ def search_maude():
     if device_generic_name:
         query_params.append(f'device.generic_name:"{device_generic_name}"')
 
-    # Construct the final query string
-    query = ' AND '.join(query_params)
-    url = f'https://api.fda.gov/device/event.json?api_key={apikey}&search={query}&limit=100'
-
+    # Push the date range down into the openFDA query (or the local store)
+    try:
+        date_clause = openfda.date_range_clause('date_received', from_date, to_date)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if date_clause:
+        query_params.append(date_clause)
+
+    if wants_async():
+        try:
+            max_results = max_results_param(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        # A job's result is held in memory and stored whole; an unbounded pull has to stream
+        if wants_all_results(data) and (max_results is None or max_results > jobs.MAX_RECORDS):
+            return jsonify({"error": f"Async pulls need maxResults of at most {jobs.MAX_RECORDS}; "
+                                     "use the synchronous NDJSON stream for more"}), 400
+        return start_job("maude", pull_maude, query_params, apikey, data)
+
+    # Query openFDA, answering repeat searches from the response cache
     try:
-        logging.info(f"Sending request to FDA Maude API: {url}")  # Log the API request URL
-        response = requests.get(url)  # Send the request to the FDA API
-        response.raise_for_status()  # Raise an error for bad responses
-        return jsonify(response.json())  # Return the JSON response from the API
+        if wants_all_results(data):
+            return stream_openfda('event', query_params, apikey, data)
+        response_data = openfda.search('event', query_params, apikey)
+        return jsonify(project_response(response_data, openfda.requested_fields('event', data)))  # Return the JSON response from the API
     except requests.RequestException as e:
         logging.error(f"Error fetching data from FDA Maude API: {e}")  # Log any errors
-        return jsonify({"error": "Failed to fetch data from the API", "details": str(e).replace(apikey, "<HIDDEN>")}), 500
+        return jsonify({"error": "Failed to fetch data from the API", "details": openfda.hide_apikey(str(e), apikey)}), 500
+
+def pull_maude(query_params, apikey, data):
+    """Body of an async /maude job: up to maxResults records with all=true, else the first page."""
+    fields = openfda.requested_fields('event', data)
+    try:
+        if not wants_all_results(data):
+            return project_response(openfda.search('event', query_params, apikey), fields)
+        total, records = openfda.search_all('event', query_params, apikey, max_results=max_results_param(data))
+        if fields:
+            records = openfda.project(records, fields)
+        return {"total": total, "results": list(records)}
+    except requests.RequestException as e:
+        raise RuntimeError(f"Failed to fetch data from the API: {openfda.hide_apikey(str(e), apikey)}") from None
+
+# Full records behind the slim list views, looked up by their identifier
+@app.route("/recall/<recall_number>", methods=['GET'])
+def recall_detail(recall_number):
+    return openfda_detail('enforcement', recall_number)
+
+@app.route("/k510/<k_number>", methods=['GET'])
+def k510_detail(k_number):
+    return openfda_detail('510k', k_number)
+
+@app.route("/maude/<mdr_report_key>", methods=['GET'])
+def maude_detail(mdr_report_key):
+    return openfda_detail('event', mdr_report_key)
+
+def openfda_detail(endpoint, record_id):
+    apikey = os.getenv('FDA_API_KEY')
+    if not apikey and not fda_store.available(endpoint):
+        return jsonify({"error": "API key is missing"}), 500
+
+    try:
+        response_data = openfda.search(endpoint, [f'{openfda.ID_FIELDS[endpoint]}:"{record_id}"'], apikey, limit=1)
+    except requests.HTTPError as e:
+        # openFDA answers a search without matches with a 404
+        if e.response is not None and e.response.status_code == 404:
+            return jsonify({"error": "Record not found"}), 404
+        logging.error(f"Error fetching data from FDA API: {e}")
+        return jsonify({"error": "Failed to fetch data from the API", "details": openfda.hide_apikey(str(e), apikey)}), 500
+    except requests.RequestException as e:
+        logging.error(f"Error fetching data from FDA API: {e}")
+        return jsonify({"error": "Failed to fetch data from the API", "details": openfda.hide_apikey(str(e), apikey)}), 500
+
+    results = response_data.get('results', [])
+    if not results:
+        return jsonify({"error": "Record not found"}), 404
+    return jsonify(results[0])
 
 # Define a new route for OpenHistorical search
 @app.route("/openhistorical", methods=['POST'])
@@ -575,7 +606,7 @@ def search_openhistorical():
 
     try:
         logging.info(f"Sending request to FDA OpenHistorical API: {url}")
-        response = requests.get(
+        response = upstream.get(
             url, json=query_params, headers={"Content-Type": "application/json"}
         )
         response.raise_for_status()
@@ -615,7 +646,7 @@ def search_openhistorical():
 
     try:
         logging.info(f"Sending request to FDA OpenHistorical API: {url}")
-        response = requests.get(url)
+        response = upstream.get(url)
         response.raise_for_status()
 
         response_data = response.json()
@@ -651,61 +682,64 @@ def search_ca_business_entity():
     if not search_term:
         return jsonify({"error": "Search term is required"}), 400
 
+    try:
+        return jsonify(fetch_ca_business_entities(search_term))
+    except requests.RequestException as e:
+        logging.error(f"Error fetching data from CA Secretary of State business search: {e}")
+        return jsonify({"error": "Failed to fetch data from the website", "details": str(e)}), 500
+
+def fetch_ca_business_entities(search_term):
     # Build the search URL for the new data source
     search_url = "https://bizfileonline.sos.ca.gov/api/Records/businesssearch"
 
-    try:
-        # Perform the initial request to get the search page
-        logging.info(f"Sending initial request to CA Secretary of State business search: {search_url}")
+    # Perform the initial request to get the search page
+    logging.info(f"Sending initial request to CA Secretary of State business search: {search_url}")
 
-        # Parse the search page to get the necessary form data and cookies
-        json_data = {
-            'SEARCH_VALUE': search_term,
-            'SEARCH_TYPE_ID': '1',
-        }
-        headers = {
-            'User-Agent':
-            'Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/115.0',
-            'Accept': '*/*',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Referer': 'https://bizfileonline.sos.ca.gov/search/business',
-            'authorization': 'undefined',
-            'content-type': 'application/json',
-            'Origin': 'https://bizfileonline.sos.ca.gov',
-            'Sec-GPC': '1',
-            'Connection': 'keep-alive',
-            'Sec-Fetch-Dest': 'empty',
-            'Sec-Fetch-Mode': 'cors',
-            'Sec-Fetch-Site': 'same-origin',
-            'DNT': '1',
-            'Pragma': 'no-cache',
-            'Cache-Control': 'no-cache',
-        }
+    # Parse the search page to get the necessary form data and cookies
+    json_data = {
+        'SEARCH_VALUE': search_term,
+        'SEARCH_TYPE_ID': '1',
+    }
+    headers = {
+        'User-Agent':
+        'Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/115.0',
+        'Accept': '*/*',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Referer': 'https://bizfileonline.sos.ca.gov/search/business',
+        'authorization': 'undefined',
+        'content-type': 'application/json',
+        'Origin': 'https://bizfileonline.sos.ca.gov',
+        'Sec-GPC': '1',
+        'Connection': 'keep-alive',
+        'Sec-Fetch-Dest': 'empty',
+        'Sec-Fetch-Mode': 'cors',
+        'Sec-Fetch-Site': 'same-origin',
+        'DNT': '1',
+        'Pragma': 'no-cache',
+        'Cache-Control': 'no-cache',
+    }
 
-        # Use the form data to perform the search
-        logging.info(f"Performing search with criteria: {json_data}")
-        response = requests.post(search_url, json=json_data, headers=headers)
-        response.raise_for_status()
+    # Use the form data to perform the search
+    logging.info(f"Performing search with criteria: {json_data}")
+    response = upstream.post(search_url, json=json_data, headers=headers)
+    response.raise_for_status()
+
+    # Parse the search results
+    table_rows = response.json()["rows"]
+    results = []
+    for k, v in table_rows.items():
+        result = {
+            "entityInformation": v["TITLE"][0],
+            "initialFilingDate": v["FILING_DATE"],
+            "status": v["STATUS"],
+            "entityType": v["ENTITY_TYPE"],
+            "formedIn": v["FORMED_IN"],
+            "agent": v["AGENT"]
+        }
+        results.append(result)
 
-        # Parse the search results
-        table_rows = response.json()["rows"]
-        results = []
-        for k, v in table_rows.items():
-            result = {
-                "entityInformation": v["TITLE"][0],
-                "initialFilingDate": v["FILING_DATE"],
-                "status": v["STATUS"],
-                "entityType": v["ENTITY_TYPE"],
-                "formedIn": v["FORMED_IN"],
-                "agent": v["AGENT"]
-            }
-            results.append(result)
+    return results
 
-        return jsonify(results)
-    except requests.RequestException as e:
-        logging.error(f"Error fetching data from CA Secretary of State business search: {e}")
-        return jsonify({"error": "Failed to fetch data from the website", "details": str(e)}), 500
-    
 @app.route('/chat', methods=['POST'])
 def chat_with_rasa_and_confluence():
     """
@@ -757,7 +791,7 @@ def chat_with_rasa_and_confluence():
             url = f"{confluence_base_url}/wiki/rest/api/content/{page_id}?expand=body.storage"
 
             try:
-                response = requests.get(url, headers=headers)
+                response = upstream.get(url, headers=headers)
                 response.raise_for_status()
                 data = response.json()
 
@@ -774,7 +808,7 @@ def chat_with_rasa_and_confluence():
 
     try:
         # Send the user message to RASA
-        response = requests.post(rasa_url, json={"sender": "user", "message": message})
+        response = upstream.post(rasa_url, json={"sender": "user", "message": message})
         response.raise_for_status()
 
         # Parse the response from RASA
@@ -793,7 +827,19 @@ def chat_with_rasa_and_confluence():
 
 
 
-serp_client = serpapi.Client(api_key=os.getenv('SERP_API_KEY'))
+_serp_client = None
+# Results of /predict and /serpapi-upload by perceptual hash of the uploaded photo
+image_results = image_cache.create_cache()
+# Expires the photos uploaded for Google to fetch, in the background
+upload_janitor = uploads.Janitor(UPLOAD_FOLDER, MAX_FILE_TIME)
+
+def get_serp_client():
+    # serpapi is only imported once the first reverse image search comes in
+    global _serp_client
+    if _serp_client is None:
+        import serpapi
+        _serp_client = serpapi.Client(api_key=os.getenv('SERP_API_KEY'))
+    return _serp_client
 
 
 
@@ -801,6 +847,44 @@ def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def reverse_image_search(photo):
+    """Google reverse image search results for an uploaded photo."""
+    # Near-duplicates of an earlier upload reuse its results instead of paying for another search
+    image_hash = image_cache.hash_image(photo.image) if image_results else None
+    if image_hash is not None:
+        cached = image_results.get("serpapi", image_hash)
+        if cached is not None:
+            return cached
+
+    # Google fetches the image from us: serve an oriented JPEG of bounded size, not the 12 MP original
+    data = photo.to_jpeg()
+    # Named after its content, so the same photo is stored and fetched once; deleted
+    # MAX_FILE_TIME from now by the janitor (pushed back if uploaded again)
+    filename = upload_janitor.store(data)
+
+    # setup google reverse image search
+    params = {
+        "engine": "google_reverse_image",
+        "image_url": "https://"
+        + PUBLIC_IP
+        + "/serpapi-uploads/"
+        + filename,
+    }
+    search = get_serp_client().search(params)
+
+    # parsing results, looking for object name
+    results = search.as_dict()
+
+    # if "search_information" in results:
+    #     results = results["search_information"]["query_displayed"]
+    # else:
+    #     results = "object not recognized"
+
+    if image_hash is not None and "error" not in results:
+        image_results.set("serpapi", image_hash, results)
+    return results
+
+
 @app.route("/serpapi-upload", methods=["GET", "POST"])
 def upload_file():
     if request.method == "POST":
@@ -816,40 +900,14 @@ def upload_file():
             return redirect(request.url)
         # if file is allowed upload to /uploads
         if file and allowed_file(file.filename):
-            # filename = secure_filename(file.filename)
-            filename = str(uuid.uuid4()) + ".png"
-            file.save(os.path.join(app.config["UPLOAD_FOLDER"], filename))
-
-            # setup google reverse image search
-            params = {
-                "engine": "google_reverse_image",
-                "image_url": "https://"
-                + PUBLIC_IP
-                + "/serpapi-uploads/"
-                + filename,
-            }
-            search = serp_client.search(params)
-
-            # parsing results, looking for object name
-            results = search.as_dict()
-
-            # if "search_information" in results:
-            #     results = results["search_information"]["query_displayed"]
-            # else:
-            #     results = "object not recognized"
-
-            # automatically remove files 3 days old
-            for f in os.listdir(UPLOAD_FOLDER):
-                path = os.path.join(UPLOAD_FOLDER, f)
-
-                if os.stat(path).st_mtime <= (time.time() - MAX_FILE_TIME):
-                    if os.path.isfile(path):
-                        try:
-                            os.remove(path)
-                        except:
-                            print("Cannot remove file", path)
+            try:
+                photo = intake.load(file.read(), intake.SEARCH_MAX_SIDE)
+            except Exception as e:
+                return jsonify({"error": f"Unreadable image: {e}"}), 400
 
-            return results
+            if wants_async():
+                return start_job("serpapi", reverse_image_search, photo)
+            return reverse_image_search(photo)
     return """
     <!doctype html>
     <title>Upload new File</title>
@@ -863,28 +921,65 @@ def upload_file():
 
 @app.route("/serpapi-uploads/<filename>")
 def uploaded_file(filename):
-    return send_from_directory(app.config["UPLOAD_FOLDER"], filename)
-
+    # The name is the hash of the content, which therefore never changes: cache it for good.
+    # send_file answers If-None-Match / If-Modified-Since with 304 and Range with 206.
+    response = send_from_directory(app.config["UPLOAD_FOLDER"], filename, max_age=IMMUTABLE_MAX_AGE,
+                                   etag=os.path.splitext(filename)[0])
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_worker():
+    """Per-worker setup, called from gunicorn's post_fork hook."""
+    with app.app_context():
+        # Drop any pooled connections inherited from the master; each worker opens its own
+        db.engine.dispose(close=False)
+    inference.start_warm_up()
+    upload_janitor.start()
+
+def run_prediction(photo, output):
+    """/predict response for a decoded photo: detections (output=json) or the annotated image."""
+    # A near-duplicate of an earlier photo gets that photo's result without running YOLO.
+    # Detections are cached in model-input pixels with the input's size, since the
+    # near-duplicate may have been shot at another resolution.
+    namespace = 'predict-boxes' if output == 'json' else 'predict-image'
+    image_hash = image_cache.hash_image(photo.image) if image_results else None
+    cached = image_results.get(namespace, image_hash) if image_hash is not None else None
+
+    if cached is None:
+        result = inference.predict(photo.to_model_array())
+        if output == 'json':
+            cached = {'detections': inference.detections(result), 'size': list(photo.image.size)}
+        else:
+            # Annotated image encoded in memory, nothing written under /app/runs
+            cached = {'result': inference.encode_jpeg(result.plot())}
+        if image_hash is not None:
+            image_results.set(namespace, image_hash, cached)
 
-# Initialize the YOLO model
-model = YOLO("last.pt")
+    if output == 'json':
+        # Boxes in the pixels of the uploaded photo
+        return {
+            'detections': inference.rescale(cached['detections'], cached['size'], photo.original_size),
+            'width': photo.original_size[0],
+            'height': photo.original_size[1],
+        }
+    return cached
 
 @app.route('/predict', methods=['POST'])
 def predict():
+    # format=json returns the detections instead of the annotated image
+    output = request.values.get('format', 'image')
+    if output not in ('image', 'json'):
+        return jsonify({"error": "format must be image or json"}), 400
+
     try:
         file = request.files['file'].read()
-        image = Image.open(io.BytesIO(file)).convert("RGB")
-        image_np = np.array(image)
-
-        results = model.predict(source=image_np, save=True)
-
-        result_image_path = "/app/runs/detect/predict/image0.jpg"
-        cv2.imwrite(result_image_path, results[0].plot())
-
-        with open(result_image_path, "rb") as image_file:
-            img_str = base64.b64encode(image_file.read()).decode("utf-8")
-
-        return jsonify({'result': img_str})
+        # Decoded once, oriented and scaled to the model input size; YOLO then only pads it
+        photo = intake.load(file, intake.MODEL_INPUT_SIZE)
+        if wants_async():
+            return start_job("predict", run_prediction, photo, output)
+        return jsonify(run_prediction(photo, output))
     except Exception as e:
         logging.error(f"Error in prediction: {e}")
         return jsonify({"error": str(e)}), 500
@@ -896,6 +991,13 @@ def search_warning_letters():
 
     logging.info(f"Received keyword: {keyword}")  # Log the received keyword
 
+    try:
+        return jsonify(fetch_warning_letters(keyword))
+    except requests.RequestException as e:
+        logging.error(f"Error fetching data from FDA API: {e}")  # Log any errors
+        return jsonify({"error": "Failed to fetch data from FDA API", "details": str(e)}), 500
+
+def fetch_warning_letters(keyword):
     api_url = 'https://api-datadashboard.fda.gov/v1/compliance_actions'
     request_body = {
         "start": 1,
@@ -925,31 +1027,140 @@ def search_warning_letters():
         'Authorization-Key': os.getenv('AUTHORIZATION_KEY')  # Should ideally be secured
     }
 
+    response = upstream.post(api_url, json=request_body, headers=headers)
+    response.raise_for_status()  # Will raise an HTTPError if the HTTP request returned an unsuccessful status code
+    out = response.json()
+
+    logging.info(f"API response: {out}")  # Log the API response
+
+    # Construct URLs to warning letters and add to response data
+    results = []
+    for result in out.get('result', []):  # Corrected to 'result'
+        logging.info(f"Processing result: {result}")  # Log each result being processed
+        if all(key in result for key in ['CaseInjunctionID', 'ActionTakenDate', 'LegalName']):
+            warning_letter_url = construct_warning_letter_url(
+                result['CaseInjunctionID'], result['ActionTakenDate'], result['LegalName'])
+            result['warning_letter_url'] = warning_letter_url
+            results.append(result)
+
+    logging.info(f"Processed results: {results}")  # Log the processed results
+    return results
+
+
+# Per-source deadlines (seconds) for the federated firm search
+FDA_SEARCH_DEADLINE = float(os.getenv('FIRM_SEARCH_DEADLINE_FDA', 8))
+FIRM_SEARCH_DEADLINES = {
+    "recalls": FDA_SEARCH_DEADLINE,
+    "k510": FDA_SEARCH_DEADLINE,
+    "maude": FDA_SEARCH_DEADLINE,
+    "cdph": float(os.getenv('FIRM_SEARCH_DEADLINE_CDPH', 8)),
+    "warning_letters": float(os.getenv('FIRM_SEARCH_DEADLINE_WARNING_LETTERS', 10)),
+    "ca_business_entity": float(os.getenv('FIRM_SEARCH_DEADLINE_CA_BUSINESS', 10)),
+}
+
+# Search every backend for one firm at once
+@app.route("/search/firm", methods=['POST'])
+def search_firm():
+    data = request.get_json()
+    logging.info(f"Firm search request data: {data}")
+
+    firm_name = data.get('firmName', '')
+    if not firm_name:
+        return jsonify({"error": "Firm name is required"}), 400
+
+    apikey = os.getenv('FDA_API_KEY')
+    tasks = {
+        "cdph": lambda: perform_cdph_search('', firm_name),
+        "warning_letters": lambda: fetch_warning_letters(firm_name),
+        "ca_business_entity": lambda: fetch_ca_business_entities(firm_name),
+    }
+    fda_tasks = {
+        "recalls": ('enforcement', f'recalling_firm:"{firm_name}"'),
+        "k510": ('510k', f'applicant:"{firm_name}"'),
+        "maude": ('event', f'device.manufacturer_d_name:"{firm_name}"'),
+    }
+    for source, (endpoint, clause) in fda_tasks.items():
+        if apikey or fda_store.available(endpoint):
+            tasks[source] = lambda endpoint=endpoint, clause=clause: openfda.search(endpoint, [clause], apikey)
+
+    def redact(outcome):
+        if "error" in outcome:
+            outcome["error"] = openfda.hide_apikey(outcome["error"], apikey)
+        return outcome
+
+    outcomes = fanout.run(tasks, FIRM_SEARCH_DEADLINES)
+
+    # stream=true sends each source as its own NDJSON line the moment it finishes
+    if str(data.get('stream', '')).lower() == 'true':
+        def generate():
+            for outcome in outcomes:
+                yield json.dumps(redact(outcome)) + "\n"
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    merged = {"firmName": firm_name, "results": {}, "status": {}}
+    for outcome in outcomes:
+        outcome = redact(outcome)
+        merged["status"][outcome["source"]] = {key: outcome[key] for key in ("status", "elapsed", "error") if key in outcome}
+        if outcome["status"] == "ok":
+            merged["results"][outcome["source"]] = outcome["results"]
+    return jsonify(merged)
+
+
+# Status and result of a background job; ?wait=<seconds> long-polls until it finishes
+@app.route("/jobs/<job_id>", methods=['GET'])
+def job_status(job_id):
     try:
-        response = rq.post(api_url, json=request_body, headers=headers)
-        response.raise_for_status()  # Will raise an HTTPError if the HTTP request returned an unsuccessful status code
-        out = response.json()
-        
-        logging.info(f"API response: {out}")  # Log the API response
-
-        # Construct URLs to warning letters and add to response data
-        results = []
-        for result in out.get('result', []):  # Corrected to 'result'
-            logging.info(f"Processing result: {result}")  # Log each result being processed
-            if all(key in result for key in ['CaseInjunctionID', 'ActionTakenDate', 'LegalName']):
-                warning_letter_url = construct_warning_letter_url(
-                    result['CaseInjunctionID'], result['ActionTakenDate'], result['LegalName'])
-                result['warning_letter_url'] = warning_letter_url
-                results.append(result)
-
-        logging.info(f"Processed results: {results}")  # Log the processed results
-        return jsonify(results)
-    except rq.RequestException as e:
-        logging.error(f"Error fetching data from FDA API: {e}")  # Log any errors
-        return jsonify({"error": "Failed to fetch data from FDA API", "details": str(e)}), 500
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        return jsonify({"error": "wait must be a number of seconds"}), 400
+    job = job_queue.get(job_id, wait=wait)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    response = jsonify(jobs.to_json(job))
+    if job["status"] not in jobs.FINISHED:
+        response.headers['Retry-After'] = '1'
+    return response
+
+
+# Jobs by status on the host, and this worker's job counters
+@app.route("/jobs/stats", methods=['GET'])
+def job_stats():
+    return jsonify(job_queue.stats())
+
+
+# Size of the upload folder against its quota and what the janitor reclaimed
+@app.route("/uploads/stats", methods=['GET'])
+def upload_stats():
+    return jsonify(upload_janitor.stats())
+
+
+# Connection pool hit/miss counters for every upstream host
+@app.route("/upstream/stats", methods=['GET'])
+def upstream_stats():
+    return jsonify(upstream.pool_stats())
+
+
+# Batching, throughput and queue depth of this worker's YOLO batcher
+@app.route("/inference/stats", methods=['GET'])
+def inference_stats():
+    return jsonify(inference.stats())
+
+
+# Exact and near-duplicate hits of the /predict and /serpapi-upload photo cache
+@app.route("/image-cache/stats", methods=['GET'])
+def image_cache_stats():
+    return jsonify(image_results.stats() if image_results else {})
+
 
+# Hit/miss counters for the openFDA response cache
+@app.route("/cache/stats", methods=['GET'])
+def cache_stats():
+    return jsonify(openfda.response_cache.stats())
 
 
 # Run the Flask app on the specified host and port
 if __name__ == "__main__":
+    # Flask's development server; production runs gunicorn -c gunicorn.conf.py main:app
+    init_database()
+    upload_janitor.start()
     app.run(host='0.0.0.0', port=80)
@@ -0,0 +1,210 @@
+# Export the YOLO checkpoint for CPU runtimes, validate the exports and benchmark them.
+#
+#   python model_export.py export --onnx --openvino --int8
+#   python model_export.py benchmark --images test/ventilator.jpg /path/to/device/photos
+#
+# `export` writes last.onnx (dynamic batch, so the /predict batcher can use it),
+# last.int8.onnx (dynamic int8 quantization with ONNX Runtime) and the OpenVINO IR
+# directories next to last.pt. `benchmark` runs every available backend over the same
+# images, checks its detections against PyTorch's within a box IoU / confidence tolerance,
+# times it, and writes model_benchmark.json, from which inference.select_backend() picks
+# the fastest valid backend when the workers start. The file records the SHA-256 of
+# last.pt, so replacing the weights voids it until the exports are redone and benchmarked.
+
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+
+import inference
+import intake
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+IOU_TOLERANCE = 0.9
+CONFIDENCE_TOLERANCE = 0.05
+# ultralytics' default confidence threshold; detections this close to it may flip between backends
+CONFIDENCE_THRESHOLD = 0.25
+
+
+# --- Export ------------------------------------------------------------------------------
+
+def export_onnx(model_path, imgsz):
+    from ultralytics import YOLO
+    return YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+
+
+def quantize_onnx(onnx_path, output_path):
+    """int8 weights via ONNX Runtime dynamic quantization, keeping the class names metadata."""
+    import onnx
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(onnx_path, output_path, weight_type=QuantType.QUInt8)
+    # ultralytics reads the class names and image size from the model metadata
+    source, quantized = onnx.load(onnx_path), onnx.load(output_path)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(source.metadata_props)
+    onnx.save(quantized, output_path)
+    return output_path
+
+
+def export_openvino(model_path, imgsz, int8=False, data=None):
+    from ultralytics import YOLO
+    options = {"int8": True, "data": data} if int8 else {}
+    return YOLO(model_path).export(format="openvino", imgsz=imgsz, dynamic=True, **options)
+
+
+# --- Validation --------------------------------------------------------------------------
+
+def iou(a, b):
+    """Intersection over union of two x1, y1, x2, y2 boxes."""
+    width = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    height = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    intersection = width * height
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def compare(reference, candidate, iou_tolerance=IOU_TOLERANCE, confidence_tolerance=CONFIDENCE_TOLERANCE):
+    """Match `candidate` detections to `reference` ones (lists of inference.detections() dicts).
+
+    Detections are paired greedily by class and IoU. Borderline ones, within
+    `confidence_tolerance` of the confidence threshold, may exist on one side only.
+    Returns a dict with the unmatched detections on each side and the largest
+    confidence difference between pairs; "valid" is True when everything else matched.
+    """
+    def borderline(detection):
+        return detection["confidence"] < CONFIDENCE_THRESHOLD + confidence_tolerance
+
+    unmatched = list(candidate)
+    missing, max_delta = [], 0.0
+    for expected in sorted(reference, key=lambda detection: -detection["confidence"]):
+        best, best_iou = None, iou_tolerance
+        for detection in unmatched:
+            if detection["classId"] == expected["classId"]:
+                overlap = iou(expected["box"], detection["box"])
+                if overlap >= best_iou:
+                    best, best_iou = detection, overlap
+        if best is None:
+            if not borderline(expected):
+                missing.append(expected)
+            continue
+        unmatched.remove(best)
+        max_delta = max(max_delta, abs(best["confidence"] - expected["confidence"]))
+    extra = [detection for detection in unmatched if not borderline(detection)]
+    return {
+        "valid": not missing and not extra and max_delta <= confidence_tolerance,
+        "missing": missing,
+        "extra": extra,
+        "max_confidence_delta": round(max_delta, 4),
+    }
+
+
+# --- Benchmark ---------------------------------------------------------------------------
+
+def load_images(paths):
+    """Model inputs for the given image files and every image in the given directories.
+
+    Decoded by intake.load exactly as /predict does: oriented, scaled to the model input
+    size and in BGR order.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(f for f in glob.glob(os.path.join(path, "*")) if f.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            files.append(path)
+    images = []
+    for file in files:
+        with open(file, "rb") as image:
+            images.append(intake.load(image.read(), intake.MODEL_INPUT_SIZE).to_model_array())
+    return files, images
+
+
+def run_backend(backend, images, runs):
+    """Detections per image and timings for one backend."""
+    model = inference.load_model(backend)
+    # First call pays for graph compilation and allocation; keep it out of the timings
+    model.predict(source=images[0], save=False, verbose=False)
+
+    latencies = []
+    for _ in range(runs):
+        for image in images:
+            started = time.perf_counter()
+            model.predict(source=image, save=False, verbose=False)
+            latencies.append(time.perf_counter() - started)
+    detections = [inference.detections(model.predict(source=image, save=False, verbose=False)[0]) for image in images]
+
+    latencies.sort()
+    return detections, {
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+        "images_per_second": round(len(latencies) / sum(latencies), 2),
+    }
+
+
+def benchmark(image_paths, runs, output_path):
+    files, images = load_images(image_paths)
+    backends = inference.available_backends()
+    if "torch" not in backends:
+        raise SystemExit("PyTorch and last.pt are needed as the reference for validation")
+
+    reference, results = None, {}
+    for backend in ["torch"] + [backend for backend in backends if backend != "torch"]:
+        detections, timings = run_backend(backend, images, runs)
+        if reference is None:
+            reference = detections
+        comparisons = [compare(expected, actual) for expected, actual in zip(reference, detections)]
+        results[backend] = dict(timings, valid=all(comparison["valid"] for comparison in comparisons),
+                                max_confidence_delta=max(c["max_confidence_delta"] for c in comparisons))
+        for file, comparison in zip(files, comparisons):
+            if not comparison["valid"]:
+                logging.warning(f"{backend} differs from torch on {file}: {comparison}")
+
+    with open(output_path, "w") as file:
+        json.dump({"weights_sha256": inference.weights_digest(), "images": files, "runs": runs, "backends": results},
+                  file, indent=2)
+
+    print(f"{len(images)} images x {runs} runs, batch 1\n")
+    print(f"{'backend':14s} {'p50':>9s} {'p95':>9s} {'img/s':>8s} {'valid':>6s} {'max dconf':>10s}")
+    for backend, result in results.items():
+        print(f"{backend:14s} {result['p50_ms']:7.1f}ms {result['p95_ms']:7.1f}ms {result['images_per_second']:8.2f} "
+              f"{'yes' if result['valid'] else 'NO':>6s} {result['max_confidence_delta']:10.4f}")
+    print(f"\nSelected at startup: {inference.select_backend('auto', benchmark_path=output_path)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export, validate and benchmark the YOLO model for CPU")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export")
+    export_parser.add_argument("--onnx", action="store_true")
+    export_parser.add_argument("--openvino", action="store_true")
+    export_parser.add_argument("--int8", action="store_true", help="also write int8 variants")
+    export_parser.add_argument("--data", help="dataset YAML to calibrate OpenVINO int8 on")
+    export_parser.add_argument("--imgsz", type=int, default=640)
+    benchmark_parser = subparsers.add_parser("benchmark")
+    benchmark_parser.add_argument("--images", nargs="+", default=["test/ventilator.jpg"])
+    benchmark_parser.add_argument("--runs", type=int, default=10)
+    benchmark_parser.add_argument("--output", default=inference.BENCHMARK_PATH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "export":
+        model_path = inference.MODEL_PATH
+        if args.onnx:
+            onnx_path = export_onnx(model_path, args.imgsz)
+            if args.int8:
+                quantize_onnx(onnx_path, inference.backend_path("onnx-int8"))
+        if args.openvino:
+            export_openvino(model_path, args.imgsz)
+            if args.int8:
+                # ultralytics names the int8 IR directory last_int8_openvino_model
+                export_openvino(model_path, args.imgsz, int8=True, data=args.data)
+    else:
+        benchmark(args.images, args.runs, args.output)
+
+
+if __name__ == "__main__":
+    main()
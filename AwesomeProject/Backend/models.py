@@ -0,0 +1,117 @@
+# Database models shared by the API routes, the CSV seeder and the benchmarks
+
+from datetime import datetime
+
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func
+
+
+db = SQLAlchemy()
+
+# User model
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(150), unique=True, nullable=False)
+    password = db.Column(db.String(150), nullable=False)
+
+# Contact model
+class Contact(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    county = db.Column(db.String(100))
+    name = db.Column(db.String(100))
+    address = db.Column(db.String(200))
+    phone = db.Column(db.String(20))
+    fax = db.Column(db.String(20))
+    link_to_website = db.Column(db.String(100))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'county': self.county,
+            'name': self.name,
+            'address': self.address,
+            'phone': self.phone,
+            'fax': self.fax,
+            'link_to_website': self.link_to_website
+        }
+
+# licenses
+class License(db.Model):
+    # Indexes behind /license-search. Name, address and city are matched case-insensitively,
+    # so they are indexed on lower(); the primary key is the tie-breaker for keyset paging.
+    __table_args__ = (
+        db.Index('ix_license_business_name_lower', func.lower(db.text('business_name')), 'license_address_id'),
+        db.Index('ix_license_address_line_1_lower', func.lower(db.text('address_line_1')), 'license_address_id'),
+        db.Index('ix_license_city_lower_zip', func.lower(db.text('city')), 'zip', 'license_address_id'),
+        db.Index('ix_license_zip', 'zip', 'license_address_id'),
+        db.Index('ix_license_county_code_expiration_date', 'county_code', 'expiration_date', 'license_address_id'),
+        db.Index('ix_license_expiration_date', 'expiration_date', 'license_address_id'),
+        db.Index('ix_license_status_code', 'license_status_code', 'license_address_id'),
+    )
+
+    license_address_id = db.Column(db.Integer, primary_key=True) # specify type of field
+    license_id = db.Column(db.Integer) # unique
+    license_number = db.Column(db.Integer) # unique
+    license_code_description = db.Column(db.String(10), unique=False, nullable=True)
+    application_form_type_id = db.Column(db.Integer)
+    license_type_id = db.Column(db.Integer)
+    license_type_code = db.Column(db.String(2), unique=False, nullable=True)
+    license_status_id = db.Column(db.Integer)
+    license_status_code = db.Column(db.String(2), unique=False, nullable=True) # String
+    license_classification_id = db.Column(db.Integer) # edited (db.Datetime, nullable=True, default=datetime.now)
+    license_classification_code = db.Column(db.String(80), unique=False, nullable=True) 
+    license_classification_description = db.Column(db.String(80), unique=False, nullable=True) 
+    expiration_date = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)
+    firm_id = db.Column(db.Integer) # unique
+    corporate_name = db.Column(db.String(80), unique=False, nullable=True)
+    business_name = db.Column(db.String(80), unique=False, nullable=True)
+    doing_business_as = db.Column(db.String(80), unique=False, nullable=True)
+    state_incorporation = db.Column(db.String(80), unique=False, nullable=True)
+    address_line_1 = db.Column(db.String(80), unique=False, nullable=True)
+    address_line_2 = db.Column(db.String(80), unique=False, nullable=True) 
+    city = db.Column(db.String(80), unique=False, nullable=True) 
+    state = db.Column(db.String(80), unique=False, nullable=True) 
+    zip = db.Column(db.String(80), unique=False, nullable=True) 
+    county_id = db.Column(db.Integer)
+    county_code = db.Column(db.String(80), unique=False, nullable=True) 
+    license_address_type_id = db.Column(db.Integer)
+    license_address_type_code = db.Column(db.String(80), unique=False, nullable=True) 
+    license_address_type_description = db.Column(db.String(80), unique=False, nullable=True) 
+    exemptee_last_name = db.Column(db.String(80), unique=False, nullable=True) 
+    exemptee_first_name = db.Column(db.String(80), unique=False, nullable=True)
+ 
+
+
+    def to_json(self):
+        return {
+            "licenseAddressId": self.license_address_id,
+            "licenseId": self.license_id,
+            "licenseNumber": self.license_number,
+            "licenseCodeDescription": self.license_code_description,
+            "applicationFormTypeId": self.application_form_type_id,
+            "licenseTypeId": self.license_type_id,
+            "licenseTypeCode": self.license_type_code,
+            "licenseStatusId": self.license_status_id,
+            "licenseStatusCode": self.license_status_code,
+            "licenseClassificationId": self.license_classification_id,
+            "licenseClassificationCode": self.license_classification_code,
+            "licenseClassificationDescription": self.license_classification_description,
+            "expirationDate": self.expiration_date,
+            "firmId": self.firm_id,
+            "corporateName": self.corporate_name,
+            "businessName": self.business_name,
+            "doingBusinessAs": self.doing_business_as,
+            "stateIncorporation": self.state_incorporation,
+            "addressLine1": self.address_line_1,
+            "addressLine2": self.address_line_2,
+            "city": self.city,
+            "state": self.state,
+            "zip": self.zip,
+            "countyId": self.county_id,
+            "countyCode": self.county_code,
+            "licenseAddressTypeId": self.license_address_type_id,
+            "licenseAddressTypeCode": self.license_address_type_code,
+            "licenseAddressTypeDescription": self.license_address_type_description,
+            "exempteeLastName": self.exemptee_last_name,
+            "exempteeFirstName": self.exemptee_first_name
+        }
@@ -0,0 +1,222 @@
+# Helpers shared by the openFDA proxy routes (/, /k510 and /maude)
+
+import logging
+import os
+from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import cache
+import fda_store
+import upstream
+
+
+FDA_BASE_URL = "https://api.fda.gov"
+ENDPOINTS = {
+    "enforcement": "/device/enforcement.json",
+    "510k": "/device/510k.json",
+    "event": "/device/event.json",
+}
+
+# openFDA caps a page at 1000 rows and `skip` at 25000; deeper pages need search_after
+PAGE_SIZE = int(os.getenv('FDA_PAGE_SIZE', 1000))
+MAX_SKIP = 25000
+PAGE_WORKERS = int(os.getenv('FDA_PAGE_WORKERS', 4))
+
+# search_after needs a stable sort; page through each endpoint by its date field
+SORT_FIELDS = {
+    "enforcement": "report_date:asc",
+    "510k": "decision_date:asc",
+    "event": "date_received:asc",
+}
+
+# Columns the app's result screens render, returned by view=list
+LIST_FIELDS = {
+    "enforcement": ["recall_number", "product_description", "recalling_firm", "status", "reason_for_recall",
+                    "distribution_pattern", "classification", "recall_initiation_date", "report_date"],
+    "510k": ["k_number", "device_name", "applicant", "decision_date", "review_panel", "product_code"],
+    "event": ["mdr_report_key", "report_number", "date_received", "event_type", "manufacturer_name",
+              "device.generic_name", "device.brand_name", "device.manufacturer_d_name"],
+}
+
+# Field that identifies one record, used by the detail routes
+ID_FIELDS = {
+    "enforcement": "recall_number",
+    "510k": "k_number",
+    "event": "mdr_report_key",
+}
+
+# Recalls and 510(k) clearances are republished at most daily, MAUDE weekly
+response_cache = cache.create_cache(ttls={
+    "enforcement": int(os.getenv('FDA_CACHE_TTL_ENFORCEMENT', 12 * 3600)),
+    "510k": int(os.getenv('FDA_CACHE_TTL_510K', 24 * 3600)),
+    "event": int(os.getenv('FDA_CACHE_TTL_EVENT', 24 * 3600)),
+})
+
+
+def parse_date(value):
+    """Accept the app's YYYY-MM-DD dates as well as openFDA's YYYYMMDD."""
+    for fmt in ("%Y-%m-%d", "%Y%m%d"):
+        try:
+            return datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+
+def date_range_clause(field, from_date, to_date):
+    """Build a `field:[YYYYMMDD TO YYYYMMDD]` clause, or None when no range was asked for.
+
+    Raises ValueError for unparseable or reversed dates.
+    """
+    if not from_date and not to_date:
+        return None
+    start = parse_date(from_date) if from_date else date(1900, 1, 1)
+    end = parse_date(to_date) if to_date else date.today()
+    if start > end:
+        raise ValueError("fromDate must not be after toDate")
+    return f'{field}:[{start:%Y%m%d} TO {end:%Y%m%d}]'
+
+
+def requested_fields(endpoint, data):
+    """Fields asked for with `fields` (list or comma separated) or `view=list`, else None."""
+    fields = data.get('fields')
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+    if fields:
+        return fields
+    if data.get('view') == 'list':
+        return LIST_FIELDS[endpoint]
+    return None
+
+
+def _field_tree(fields):
+    # ["a", "device.generic_name", "device.brand_name"] -> {"a": {}, "device": {"generic_name": {}, "brand_name": {}}}
+    tree = {}
+    for field in fields:
+        node = tree
+        for part in field.split('.'):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def _project(value, tree):
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {key: _project(value[key], subtree) for key, subtree in tree.items() if key in value}
+
+
+def project(records, fields):
+    """Keep only `fields` (dotted paths reach into nested objects and lists) of each record."""
+    tree = _field_tree(fields)
+    return (_project(record, tree) for record in records)
+
+
+def hide_apikey(text, apikey):
+    return text.replace(apikey, "<HIDDEN>") if apikey else text
+
+
+def search(endpoint, query_params, apikey, limit=100):
+    """Run an openFDA search, answering repeat queries from the response cache."""
+    if fda_store.can_answer(endpoint, query_params):
+        return fda_store.search(endpoint, query_params, limit=limit)
+
+    key = cache.make_key(query_params, limit=limit)
+    cached = response_cache.get(endpoint, key)
+    if cached is not None:
+        logging.info(f"openFDA {endpoint} cache hit: {key}")
+        return cached
+
+    query = ' AND '.join(query_params)
+    url = f'{FDA_BASE_URL}{ENDPOINTS[endpoint]}?api_key={apikey or ""}&search={query}&limit={limit}'
+    logging.info(f"Sending request to FDA {endpoint} API: {hide_apikey(url, apikey)}")
+    response = upstream.get(url)
+    response.raise_for_status()  # Raise an error for bad responses
+    data = response.json()
+
+    response_cache.set(endpoint, key, data)
+    return data
+
+
+def _build_url(endpoint, query_params, apikey, limit, skip=0):
+    query = ' AND '.join(query_params)
+    url = f'{FDA_BASE_URL}{ENDPOINTS[endpoint]}?api_key={apikey or ""}&search={query}&limit={limit}'
+    if skip:
+        url += f'&skip={skip}'
+    return url
+
+
+def _fetch(url, apikey):
+    logging.info(f"Sending request to FDA API: {hide_apikey(url, apikey)}")
+    response = upstream.get(url)
+    response.raise_for_status()
+    return response
+
+
+def _skip_pages(endpoint, query_params, apikey, target):
+    """Fetch the pages after the first one in parallel, yielding them in order."""
+    skips = list(range(PAGE_SIZE, target, PAGE_SIZE))
+    with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as executor:
+        # Keep only a small window of pages in flight so memory stays bounded
+        pending = []
+        for skip in skips:
+            limit = min(PAGE_SIZE, target - skip)
+            pending.append(executor.submit(_fetch, _build_url(endpoint, query_params, apikey, limit, skip), apikey))
+            if len(pending) >= PAGE_WORKERS:
+                yield pending.pop(0).result().json().get('results', [])
+        for future in pending:
+            yield future.result().json().get('results', [])
+
+
+def _search_after_pages(endpoint, query_params, apikey, target):
+    """Walk a sorted search by following the Link: rel="next" headers openFDA returns."""
+    url = _build_url(endpoint, query_params, apikey, PAGE_SIZE) + f'&sort={SORT_FIELDS[endpoint]}'
+    response = _fetch(url, apikey)
+    results = response.json().get('results', [])
+    fetched = len(results)
+    yield results
+    while fetched < target and 'next' in response.links:
+        response = _fetch(response.links['next']['url'], apikey)
+        results = response.json().get('results', [])
+        if not results:
+            break
+        fetched += len(results)
+        yield results
+
+
+def search_all(endpoint, query_params, apikey, max_results=None):
+    """Walk every page of an openFDA search.
+
+    The first page is fetched eagerly so errors surface before streaming starts.
+    Returns the number of rows that will be produced and a generator over them.
+    """
+    if fda_store.can_answer(endpoint, query_params):
+        return fda_store.iter_search(endpoint, query_params, limit=max_results)
+
+    first_limit = min(PAGE_SIZE, max_results) if max_results else PAGE_SIZE
+    first_response = _fetch(_build_url(endpoint, query_params, apikey, first_limit), apikey)
+    first_page = first_response.json()
+    total = first_page.get('meta', {}).get('results', {}).get('total', 0)
+    target = min(total, max_results) if max_results else total
+
+    def generate():
+        yielded = 0
+        if target <= MAX_SKIP + PAGE_SIZE:
+            first_results = first_page.get('results', [])[:target]
+            yield from first_results
+            yielded += len(first_results)
+            pages = _skip_pages(endpoint, query_params, apikey, target)
+        else:
+            # Too deep for skip: restart as a sorted search_after walk so pages don't overlap
+            pages = _search_after_pages(endpoint, query_params, apikey, target)
+        for page in pages:
+            page = page[:target - yielded]
+            yield from page
+            yielded += len(page)
+            if yielded >= target:
+                break
+
+    return target, generate()
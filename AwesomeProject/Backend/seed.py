@@ -0,0 +1,164 @@
+# Bulk loader for the Contact (info.csv) and License (license.csv) tables.
+#
+# Rows are streamed from the CSV, converted column by column and inserted in chunks with
+# a single executemany per chunk, instead of building one ORM object per row.
+#
+#   python seed.py --db sqlite:///contact_info.db --contacts info.csv --licenses license.csv
+#
+# `flask --app main init-db` runs the same loader when the tables are empty.
+
+import argparse
+import csv
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import MetaData, create_engine, func, select
+
+
+CHUNK_SIZE = 10000
+
+
+def to_int(value):
+    return int(value) if value.strip() else None
+
+
+def to_datetime(value):
+    value = value.strip()
+    if not value:
+        return None
+    # fromisoformat is several times faster than strptime for the CSV's YYYY-MM-DD dates
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, '%m/%d/%Y')
+
+
+def to_str(value):
+    return value
+
+
+# CSV column order -> (table column, converter)
+CONTACT_COLUMNS = [
+    ("county", to_str),
+    ("name", to_str),
+    ("address", to_str),
+    ("phone", to_str),
+    ("fax", to_str),
+    ("link_to_website", to_str),
+]
+
+LICENSE_COLUMNS = [
+    ("license_address_id", to_int),
+    ("license_id", to_int),
+    ("license_number", to_int),
+    ("license_code_description", to_str),
+    ("application_form_type_id", to_int),
+    ("license_type_id", to_int),
+    ("license_type_code", to_str),
+    ("license_status_id", to_int),
+    ("license_status_code", to_str),
+    ("license_classification_id", to_int),
+    ("license_classification_code", to_str),
+    ("license_classification_description", to_str),
+    ("expiration_date", to_datetime),
+    ("firm_id", to_int),
+    ("corporate_name", to_str),
+    ("business_name", to_str),
+    ("doing_business_as", to_str),
+    ("state_incorporation", to_str),
+    ("address_line_1", to_str),
+    ("address_line_2", to_str),
+    ("city", to_str),
+    ("state", to_str),
+    ("zip", to_str),
+    ("county_id", to_int),
+    ("county_code", to_str),
+    ("license_address_type_id", to_int),
+    ("license_address_type_code", to_str),
+    ("license_address_type_description", to_str),
+    ("exemptee_last_name", to_str),
+    ("exemptee_first_name", to_str),
+]
+
+
+def iter_chunks(path, columns, chunk_size=CHUNK_SIZE):
+    """Yield lists of row dicts from a CSV file with a header row, `chunk_size` rows at a time."""
+    names = [name for name, _ in columns]
+    # String columns need no conversion, so only the int/date ones are touched per row
+    converted = [(index, converter) for index, (_, converter) in enumerate(columns) if converter is not to_str]
+    with open(path, mode='r', newline='') as file:
+        csv_reader = csv.reader(file)
+        next(csv_reader)  # Skip header
+        chunk = []
+        for row in csv_reader:
+            row = row[:len(names)]
+            for index, converter in converted:
+                row[index] = converter(row[index])
+            chunk.append(dict(zip(names, row)))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def bulk_load(engine, table, path, columns, chunk_size=CHUNK_SIZE):
+    """Insert every row of `path` into `table` in one transaction; returns the row count."""
+    started = time.perf_counter()
+    count = 0
+    with engine.begin() as conn:
+        for chunk in iter_chunks(path, columns, chunk_size):
+            conn.execute(table.insert(), chunk)
+            count += len(chunk)
+    logging.info(f"Loaded {count} rows into {table.name} from {path} in {time.perf_counter() - started:.2f}s")
+    return count
+
+
+def is_empty(engine, table):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(select(table).limit(1).subquery())).scalar() == 0
+
+
+def seed_database(engine, contact_table, license_table, contacts_path='info.csv', licenses_path='license.csv'):
+    """Load the CSVs into the Contact and License tables if they are empty."""
+    if is_empty(engine, contact_table):
+        bulk_load(engine, contact_table, contacts_path, CONTACT_COLUMNS)
+        logging.info("Database populated with initial data from info.csv")
+    if is_empty(engine, license_table):
+        bulk_load(engine, license_table, licenses_path, LICENSE_COLUMNS)
+        logging.info("Database populated with initial data from license.csv")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk load the contact and license CSV exports")
+    parser.add_argument("--db", default="sqlite:///contact_info.db", help="SQLAlchemy database URI")
+    parser.add_argument("--contacts", default="info.csv")
+    parser.add_argument("--licenses", default="license.csv")
+    parser.add_argument("--replace", action="store_true", help="empty the tables before loading")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    engine = create_engine(args.db)
+    metadata = MetaData()
+    metadata.reflect(engine, only=["contact", "license"])
+    contact_table, license_table = metadata.tables["contact"], metadata.tables["license"]
+
+    if args.replace:
+        with engine.begin() as conn:
+            conn.execute(contact_table.delete())
+            conn.execute(license_table.delete())
+
+    for table, path, columns in ((contact_table, args.contacts, CONTACT_COLUMNS),
+                                 (license_table, args.licenses, LICENSE_COLUMNS)):
+        if not path:
+            continue
+        if not is_empty(engine, table):
+            logging.info(f"{table.name} already has rows, skipping {path} (use --replace to reload)")
+            continue
+        bulk_load(engine, table, path, columns, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
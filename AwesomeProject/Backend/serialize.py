@@ -0,0 +1,68 @@
+# Fast JSON for License and Contact rows.
+#
+# The routes select plain column tuples with Core instead of hydrating ORM objects, zip
+# them with precomputed JSON keys and encode whole pages at once with orjson. The output
+# matches Contact.to_dict() / License.to_json() through jsonify, including the HTTP-date
+# format Flask uses for expirationDate.
+
+import json
+import re
+
+from sqlalchemy import DateTime, select
+from werkzeug.http import http_date
+
+from models import Contact, License
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the standard library encoder
+    orjson = None
+
+
+def camel_case(name):
+    """license_address_id -> licenseAddressId, address_line_1 -> addressLine1."""
+    return re.sub(r'_([a-z0-9])', lambda match: match.group(1).upper(), name)
+
+
+def dumps(obj):
+    """Encode `obj` as compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+class RowSerializer:
+    """Selects a table's columns and turns the result rows into JSON-ready dicts."""
+
+    def __init__(self, table, key_for=str):
+        self.table = table
+        self.columns = list(table.columns)
+        self.keys = [key_for(column.name) for column in self.columns]
+        self.primary_key = table.primary_key.columns.values()[0]
+        self.primary_key_name = key_for(self.primary_key.name)
+        self._date_indexes = [index for index, column in enumerate(self.columns) if isinstance(column.type, DateTime)]
+
+    def select(self):
+        return select(*self.columns)
+
+    def to_dicts(self, result):
+        """Dicts for the rows of an executed select(), keyed like to_json()/to_dict()."""
+        keys, date_indexes = self.keys, self._date_indexes
+        # Expiration dates repeat a lot, so each distinct one is formatted once per call
+        formatted = {None: None}
+        dicts = []
+        # fetchall() pulls the rows in one driver call instead of one fetchone() per row
+        for row in result.fetchall():
+            if date_indexes:
+                row = list(row)
+                for index in date_indexes:
+                    value = row[index]
+                    if value not in formatted:
+                        formatted[value] = http_date(value)
+                    row[index] = formatted[value]
+            dicts.append(dict(zip(keys, row)))
+        return dicts
+
+
+LICENSE = RowSerializer(License.__table__, camel_case)
+CONTACT = RowSerializer(Contact.__table__)
@@ -1,3 +1,5 @@
+import json
+
 import requests
 
 
@@ -9,6 +11,16 @@ def test_search_fda():
 	assert response.json() != {}
 
 
+def test_search_fda_all_streams_ndjson():
+	response = requests.post("https://api.healthly.dev/", json={"productDescription": "heart", "maxResults": 150})
+
+	assert response.status_code == 200
+	assert response.headers["Content-Type"].startswith("application/x-ndjson")
+	lines = response.text.splitlines()
+	assert 0 < len(lines) <= 150
+	assert all(isinstance(json.loads(line), dict) for line in lines)
+
+
 def test_search_k510():
 	response = requests.post("https://api.healthly.dev/k510", json={"deviceName": "heart"})
 
@@ -17,6 +29,20 @@ def test_search_k510():
 	assert response.json() != {}
 
 
+def test_search_k510_list_view():
+	response = requests.post("https://api.healthly.dev/k510", json={"deviceName": "heart", "view": "list"})
+
+	assert response.status_code == 200
+	results = response.json()["results"]
+	assert results != []
+	assert set(results[0]) <= {"k_number", "device_name", "applicant", "decision_date", "review_panel", "product_code"}
+
+	detail = requests.get("https://api.healthly.dev/k510/" + results[0]["k_number"])
+
+	assert detail.status_code == 200
+	assert detail.json()["k_number"] == results[0]["k_number"]
+
+
 def test_search_cdph():
 	response = requests.post("https://api.healthly.dev/cdph", json={"deviceName": "heart"})
 
@@ -79,9 +105,31 @@ def test_predict():
 	assert response.status_code == 200
 
 
+def test_predict_json():
+	response = requests.post("https://api.healthly.dev/predict", data={"format": "json"}, files={'file': ('ventilator.jpg', open('ventilator.jpg', 'rb'), 'image/jpeg')})
+
+	assert response.status_code == 200
+	assert isinstance(response.json()["detections"], list)
+
+
 def test_warningletter():
 	response = requests.post("https://api.healthly.dev/warning_letters", json={"firmName": "heart"})
 
 	assert response.status_code == 200
 	assert isinstance(response.json(), list)
 	assert response.json() != []
+
+
+def test_upstream_stats():
+	response = requests.get("https://api.healthly.dev/upstream/stats")
+
+	assert response.status_code == 200
+	assert isinstance(response.json(), dict)
+
+
+def test_search_firm():
+	response = requests.post("https://api.healthly.dev/search/firm", json={"firmName": "medtronic"})
+
+	assert response.status_code == 200
+	assert response.json()["firmName"] == "medtronic"
+	assert set(response.json()["status"]) >= {"cdph", "warning_letters", "ca_business_entity"}
@@ -0,0 +1,42 @@
+import cache
+
+
+def test_make_key_folds_case_whitespace_and_order():
+	a = cache.make_key(['product_description:"Heart  Monitor"', 'recalling_firm:"Acme"'], limit=100)
+	b = cache.make_key(['recalling_firm:"ACME"', ' product_description: "heart monitor" '], limit=100)
+
+	assert a == b
+
+
+def test_make_key_keeps_case_of_exact_fields():
+	assert cache.make_key(['k_number.exact:"K123"']) != cache.make_key(['k_number.exact:"k123"'])
+
+
+def test_memory_backend_evicts_least_recently_used():
+	backend = cache.MemoryBackend(max_entries=2)
+	backend.set("a", 1, 60)
+	backend.set("b", 2, 60)
+	backend.get("a")
+	backend.set("c", 3, 60)
+
+	assert backend.get("a") == 1
+	assert backend.get("b") is None
+	assert backend.get("c") == 3
+
+
+def test_sqlite_backend_expires_entries(tmp_path):
+	backend = cache.SQLiteBackend(str(tmp_path / "cache.db"))
+	backend.set("a", {"results": [1]}, 60)
+	backend.set("b", {"results": [2]}, -1)
+
+	assert backend.get("a") == {"results": [1]}
+	assert backend.get("b") is None
+
+
+def test_response_cache_uses_endpoint_ttl():
+	response_cache = cache.ResponseCache(cache.MemoryBackend(), ttls={"event": 0})
+	response_cache.set("event", "k", {"results": []})
+	response_cache.set("510k", "k", {"results": []})
+
+	assert response_cache.get("event", "k") is None
+	assert response_cache.get("510k", "k") == {"results": []}
@@ -0,0 +1,43 @@
+import pytest
+
+import cdph
+
+
+PAGE = b"""
+<html><body>
+<a href="/Programs/CEH/DFDCS/CDPH%20Document%20Library/Heart-Valve-Recall.pdf">Acme Heart Valve Recall</a>
+<a href="/Programs/CEH/DFDCS/Pages/Hearts.aspx">Hearts and Minds</a>
+<a href="/Programs/CEH/DFDCS/Pages/Pump.aspx">Infusion Pump - Medtronic</a>
+<a name="anchor-without-href">Heart</a>
+</body></html>
+"""
+
+
+def test_snapshot_matches_whole_words_in_text_and_href():
+	snapshot = cdph.Snapshot(cdph.parse_links(PAGE))
+
+	results = snapshot.search("heart", "")
+
+	assert [result["text"] for result in results] == ["Acme Heart Valve Recall"]
+	assert results[0]["url"].startswith("https://www.cdph.ca.gov/Programs/")
+
+
+def test_snapshot_matches_device_or_firm():
+	snapshot = cdph.Snapshot(cdph.parse_links(PAGE))
+
+	results = snapshot.search("heart valve", "medtronic")
+
+	assert [result["text"] for result in results] == ["Acme Heart Valve Recall", "Infusion Pump - Medtronic"]
+
+
+def test_snapshot_without_matches():
+	snapshot = cdph.Snapshot(cdph.parse_links(PAGE))
+
+	assert snapshot.search("ventilator", "") == []
+
+
+def test_lxml_and_soup_parsers_agree():
+	pytest.importorskip("lxml")
+	page = PAGE.replace(b"Hearts and Minds", b"Hearts <b>and</b> Minds")
+	assert cdph.parse_links_lxml(page) == cdph.parse_links_soup(page)
+	assert len(cdph.parse_links_lxml(page)) == 3
@@ -0,0 +1,81 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+import fanout
+import upstream
+
+
+def fail():
+	raise RuntimeError("backend down")
+
+
+def test_ok_error_and_timeout():
+	release = threading.Event()
+	outcomes = list(fanout.run(
+		{"fast": lambda: [1, 2], "broken": fail, "slow": lambda: release.wait(5)},
+		{"fast": 1, "broken": 1, "slow": 0.2},
+	))
+	release.set()
+
+	by_source = {outcome["source"]: outcome for outcome in outcomes}
+	assert by_source["fast"]["status"] == "ok" and by_source["fast"]["results"] == [1, 2]
+	assert by_source["broken"] == {"source": "broken", "status": "error", "elapsed": by_source["broken"]["elapsed"],
+	                               "error": "backend down"}
+	assert by_source["slow"]["status"] == "timeout"
+	assert 0.2 <= by_source["slow"]["elapsed"] < 1
+	# Reported in completion order
+	assert outcomes[-1]["source"] == "slow"
+
+
+def test_sources_run_under_their_deadline():
+	seen = {}
+
+	def probe(name):
+		seen[name] = (upstream.remaining(), upstream.get_session().get_adapter("https://api.fda.gov/").max_retries)
+
+	list(fanout.run({"a": lambda: probe("a"), "b": lambda: probe("b")}, {"a": 2}, default_deadline=5))
+	assert 1 < seen["a"][0] <= 2 and 4 < seen["b"][0] <= 5
+	assert seen["a"][1] is upstream.NO_RETRY
+	# Outside a fan-out the usual retries apply again
+	assert upstream.remaining() is None
+	assert upstream.get_session().get_adapter("https://api.fda.gov/").max_retries.total == upstream.RETRIES
+
+
+def test_source_queued_past_its_deadline_is_not_started(monkeypatch):
+	monkeypatch.setattr(fanout, "executor", ThreadPoolExecutor(max_workers=1))
+	release = threading.Event()
+	started = []
+	# "hog" holds the only thread until after "late" has timed out
+	hog = threading.Thread(target=lambda: list(fanout.run({"hog": lambda: release.wait(5)}, {"hog": 5})))
+	hog.start()
+	time.sleep(0.05)
+	outcomes = fanout.run({"late": lambda: started.append(True)}, {"late": 0.1})
+	assert [outcome["status"] for outcome in outcomes] == ["timeout"]
+
+	release.set()
+	hog.join()
+	fanout.executor.shutdown(wait=True)
+	assert started == []
+
+
+def test_upstream_calls_cut_to_the_deadline(monkeypatch):
+	monkeypatch.setattr(upstream, "_session", None)
+	calls = []
+	monkeypatch.setattr(upstream.get_session(), "request", lambda method, url, **kwargs: calls.append(kwargs["timeout"]))
+
+	with upstream.deadline(time.monotonic() + 10):
+		upstream.get("https://api.fda.gov/")
+		upstream.get("https://api.fda.gov/", timeout=1)
+		upstream.get("https://api.fda.gov/", timeout=None)
+	assert calls[0][0] == upstream.CONNECT_TIMEOUT and 9.9 < calls[0][1] <= 10
+	assert calls[1] == (1, 1)
+	assert 9.9 < calls[2][0] <= 10 and calls[2][0] == calls[2][1]
+
+	with upstream.deadline(time.monotonic() - 1):
+		with pytest.raises(requests.Timeout):
+			upstream.get("https://api.fda.gov/")
+	assert len(calls) == 3
@@ -0,0 +1,60 @@
+import json
+import zipfile
+
+import fda_store
+
+
+RECALLS = [
+	{"product_description": "Heart valve prosthesis", "recalling_firm": "Acme Medical", "recall_number": "Z-0001-2024",
+	 "classification": "Class II", "report_date": "20240103"},
+	{"product_description": "Artificial heart valve", "recalling_firm": "Acme Medical", "recall_number": "Z-0002-2024",
+	 "classification": "Class I", "report_date": "20240105"},
+	{"product_description": "Infusion pump", "recalling_firm": "Pumpco", "recall_number": "Z-0003-2023",
+	 "classification": "Class I", "report_date": "20230101"},
+]
+
+
+def load_store(tmp_path, monkeypatch):
+	zip_path = tmp_path / "device-enforcement-0001-of-0001.json.zip"
+	with zipfile.ZipFile(zip_path, "w") as archive:
+		archive.writestr("device-enforcement-0001-of-0001.json", json.dumps({"meta": {}, "results": RECALLS}))
+
+	db_path = str(tmp_path / "openfda.db")
+	assert fda_store.ingest("enforcement", db_path, [str(zip_path)]) == len(RECALLS)
+
+	monkeypatch.setattr(fda_store, "STORE_PATH", db_path)
+	monkeypatch.setattr(fda_store, "_available", {})
+
+
+def test_search_matches_phrases_and_exact_fields(tmp_path, monkeypatch):
+	load_store(tmp_path, monkeypatch)
+
+	response = fda_store.search("enforcement", ['product_description:"heart valve"', 'classification:"Class I"'])
+
+	assert response["meta"]["results"]["total"] == 1
+	assert response["results"][0]["recall_number"] == "Z-0002-2024"
+
+
+def test_search_orders_newest_first_and_pages(tmp_path, monkeypatch):
+	load_store(tmp_path, monkeypatch)
+
+	response = fda_store.search("enforcement", ['recalling_firm:"ACME"'], limit=1, skip=1)
+
+	assert response["meta"]["results"]["total"] == 2
+	assert [record["report_date"] for record in response["results"]] == ["20240103"]
+
+
+def test_unknown_fields_fall_back_to_the_api(tmp_path, monkeypatch):
+	load_store(tmp_path, monkeypatch)
+
+	assert fda_store.can_answer("enforcement", ['recalling_firm:"Acme"'])
+	assert not fda_store.can_answer("enforcement", ['code_info:"123"'])
+	assert not fda_store.can_answer("510k", ['applicant:"Acme"'])
+
+
+def test_date_ranges_are_pushed_down(tmp_path, monkeypatch):
+	load_store(tmp_path, monkeypatch)
+
+	response = fda_store.search("enforcement", ['recalling_firm:"acme"', 'report_date:[20240104 TO 20240131]'])
+
+	assert [record["recall_number"] for record in response["results"]] == ["Z-0002-2024"]
@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+import firm_search
+from models import Contact, License
+
+
+@pytest.fixture
+def engine():
+	engine = create_engine("sqlite://")
+	License.__table__.create(engine)
+	Contact.__table__.create(engine)
+	with engine.begin() as conn:
+		conn.execute(License.__table__.insert(), [
+			{"license_address_id": 1, "business_name": "Pacific Medical Supply", "corporate_name": "PMS Holdings Inc",
+			 "doing_business_as": None, "address_line_1": "12 Main St", "city": "Fresno"},
+			{"license_address_id": 2, "business_name": "Golden Health", "corporate_name": None, "doing_business_as": "Golden Pharmacy",
+			 "address_line_1": "400 Broadway", "city": "Oakland"},
+		])
+		conn.execute(Contact.__table__.insert(), [
+			{"id": 1, "county": "Fresno", "name": "Fresno County District Attorney", "address": "2100 Tulare St"},
+		])
+	# Existing rows are backfilled; later changes go through the triggers
+	firm_search.ensure_index(engine)
+	return engine
+
+
+def names(engine, query):
+	return [result["name"] for result in firm_search.search(engine, query)]
+
+
+def test_backfill_and_prefix_search(engine):
+	assert names(engine, "pacific med") == ["Pacific Medical Supply"]
+	assert names(engine, "fresno") == ["Fresno County District Attorney", "Pacific Medical Supply"]
+
+
+def test_matches_corporate_name_and_dba(engine):
+	assert names(engine, "pms holdings") == ["Pacific Medical Supply"]
+	assert names(engine, "golden pharmacy") == ["Golden Health"]
+
+
+def test_typo_tolerance(engine):
+	assert names(engine, "pacfic medicl") == ["Pacific Medical Supply"]
+
+
+def test_triggers_keep_index_in_sync(engine):
+	with engine.begin() as conn:
+		conn.execute(License.__table__.insert(), {"license_address_id": 3, "business_name": "Sierra Surgical"})
+		conn.execute(text("UPDATE license SET business_name = 'Golden Wellness' WHERE license_address_id = 2"))
+		conn.execute(text("DELETE FROM contact WHERE id = 1"))
+	assert names(engine, "sierra") == ["Sierra Surgical"]
+	assert names(engine, "golden wellness") == ["Golden Wellness"]
+	assert names(engine, "district attorney") == []
+
+
+def test_results_identify_source_rows(engine):
+	results = firm_search.search(engine, "fresno")
+	assert {(result["source"], result["id"]) for result in results} == {("license", 1), ("contact", 1)}
+	assert firm_search.suggest(engine, "gol") == ["Golden Health"]
+
+
+def test_typo_in_first_letter(engine):
+	assert names(engine, "oacific") == ["Pacific Medical Supply"]
+
+
+def test_term_index_narrows_candidates():
+	index = firm_search.TermIndex(["pacific", "pacifica", "medical", "golden", "pa", "pacificcoastal"])
+	candidates = index.candidates("pacfic")
+	assert candidates[0] == "pacific"
+	assert "pacificcoastal" not in candidates and "golden" not in candidates
+
+
+def test_term_index_follows_row_changes(engine):
+	from listing import ensure_versions
+
+	ensure_versions(engine, [License.__table__, Contact.__table__])
+	assert names(engine, "sierre") == []
+	with engine.begin() as conn:
+		conn.execute(License.__table__.insert(), {"license_address_id": 3, "business_name": "Sierra Surgical"})
+	assert names(engine, "sierre") == ["Sierra Surgical"]
+
+
+@pytest.mark.parametrize("limit", [[5], {"n": 5}, "five", True])
+def test_bad_limit_rejected(engine, limit):
+	with pytest.raises(ValueError, match="limit must be an integer"):
+		firm_search.search(engine, "pacific", limit=limit)
+	assert len(firm_search.search(engine, "pacific", limit="1")) == 1
@@ -0,0 +1,110 @@
+import io
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from PIL import Image, ImageEnhance
+
+import image_cache
+import intake
+
+VENTILATOR = os.path.join(os.path.dirname(__file__), "ventilator.jpg")
+
+
+def encode(image, **options):
+	buffer = io.BytesIO()
+	image.save(buffer, format="JPEG", **options)
+	return buffer.getvalue()
+
+
+def upload_hash(data, algorithm):
+	return image_cache.hash_image(intake.load(data, intake.MODEL_INPUT_SIZE).image, algorithm)
+
+
+@pytest.fixture
+def photo():
+	return Image.open(VENTILATOR).convert("RGB")
+
+
+@pytest.mark.parametrize("algorithm", ["phash", "dhash"])
+def test_near_duplicates_hash_close(photo, algorithm):
+	original = upload_hash(encode(photo), algorithm)
+	# Re-shot: smaller, recompressed and a little brighter
+	retake = photo.resize((photo.width // 2, photo.height // 2))
+	retake = ImageEnhance.Brightness(retake).enhance(1.1)
+	assert image_cache.hamming(original, upload_hash(encode(retake, quality=70), algorithm)) <= 6
+
+	noise = Image.fromarray(np.random.default_rng(1).integers(0, 255, (photo.height, photo.width, 3), dtype=np.uint8))
+	assert image_cache.hamming(original, upload_hash(encode(noise), algorithm)) > 12
+
+
+@pytest.fixture
+def cache(tmp_path):
+	return image_cache.ImageCache(str(tmp_path / "image_cache.db"), max_distance=4, max_entries=3)
+
+
+def test_exact_near_and_miss(cache):
+	cache.set("serpapi", 0b1111, {"title": "ventilator"})
+	assert cache.get("serpapi", 0b1111) == {"title": "ventilator"}
+	assert cache.get("serpapi", 0b0111) == {"title": "ventilator"}
+	assert cache.get("serpapi", 0b1111 << 20) is None
+	# Namespaces do not mix
+	assert cache.get("predict-json", 0b1111) is None
+	assert (cache.hits, cache.near_hits, cache.misses) == (2, 1, 2)
+
+
+def test_high_bit_hashes_round_trip(cache):
+	image_hash = (1 << 64) - 1
+	cache.set("serpapi", image_hash, [1])
+	assert image_cache.ImageCache(cache.path).get("serpapi", image_hash) == [1]
+
+
+def test_lru_eviction(cache):
+	hashes = [0xFF << (index * 16) for index in range(4)]
+	for index in range(3):
+		cache.set("predict-json", hashes[index], index)
+	cache.get("predict-json", hashes[0])  # refresh the oldest
+	cache.set("predict-json", hashes[3], 3)
+	assert cache.get("predict-json", hashes[1]) is None
+	assert [cache.get("predict-json", hashes[index]) for index in (0, 2, 3)] == [0, 2, 3]
+
+
+def test_shared_and_persistent_across_workers(cache):
+	other = image_cache.ImageCache(cache.path, max_distance=4)
+	assert other.get("serpapi", 42) is None
+	cache.set("serpapi", 42, {"from": "first worker"})
+	assert other.get("serpapi", 43) == {"from": "first worker"}
+
+
+def test_expired_results_are_dropped(cache):
+	cache.ttls = {"serpapi": -1}
+	cache.set("serpapi", 7, "stale")
+	assert cache.get("serpapi", 7) is None
+
+
+def test_cached_detections_follow_the_retake_size(photo, tmp_path, monkeypatch):
+	import main
+
+	monkeypatch.setattr(main, "image_results", image_cache.ImageCache(str(tmp_path / "image_cache.db")))
+	calls = []
+
+	def predict(image):
+		# One box over the middle of whatever the model was given
+		calls.append(image.shape)
+		height, width = image.shape[:2]
+		return SimpleNamespace(names={0: "ventilator"}, boxes=SimpleNamespace(
+			xyxy=np.array([[width / 4, height / 4, width * 3 / 4, height * 3 / 4]]),
+			cls=np.array([0.0]), conf=np.array([0.9])))
+
+	monkeypatch.setattr(main.inference, "predict", predict)
+	width, height = photo.size
+	first = main.run_prediction(intake.load(encode(photo), intake.MODEL_INPUT_SIZE), "json")
+	retake = photo.resize((width // 2, height // 2))
+	second = main.run_prediction(intake.load(encode(retake), intake.MODEL_INPUT_SIZE), "json")
+
+	assert len(calls) == 1
+	assert (first["width"], first["height"]) == (width, height)
+	assert first["detections"][0]["box"] == pytest.approx([width / 4, height / 4, width * 3 / 4, height * 3 / 4], abs=1)
+	assert (second["width"], second["height"]) == (width // 2, height // 2)
+	assert second["detections"][0]["box"] == pytest.approx([width / 8, height / 8, width * 3 / 8, height * 3 / 8], abs=1)
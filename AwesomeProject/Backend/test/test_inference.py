@@ -0,0 +1,88 @@
+import base64
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import inference
+
+
+def test_detections_as_json():
+	result = SimpleNamespace(
+		names={0: "ventilator", 1: "infusion pump"},
+		boxes=SimpleNamespace(
+			xyxy=np.array([[10.04, 20.0, 110.5, 220.26], [5.0, 6.0, 7.0, 8.0]]),
+			cls=np.array([1.0, 0.0]),
+			conf=np.array([0.91234, 0.5]),
+		),
+	)
+	assert inference.detections(result) == [
+		{"class": "infusion pump", "classId": 1, "confidence": 0.9123, "box": [10.0, 20.0, 110.5, 220.3]},
+		{"class": "ventilator", "classId": 0, "confidence": 0.5, "box": [5.0, 6.0, 7.0, 8.0]},
+	]
+
+
+def test_encode_jpeg_in_memory():
+	cv2 = pytest.importorskip("cv2")
+	image = np.zeros((32, 48, 3), dtype=np.uint8)
+	decoded = cv2.imdecode(np.frombuffer(base64.b64decode(inference.encode_jpeg(image)), np.uint8), cv2.IMREAD_COLOR)
+	assert decoded.shape == (32, 48, 3)
+
+
+def test_batcher_groups_concurrent_requests():
+	batches = []
+
+	def run_batch(thread_index, images):
+		batches.append(list(images))
+		return [image * 10 for image in images]
+
+	batcher = inference.Batcher(run_batch, batch_size=4, wait_ms=200, threads=1)
+	futures = [batcher.submit(number) for number in range(6)]
+	assert [future.result(timeout=5) for future in futures] == [0, 10, 20, 30, 40, 50]
+	assert batches == [[0, 1, 2, 3], [4, 5]]
+
+	stats = batcher.stats()
+	assert stats["images"] == 6 and stats["batches"] == 2 and stats["mean_batch_size"] == 3
+	assert stats["max_queue_depth"] >= 4 and stats["queue_depth"] == 0
+
+
+def test_batch_errors_reach_every_request():
+	def run_batch(thread_index, images):
+		raise RuntimeError("model failed")
+
+	batcher = inference.Batcher(run_batch, batch_size=2, wait_ms=50, threads=1)
+	futures = [batcher.submit(number) for number in range(2)]
+	for future in futures:
+		with pytest.raises(RuntimeError):
+			future.result(timeout=5)
+	assert batcher.stats()["errors"] == 2
+
+
+def test_select_backend(tmp_path, monkeypatch):
+	monkeypatch.setattr(inference.importlib.util, "find_spec", lambda name: object())
+	model_path = str(tmp_path / "last.pt")
+	benchmark_path = str(tmp_path / "model_benchmark.json")
+	for name in ("last.pt", "last.onnx", "last.int8.onnx"):
+		(tmp_path / name).write_bytes(b"")
+
+	assert inference.available_backends(model_path) == ["torch", "onnx", "onnx-int8"]
+	# Without benchmark results no export is trusted
+	assert inference.select_backend("auto", model_path, benchmark_path) == "torch"
+	assert inference.select_backend("torch", model_path, benchmark_path) == "torch"
+
+	weights = inference.weights_digest(model_path)
+	(tmp_path / "model_benchmark.json").write_text(json.dumps({"weights_sha256": weights, "backends": {
+		"torch": {"valid": True, "images_per_second": 4.0},
+		"onnx": {"valid": True, "images_per_second": 9.0},
+		"onnx-int8": {"valid": False, "images_per_second": 15.0},
+	}}))
+	assert inference.select_backend("auto", model_path, benchmark_path) == "onnx"
+
+	# New weights: the exports were validated against the old ones
+	(tmp_path / "last.pt").write_bytes(b"retrained")
+	assert inference.select_backend("auto", model_path, benchmark_path) == "torch"
+
+	(tmp_path / "model_benchmark.json").write_text(json.dumps({"weights_sha256": inference.weights_digest(model_path),
+	                                                           "backends": {"onnx": {"valid": False, "images_per_second": 9.0}}}))
+	assert inference.select_backend("auto", model_path, benchmark_path) == "torch"
@@ -0,0 +1,76 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import intake
+
+
+def encode(image, format="JPEG", **options):
+	buffer = io.BytesIO()
+	image.save(buffer, format=format, **options)
+	return buffer.getvalue()
+
+
+@pytest.fixture
+def landscape():
+	# Left half red, right half blue
+	image = Image.new("RGB", (400, 300), (255, 0, 0))
+	image.paste((0, 0, 255), (200, 0, 400, 300))
+	return image
+
+
+def test_exif_orientation_applied(landscape):
+	exif = Image.Exif()
+	exif[intake.ORIENTATION_TAG] = 6  # shot in portrait: rotate 90 degrees clockwise
+	photo = intake.load(encode(landscape, exif=exif), 1000)
+
+	assert photo.image.size == (300, 400)
+	assert photo.original_size == (300, 400)
+	# The left (red) half is now on top
+	assert photo.image.getpixel((150, 50))[0] > 200
+	assert photo.image.getpixel((150, 350))[2] > 200
+
+
+def test_downscaled_to_max_side(landscape):
+	big = landscape.resize((4000, 3000))
+	photo = intake.load(encode(big), 640)
+
+	assert photo.image.size == (640, 480)
+	assert photo.original_size == (4000, 3000)
+	assert photo.scale == pytest.approx(6.25)
+
+
+def test_non_jpeg_and_mode_converted():
+	photo = intake.load(encode(Image.new("RGBA", (50, 20), (0, 255, 0, 128)), format="PNG"), 640)
+
+	assert photo.image.mode == "RGB"
+	assert photo.image.size == (50, 20)
+	assert photo.scale == 1
+
+
+def test_model_array_is_bgr_view(landscape):
+	photo = intake.load(encode(landscape, format="PNG"), 640)
+	array = photo.to_model_array()
+
+	assert array.shape == (300, 400, 3)
+	assert tuple(array[0, 0]) == (0, 0, 255)
+	assert not array.flags.owndata
+
+
+def test_jpeg_bounded():
+	noise = Image.fromarray(np.random.default_rng(1).integers(0, 255, (1200, 1600, 3), dtype=np.uint8))
+	photo = intake.load(encode(noise, format="PNG"), 1600)
+
+	small = Image.new("RGB", (1600, 1200), (90, 120, 150))
+	assert Image.open(io.BytesIO(intake.Photo(small, small.size).to_jpeg())).size == (1600, 1200)
+	# Noise does not fit 200 KB even at the lowest quality, so it is also made smaller
+	data = photo.to_jpeg(max_bytes=200 * 1024)
+	assert len(data) <= 200 * 1024
+	assert Image.open(io.BytesIO(data)).width < 1600
+
+
+def test_unreadable_data_raises():
+	with pytest.raises(Exception):
+		intake.load(b"not an image", 640)
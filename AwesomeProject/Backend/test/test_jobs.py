@@ -0,0 +1,100 @@
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import jobs
+
+
+@pytest.fixture
+def queue(tmp_path):
+	return jobs.JobQueue(str(tmp_path / "jobs.db"), workers=2)
+
+
+def test_result_and_long_poll(queue):
+	release = threading.Event()
+	job_id = queue.submit("predict", lambda: release.wait(5) and {"detections": []})
+	assert queue.get(job_id)["status"] in (jobs.QUEUED, jobs.RUNNING)
+	# Times out while the job is still running
+	assert queue.get(job_id, wait=0.1)["status"] == jobs.RUNNING
+
+	threading.Timer(0.1, release.set).start()
+	started = time.monotonic()
+	job = queue.get(job_id, wait=5)
+	assert time.monotonic() - started < 2
+	assert jobs.to_json(job)["result"] == {"detections": []}
+	assert job["started_at"] <= job["finished_at"]
+
+
+def test_failed_job_reports_error(queue):
+	def fail():
+		raise RuntimeError("Failed to fetch data from the API")
+
+	job = queue.get(queue.submit("maude", fail), wait=5)
+	assert job["status"] == jobs.FAILED
+	assert jobs.to_json(job) == {
+		"jobId": job["id"], "kind": "maude", "status": "failed", "createdAt": job["created_at"],
+		"startedAt": job["started_at"], "finishedAt": job["finished_at"],
+		"error": "Failed to fetch data from the API",
+	}
+
+
+def test_unknown_job(queue):
+	assert queue.get("missing", wait=0.1) is None
+
+
+def test_other_worker_polls_the_table(queue):
+	other = jobs.JobQueue(queue.path)
+	release = threading.Event()
+	job_id = queue.submit("serpapi", lambda: release.wait(5) and {"ok": True})
+
+	threading.Timer(0.1, release.set).start()
+	assert other.get(job_id, wait=5)["status"] == jobs.DONE
+	assert other.stats()["jobs"] == {"done": 1}
+
+
+def test_jobs_of_exited_workers_fail(queue):
+	exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+	queue.conn.execute(
+		"INSERT INTO jobs (id, kind, status, pid, created_at) VALUES ('orphan', 'predict', 'running', ?, 0)",
+		(int(exited.stdout),),
+	)
+	assert queue.get("orphan")["status"] == jobs.FAILED
+
+	queue.conn.execute("INSERT INTO jobs (id, kind, status, pid, created_at) VALUES ('stale', 'maude', 'queued', 1, 0)")
+	assert queue.fail_interrupted() == 1
+	assert queue.get("stale")["error"] == "Interrupted by a restart"
+
+
+def test_finished_jobs_expire(queue):
+	queue.ttl = -1
+	first = queue.submit("maude", dict)
+	assert queue.get(first, wait=5)["status"] == jobs.DONE
+	queue.submit("maude", dict)
+	assert queue.get(first) is None
+
+
+def test_callback_allow_list():
+	assert not jobs.callback_allowed("http://8.8.8.8/hook", allow=[])
+	assert jobs.callback_allowed("http://8.8.8.8/hook", allow=["8.8.8.8"])
+	assert not jobs.callback_allowed("ftp://8.8.8.8/hook", allow=["8.8.8.8"])
+	assert not jobs.callback_allowed("http://8.8.4.4/hook", allow=["8.8.8.8"])
+
+	prefix = ["https://8.8.8.8/hooks/"]
+	assert jobs.callback_allowed("https://8.8.8.8/hooks/42", allow=prefix)
+	assert not jobs.callback_allowed("https://8.8.8.8/hooksx", allow=prefix)
+	assert not jobs.callback_allowed("https://8.8.8.8.evil.test/hooks/42", allow=prefix)
+
+
+@pytest.mark.parametrize("url, host", [
+	("http://127.0.0.1:9200/", "127.0.0.1"),
+	("http://localhost:5005/", "localhost"),
+	("http://169.254.169.254/latest/meta-data", "169.254.169.254"),
+	("http://10.0.0.5/", "10.0.0.5"),
+	("http://[::1]/", "::1"),
+])
+def test_callback_to_private_addresses_refused(url, host):
+	# Refused even when allow-listed
+	assert not jobs.callback_allowed(url, allow=[host])
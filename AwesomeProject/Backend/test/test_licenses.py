@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import licenses
+from models import License
+
+
+@pytest.fixture
+def session():
+	engine = create_engine("sqlite://")
+	License.__table__.create(engine)
+	with Session(engine) as session:
+		session.add_all([
+			License(license_address_id=1, business_name="Pacific Medical Supply", city="Fresno", zip="93701",
+					license_status_code="AC", expiration_date=datetime(2026, 3, 15, 0, 0)),
+			License(license_address_id=2, business_name="PACIFIC MEDICINE CO", city="FRESNO", zip="93702",
+					license_status_code="AC", expiration_date=datetime(2026, 3, 15, 23, 59)),
+			License(license_address_id=3, business_name="Golden Health", city="Oakland", zip="94601",
+					license_status_code="IN", expiration_date=datetime(2026, 3, 16)),
+		])
+		session.commit()
+		yield session
+
+
+def ids(session, filters, **kwargs):
+	query, _ = licenses.build_search(filters, **kwargs)
+	return [license.license_address_id for license in session.execute(query).scalars()]
+
+
+def test_business_name_is_a_case_insensitive_prefix(session):
+	assert ids(session, {"businessName": "pacific med"}) == [1, 2]
+	assert ids(session, {"businessName": "Pacific Medical"}) == [1]
+
+
+def test_city_zip_and_expiration_date(session):
+	assert ids(session, {"city": "fresno", "zip": "9370"}) == [1, 2]
+	assert ids(session, {"expirationDate": "2026-03-15"}) == [1, 2]
+	assert ids(session, {"licenseStatusCode": "IN"}) == [3]
+
+
+def test_keyset_pagination(session):
+	assert ids(session, {}, limit=2) == [1, 2]
+	assert ids(session, {}, cursor=2, limit=2) == [3]
+
+
+def test_bad_expiration_date():
+	with pytest.raises(ValueError):
+		licenses.build_search({"expirationDate": "March"})
+
+
+@pytest.mark.parametrize("filters, kwargs, message", [
+	({"businessName": 5}, {}, "businessName must be a string"),
+	({"state": ["CA"]}, {}, "state must be a string"),
+	({}, {"cursor": "abc"}, "cursor must be an integer"),
+	({}, {"limit": [10]}, "limit must be an integer"),
+	({}, {"limit": True}, "limit must be an integer"),
+])
+def test_bad_filter_types(filters, kwargs, message):
+	with pytest.raises(ValueError, match=message):
+		licenses.build_search(filters, **kwargs)
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+import listing
+from models import Contact
+from serialize import CONTACT
+
+
+@pytest.fixture
+def session():
+	engine = create_engine("sqlite://")
+	Contact.__table__.create(engine)
+	listing.ensure_versions(engine, [Contact.__table__])
+	with Session(engine) as session:
+		session.add_all([Contact(id=i, county=f"County {i}", name=f"DA {i}") for i in range(1, 6)])
+		session.commit()
+		yield session
+
+
+def test_keyset_pages(session):
+	assert [c["id"] for c in listing.page(session, CONTACT, limit=2)] == [1, 2]
+	assert [c["id"] for c in listing.page(session, CONTACT, cursor=2, limit=2)] == [3, 4]
+	assert [c["id"] for c in listing.page(session, CONTACT, cursor=4, limit=2)] == [5]
+
+
+def test_parse_page():
+	assert listing.parse_page({}) == (None, None)
+	assert listing.parse_page({"cursor": "7"}) == (7, listing.DEFAULT_LIMIT)
+	assert listing.parse_page({"limit": "50000"}) == (None, listing.MAX_LIMIT)
+	with pytest.raises(ValueError):
+		listing.parse_page({"limit": "ten"})
+
+
+def test_streamed_exports_cover_every_row(session):
+	chunks = listing.iter_chunks(session, CONTACT, chunk_size=2)
+	array = json.loads(b"".join(listing.stream_json_array(chunks)))
+	assert [contact["id"] for contact in array] == [1, 2, 3, 4, 5]
+
+	chunks = listing.iter_chunks(session, CONTACT, chunk_size=2)
+	lines = b"".join(listing.stream_ndjson(chunks)).splitlines()
+	assert [json.loads(line)["name"] for line in lines] == ["DA 1", "DA 2", "DA 3", "DA 4", "DA 5"]
+
+
+def test_empty_table_streams_empty_array(session):
+	session.execute(text("DELETE FROM contact"))
+	chunks = listing.iter_chunks(session, CONTACT)
+	assert b"".join(listing.stream_json_array(chunks)) == b"[]"
+
+
+def test_etag_changes_with_rows_and_representation(session):
+	first = listing.etag(session, CONTACT, {})
+	assert listing.etag(session, CONTACT, {}) == first
+	assert listing.etag(session, CONTACT, {"limit": "2"}) != first
+
+	session.execute(text("UPDATE contact SET phone = '555' WHERE id = 3"))
+	assert listing.etag(session, CONTACT, {}) != first
@@ -0,0 +1,42 @@
+import model_export
+
+
+def detection(class_id, confidence, box):
+	return {"class": str(class_id), "classId": class_id, "confidence": confidence, "box": box}
+
+
+def test_iou():
+	assert model_export.iou([0, 0, 10, 10], [0, 0, 10, 10]) == 1
+	assert model_export.iou([0, 0, 10, 10], [5, 0, 15, 10]) == 50 / 150
+	assert model_export.iou([0, 0, 10, 10], [20, 20, 30, 30]) == 0
+
+
+def test_matching_detections_are_valid():
+	reference = [detection(0, 0.9, [10, 10, 100, 100]), detection(1, 0.7, [200, 50, 300, 150])]
+	candidate = [detection(1, 0.68, [201, 50, 300, 151]), detection(0, 0.92, [10, 11, 100, 100])]
+	comparison = model_export.compare(reference, candidate)
+	assert comparison["valid"] and comparison["max_confidence_delta"] == 0.02
+
+
+def test_mismatches_are_reported():
+	reference = [detection(0, 0.9, [10, 10, 100, 100])]
+	assert not model_export.compare(reference, [detection(1, 0.9, [10, 10, 100, 100])])["valid"]
+	assert not model_export.compare(reference, [detection(0, 0.9, [40, 40, 130, 130])])["valid"]
+	assert not model_export.compare(reference, [detection(0, 0.8, [10, 10, 100, 100])])["valid"]
+
+
+def test_borderline_detections_may_flip():
+	reference = [detection(0, 0.9, [10, 10, 100, 100]), detection(1, 0.27, [200, 50, 300, 150])]
+	candidate = [detection(0, 0.9, [10, 10, 100, 100])]
+	assert model_export.compare(reference, candidate)["valid"]
+
+
+def test_images_decoded_like_predict(tmp_path):
+	from PIL import Image
+
+	Image.new("RGB", (1280, 960), (255, 0, 0)).save(tmp_path / "red.png")
+	files, images = model_export.load_images([str(tmp_path)])
+	assert files == [str(tmp_path / "red.png")]
+	# Scaled to the model input size, in the BGR order /predict uses
+	assert images[0].shape == (480, 640, 3)
+	assert tuple(images[0][0, 0]) == (0, 0, 255)
@@ -0,0 +1,79 @@
+from datetime import date
+
+import pytest
+
+import openfda
+
+
+def test_date_range_clause_formats_openfda_range():
+	assert openfda.date_range_clause("report_date", "2024-01-01", "2024-01-31") == "report_date:[20240101 TO 20240131]"
+
+
+def test_date_range_clause_is_open_ended():
+	assert openfda.date_range_clause("decision_date", "", "2020-06-30") == "decision_date:[19000101 TO 20200630]"
+	assert openfda.date_range_clause("decision_date", "", "") is None
+
+
+def test_date_range_clause_honors_today():
+	today = date.today()
+	expected = f"date_received:[{today:%Y%m%d} TO {today:%Y%m%d}]"
+	assert openfda.date_range_clause("date_received", today.isoformat(), today.isoformat()) == expected
+	assert openfda.date_range_clause("date_received", today.isoformat(), "") == expected
+
+
+def test_date_range_clause_rejects_bad_ranges():
+	with pytest.raises(ValueError):
+		openfda.date_range_clause("report_date", "2024-02-01", "2024-01-01")
+	with pytest.raises(ValueError):
+		openfda.date_range_clause("report_date", "yesterday", "")
+
+
+def test_project_reaches_into_nested_lists():
+	record = {
+		"mdr_report_key": "123",
+		"device": [{"generic_name": "pump", "brand_name": "Flow", "device_operator": "nurse"}],
+		"mdr_text": [{"text": "long narrative"}],
+	}
+
+	assert list(openfda.project([record], ["mdr_report_key", "device.generic_name"])) == [
+		{"mdr_report_key": "123", "device": [{"generic_name": "pump"}]}
+	]
+
+
+def test_requested_fields():
+	assert openfda.requested_fields("510k", {"fields": "k_number, applicant"}) == ["k_number", "applicant"]
+	assert openfda.requested_fields("510k", {"view": "list"}) == openfda.LIST_FIELDS["510k"]
+	assert openfda.requested_fields("510k", {}) is None
+
+
+@pytest.mark.parametrize("max_results", ["abc", "-5", 0, True])
+def test_bad_max_results_is_a_client_error(monkeypatch, max_results):
+	import main
+
+	monkeypatch.setenv("FDA_API_KEY", "test-key")
+	client = main.app.test_client()
+	for path, body in (("/k510", {"deviceName": "ventilator"}), ("/maude", {"deviceName": "ventilator"})):
+		response = client.post(path, json=dict(body, all="true", maxResults=max_results))
+		assert response.status_code == 400
+		assert response.json == {"error": "maxResults must be a positive integer"}
+	response = client.post("/maude?async=true", json={"deviceName": "ventilator", "maxResults": max_results})
+	assert response.status_code == 400
+
+
+def test_max_results_param():
+	import main
+
+	assert main.max_results_param({}) is None
+	assert main.max_results_param({"maxResults": "250"}) == 250
+
+
+def test_async_maude_pull_must_be_bounded(monkeypatch):
+	import jobs
+	import main
+
+	monkeypatch.setenv("FDA_API_KEY", "test-key")
+	client = main.app.test_client()
+	for extra in ({"all": "true"}, {"maxResults": jobs.MAX_RECORDS + 1}):
+		response = client.post("/maude?async=true", json=dict({"deviceName": "ventilator"}, **extra))
+		assert response.status_code == 400
+		assert "maxResults" in response.json["error"]
@@ -0,0 +1,42 @@
+import csv
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, select
+
+import seed
+
+
+def make_license_table(metadata):
+	columns = [Column("license_address_id", Integer, primary_key=True)]
+	for name, converter in seed.LICENSE_COLUMNS[1:]:
+		column_type = {seed.to_int: Integer, seed.to_datetime: DateTime}.get(converter, String)
+		columns.append(Column(name, column_type))
+	return Table("license", metadata, *columns)
+
+
+def test_bulk_load_converts_and_inserts_in_chunks(tmp_path):
+	path = tmp_path / "license.csv"
+	with open(path, "w", newline="") as file:
+		writer = csv.writer(file)
+		writer.writerow([name for name, _ in seed.LICENSE_COLUMNS])
+		for i in range(25):
+			row = [str(i) if converter is seed.to_int else f"value {i}" for _, converter in seed.LICENSE_COLUMNS]
+			row[12] = "2025-06-30" if i else ""
+			row[23] = ""
+			writer.writerow(row)
+
+	engine = create_engine("sqlite://")
+	metadata = MetaData()
+	table = make_license_table(metadata)
+	metadata.create_all(engine)
+
+	assert seed.bulk_load(engine, table, str(path), seed.LICENSE_COLUMNS, chunk_size=10) == 25
+
+	with engine.connect() as conn:
+		rows = conn.execute(select(table).order_by(table.c.license_address_id)).mappings().all()
+	assert len(rows) == 25
+	assert rows[0]["expiration_date"] is None
+	assert rows[1]["expiration_date"] == datetime(2025, 6, 30)
+	assert rows[1]["county_id"] is None
+	assert rows[1]["business_name"] == "value 1"
+	assert not seed.is_empty(engine, table)
@@ -0,0 +1,32 @@
+import json
+from datetime import datetime
+
+from flask import Flask
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import serialize
+from models import Contact, License
+
+
+def test_camel_case_matches_to_json_keys():
+	assert serialize.LICENSE.keys == list(License().to_json().keys())
+	assert serialize.CONTACT.keys == list(Contact().to_dict().keys())
+
+
+def test_rows_serialize_like_jsonify():
+	engine = create_engine("sqlite://")
+	License.__table__.create(engine)
+	with Session(engine) as session:
+		session.add_all([
+			License(license_address_id=1, license_id=10, business_name="Pacific Medical Supply", zip="93701",
+					expiration_date=datetime(2026, 3, 15, 8, 30)),
+			License(license_address_id=2, business_name="Golden Health", expiration_date=None),
+		])
+		session.commit()
+
+		app = Flask(__name__)
+		expected = json.loads(app.json.dumps([license.to_json() for license in session.query(License)]))
+		rows = serialize.LICENSE.to_dicts(session.execute(serialize.LICENSE.select()))
+		assert json.loads(serialize.dumps(rows)) == expected
+		assert expected[0]["expirationDate"] == "Sun, 15 Mar 2026 08:30:00 GMT"
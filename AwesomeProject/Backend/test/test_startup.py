@@ -0,0 +1,14 @@
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def test_import_defers_heavy_modules():
+	probe = (
+		"import sys, main\n"
+		"print(main.inference._model, sorted(name for name in ('torch', 'ultralytics', 'cv2', 'serpapi', 'bs4') if name in sys.modules))"
+	)
+	completed = subprocess.run([sys.executable, "-c", probe], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+	assert completed.stdout.strip() == "None []"
@@ -0,0 +1,111 @@
+import os
+
+import pytest
+
+import uploads
+
+
+@pytest.fixture
+def janitor(tmp_path):
+	folder = tmp_path / "uploads"
+	folder.mkdir()
+	return uploads.Janitor(str(folder), max_age=100, path=str(tmp_path / "uploads.db"), quota_bytes=250,
+	                       interval=60, batch_size=2)
+
+
+def write(janitor, name, size, now):
+	with open(os.path.join(janitor.folder, name), "wb") as upload:
+		upload.write(b"x" * size)
+	janitor.add(name, size, now=now)
+
+
+def test_expired_files_removed_in_batches(janitor):
+	for index in range(5):
+		write(janitor, f"old-{index}.jpg", 10, now=0)
+	write(janitor, "new.jpg", 10, now=1000)
+
+	assert janitor.sweep(now=500) == {"files": 5, "bytes": 50, "expired": 5, "over_quota": 0}
+	assert os.listdir(janitor.folder) == ["new.jpg"]
+	assert janitor.stats()["files"] == 1
+
+
+def test_quota_removes_soonest_to_expire(janitor):
+	for index, name in enumerate(["a.jpg", "b.jpg", "c.jpg", "d.jpg"]):
+		write(janitor, name, 100, now=index)
+
+	# 400 bytes against a 250 byte quota: the two oldest go
+	assert janitor.sweep(now=10) == {"files": 2, "bytes": 200, "expired": 0, "over_quota": 2}
+	assert sorted(os.listdir(janitor.folder)) == ["c.jpg", "d.jpg"]
+	stats = janitor.stats()
+	assert (stats["bytes"], stats["reclaimed_bytes"], stats["sweeps"]) == (200, 200, 1)
+
+
+def test_rewritten_file_gets_new_expiry(janitor):
+	write(janitor, "same.jpg", 10, now=0)
+	janitor.add("same.jpg", 10, now=200)
+	assert janitor.sweep(now=150)["files"] == 0
+
+
+def test_adopts_untracked_files(janitor):
+	with open(os.path.join(janitor.folder, "legacy.png"), "wb") as upload:
+		upload.write(b"x" * 42)
+	os.utime(os.path.join(janitor.folder, "legacy.png"), (0, 0))
+
+	assert janitor.adopt() == 1
+	assert janitor.adopt() == 0
+	assert janitor.sweep()["bytes"] == 42
+
+
+def test_stored_again_mid_sweep_is_kept(janitor):
+	name = janitor.store(b"photo")
+	# A sweep takes the expired row, then the same photo is uploaded again before it deletes the file
+	taken = janitor._take('SELECT name, size FROM uploads WHERE expires_at <= ? LIMIT ?', (float("inf"),))
+	assert taken == [(name, 5)]
+	assert janitor.store(b"photo") == name
+	assert janitor._remove(taken) == (0, 0)
+	assert os.listdir(janitor.folder) == [name]
+
+	# Removed first, then stored again: written back
+	taken = janitor._take('SELECT name, size FROM uploads WHERE expires_at <= ? LIMIT ?', (float("inf"),))
+	assert janitor._remove(taken) == (1, 5)
+	janitor.store(b"photo")
+	assert os.listdir(janitor.folder) == [name]
+
+
+def test_one_sweep_per_interval_across_workers(janitor):
+	other = uploads.Janitor(janitor.folder, max_age=100, path=janitor.path, interval=60)
+	assert janitor.sweep(now=1000, due_only=True) is not None
+	assert other.sweep(now=1030, due_only=True) is None
+	assert other.sweep(now=1061, due_only=True) is not None
+	# A missing file is skipped, not counted
+	janitor.add("gone.jpg", 5, now=0)
+	assert janitor.sweep(now=2000)["files"] == 0
+
+
+def test_store_is_content_addressed(tmp_path):
+	name, written = uploads.store(str(tmp_path), b"photo")
+	assert name == uploads.content_name(b"photo", ".jpg") and len(name) == 64 + 4
+	assert written
+	assert uploads.store(str(tmp_path), b"photo") == (name, False)
+	assert uploads.store(str(tmp_path), b"other photo")[0] != name
+	assert sorted(os.listdir(tmp_path)) == sorted([name, uploads.content_name(b"other photo", ".jpg")])
+
+
+def test_served_immutable_with_conditional_and_range(tmp_path):
+	import main
+
+	name, _ = uploads.store(str(tmp_path), b"0123456789")
+	main.app.config["UPLOAD_FOLDER"] = str(tmp_path)
+	try:
+		client = main.app.test_client()
+		response = client.get(f"/serpapi-uploads/{name}")
+		assert response.data == b"0123456789"
+		assert response.headers["ETag"] == f'"{name[:-4]}"'
+		assert "immutable" in response.headers["Cache-Control"]
+		assert "max-age=31536000" in response.headers["Cache-Control"]
+
+		assert client.get(f"/serpapi-uploads/{name}", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+		partial = client.get(f"/serpapi-uploads/{name}", headers={"Range": "bytes=2-5"})
+		assert (partial.status_code, partial.data) == (206, b"2345")
+	finally:
+		main.app.config["UPLOAD_FOLDER"] = main.UPLOAD_FOLDER
@@ -0,0 +1,120 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import upstream
+
+
+@pytest.fixture
+def session(monkeypatch):
+	# A session of our own, not the process-wide one other tests may share
+	monkeypatch.setattr(upstream, "_session", None)
+	monkeypatch.setattr(upstream, "_session_pid", None)
+	return upstream.get_session()
+
+
+def test_hosts_get_their_own_pools(session):
+	fda = session.get_adapter("https://api.fda.gov/device/event.json")
+	cdph = session.get_adapter("https://www.cdph.ca.gov/Programs")
+	other = session.get_adapter("https://serpapi.com/search")
+
+	assert len({id(fda), id(cdph), id(other)}) == 3
+	assert all(isinstance(adapter, upstream.CountingAdapter) for adapter in (fda, cdph, other))
+	assert fda._pool_maxsize == upstream.HOST_POOL_SIZES["https://api.fda.gov"]
+	assert cdph._pool_maxsize == upstream.HOST_POOL_SIZES["https://www.cdph.ca.gov"]
+	assert other._pool_maxsize == upstream.POOL_MAXSIZE
+	# http and https share the default pool
+	assert session.get_adapter("http://example.com/") is other
+
+
+def test_retry_config(session):
+	retry = session.get_adapter("https://api.fda.gov/").max_retries
+	assert retry.total == upstream.RETRIES
+	assert retry.backoff_factor == upstream.BACKOFF_FACTOR
+	assert set(retry.status_forcelist) == set(upstream.RETRY_STATUSES)
+	assert retry.respect_retry_after_header
+	assert not retry.raise_on_status
+	# Statuses and read errors are only retried for idempotent methods
+	assert retry.is_retry("GET", 503)
+	assert not retry.is_retry("POST", 503)
+
+
+def test_session_rebuilt_after_fork(session, monkeypatch):
+	assert upstream.get_session() is session
+	monkeypatch.setattr(upstream.os, "getpid", lambda: -1)
+	forked = upstream.get_session()
+	assert forked is not session
+	assert upstream.get_session() is forked
+
+
+def test_default_timeout(session, monkeypatch):
+	calls = []
+	monkeypatch.setattr(session, "request", lambda method, url, **kwargs: calls.append((method, kwargs)))
+	upstream.get("https://api.fda.gov/")
+	upstream.post("https://api.fda.gov/", timeout=1)
+	assert calls == [("GET", {"timeout": (upstream.CONNECT_TIMEOUT, upstream.READ_TIMEOUT)}), ("POST", {"timeout": 1})]
+
+
+class Handler(BaseHTTPRequestHandler):
+	protocol_version = "HTTP/1.1"
+
+	def do_GET(self):
+		self.send_response(200)
+		self.send_header("Set-Cookie", "session=inspector-1")
+		self.send_header("Content-Length", "2")
+		self.end_headers()
+		self.wfile.write(b"ok")
+
+	def log_message(self, *args):
+		pass
+
+
+def test_pool_hits_and_misses_counted_and_no_cookies_kept(session):
+	server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	try:
+		url = f"http://127.0.0.1:{server.server_port}/"
+		for _ in range(3):
+			assert upstream.get(url).text == "ok"
+	finally:
+		server.shutdown()
+		server.server_close()
+	# One new connection, then kept-alive reuse
+	assert upstream.pool_stats()[f"127.0.0.1:{server.server_port}"] == {"requests": 3, "hits": 2, "misses": 1}
+	# Never carried from one inspector's search over to another's
+	assert len(session.cookies) == 0
+
+
+class CountingServer(ThreadingHTTPServer):
+	accepted = 0
+
+	def get_request(self):
+		self.accepted += 1
+		return super().get_request()
+
+
+def test_concurrent_requests_count_only_their_own_connections(session):
+	server = CountingServer(("127.0.0.1", 0), Handler)
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	url = f"http://127.0.0.1:{server.server_port}/"
+	start = threading.Barrier(8)
+
+	def fetch():
+		start.wait()
+		for _ in range(5):
+			upstream.get(url)
+
+	try:
+		threads = [threading.Thread(target=fetch) for _ in range(8)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+	finally:
+		server.shutdown()
+		server.server_close()
+	stats = upstream.pool_stats()[f"127.0.0.1:{server.server_port}"]
+	# Each connection the server accepted is one miss, every other request a hit
+	assert stats["misses"] == server.accepted > 1
+	assert stats["hits"] + stats["misses"] == stats["requests"] == 40
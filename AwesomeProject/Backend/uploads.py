@@ -0,0 +1,274 @@
+# Storage and expiry of the photos stored for Google's reverse image search.
+#
+# Files are named after the SHA-256 of their bytes: the same photo is written once, and a
+# name's content never changes, so /serpapi-uploads/<name> can be cached forever.
+#
+# Every file written to the upload folder is recorded in a SQLite index with its size and
+# expiry time, so cleaning up never lists or stats the folder. The janitor sweeps on a
+# schedule, off the request path: it deletes expired files in batches of BATCH_SIZE,
+# oldest first, then, while the folder is over UPLOAD_QUOTA_MB, the files closest to
+# expiry. Each sweep's reclaimed files and bytes are recorded and shown by /uploads/stats.
+#
+# Each gunicorn worker runs a janitor thread; the sweeps table hands every sweep to a
+# single worker. With JANITOR_INTERVAL=0 no thread is started and
+# `flask --app main sweep-uploads` can be run from cron instead.
+
+import contextlib
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+
+INDEX_PATH = os.getenv('UPLOAD_INDEX_PATH', 'uploads.db')
+QUOTA_BYTES = int(float(os.getenv('UPLOAD_QUOTA_MB', 1024)) * 1024 * 1024)
+INTERVAL = float(os.getenv('JANITOR_INTERVAL', 600))
+BATCH_SIZE = int(os.getenv('JANITOR_BATCH_SIZE', 500))
+
+
+def content_name(data, suffix):
+    """File name derived from the bytes themselves."""
+    return hashlib.sha256(data).hexdigest() + suffix
+
+
+def store(folder, data, suffix=".jpg"):
+    """Write `data` to `folder` under its content name unless already there; returns (name, written)."""
+    name = content_name(data, suffix)
+    path = os.path.join(folder, name)
+    if os.path.exists(path):
+        return name, False
+    # Written under a temporary name and renamed, so a fetch never sees half a file
+    fd, temporary = tempfile.mkstemp(dir=folder, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temporary)
+        raise
+    return name, True
+
+
+class Janitor:
+    def __init__(self, folder, max_age, path=INDEX_PATH, quota_bytes=QUOTA_BYTES, interval=INTERVAL,
+                 batch_size=BATCH_SIZE):
+        self.folder = folder
+        self.max_age = max_age
+        self.path = path
+        self.quota_bytes = quota_bytes
+        self.interval = interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._thread_pid = None
+
+    @property
+    def conn(self):
+        # SQLite connections must not cross a fork, so every worker opens its own
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn_pid = os.getpid()
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA busy_timeout=5000')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS uploads ('
+                ' name TEXT PRIMARY KEY,'
+                ' size INTEGER NOT NULL,'
+                ' expires_at REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS ix_uploads_expires_at ON uploads (expires_at)')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS sweeps ('
+                ' id INTEGER PRIMARY KEY,'
+                ' started_at REAL NOT NULL,'
+                ' finished_at REAL,'
+                ' files INTEGER NOT NULL DEFAULT 0,'
+                ' bytes INTEGER NOT NULL DEFAULT 0,'
+                ' expired INTEGER NOT NULL DEFAULT 0,'
+                ' over_quota INTEGER NOT NULL DEFAULT 0)'
+            )
+        return self._conn
+
+    def add(self, name, size, now=None):
+        """Record a file just written to the folder; writing it again pushes its expiry back."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self.conn.execute(
+                'INSERT INTO uploads (name, size, expires_at) VALUES (?, ?, ?)'
+                ' ON CONFLICT (name) DO UPDATE SET size = excluded.size, expires_at = excluded.expires_at',
+                (name, size, now + self.max_age),
+            )
+
+    def store(self, data, suffix=".jpg"):
+        """Store `data` under its content name and (re)start its expiry; returns the name.
+
+        The row goes in first: a sweep that took the old row then sees it again and leaves
+        the file alone, or has already removed it and store() writes it back.
+        """
+        name = content_name(data, suffix)
+        self.add(name, len(data))
+        store(self.folder, data, suffix)
+        return name
+
+    def adopt(self):
+        """Index files already in the folder but not yet tracked (written before the index existed)."""
+        try:
+            entries = [entry for entry in os.scandir(self.folder) if entry.is_file()]
+        except FileNotFoundError:
+            return 0
+        rows = [(entry.name, entry.stat().st_size, entry.stat().st_mtime + self.max_age) for entry in entries]
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.executemany('INSERT OR IGNORE INTO uploads (name, size, expires_at) VALUES (?, ?, ?)', rows)
+            adopted = self.conn.total_changes - before
+        if adopted:
+            logging.info(f"Indexed {adopted} untracked files in {self.folder}")
+        return adopted
+
+    def _take(self, query, params):
+        """Drop up to `batch_size` rows chosen by `query` from the index in one transaction and return them.
+
+        Holding the write lock while choosing means concurrent sweeps never take the same files.
+        """
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self.conn.execute(query, params + (self.batch_size,)).fetchall()
+                self.conn.executemany('DELETE FROM uploads WHERE name = ?', [(name,) for name, _ in rows])
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+        return rows
+
+    def _remove(self, rows):
+        """Delete the (name, size) files; returns the number of files and bytes reclaimed.
+
+        Files stored again since they were taken have a row again and are kept. The check
+        and the deletes happen under the write lock, so store() cannot slip in between.
+        """
+        files = reclaimed = 0
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                names = [name for name, _ in rows]
+                kept = {name for (name,) in self.conn.execute(
+                    f'SELECT name FROM uploads WHERE name IN ({", ".join("?" * len(names))})', names)}
+                for name, size in rows:
+                    if name in kept:
+                        continue
+                    try:
+                        os.remove(os.path.join(self.folder, name))
+                    except FileNotFoundError:
+                        continue
+                    except OSError as e:
+                        logging.warning(f"Cannot remove upload {name}: {e}")
+                        continue
+                    files += 1
+                    reclaimed += size
+            finally:
+                self.conn.execute('COMMIT')
+        return files, reclaimed
+
+    def _begin(self, now, due_only):
+        """Record a new sweep and return its id; with `due_only`, None if the last one is under `interval` old."""
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                last = self.conn.execute('SELECT MAX(started_at) FROM sweeps').fetchone()[0]
+                if due_only and last is not None and last > now - self.interval:
+                    sweep_id = None
+                else:
+                    sweep_id = self.conn.execute('INSERT INTO sweeps (started_at) VALUES (?)', (now,)).lastrowid
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+        return sweep_id
+
+    def sweep(self, now=None, due_only=False):
+        """Delete expired files, then the soonest to expire while over quota; returns this sweep's totals.
+
+        With `due_only`, nothing is done (and None returned) unless the last sweep by any
+        worker started at least `interval` ago.
+        """
+        now = time.time() if now is None else now
+        sweep_id = self._begin(now, due_only)
+        if sweep_id is None:
+            return None
+        totals = {"files": 0, "bytes": 0, "expired": 0, "over_quota": 0}
+
+        def count(rows, reason):
+            files, reclaimed = self._remove(rows)
+            totals["files"] += files
+            totals["bytes"] += reclaimed
+            totals[reason] += files
+
+        while True:
+            rows = self._take('SELECT name, size FROM uploads WHERE expires_at <= ? ORDER BY expires_at LIMIT ?', (now,))
+            if not rows:
+                break
+            count(rows, "expired")
+
+        while True:
+            # The files closest to expiry whose sizes add up to the excess over the quota
+            rows = self._take(
+                'SELECT name, size FROM ('
+                ' SELECT name, size, expires_at, SUM(size) OVER (ORDER BY expires_at, name) - size AS earlier_bytes'
+                ' FROM uploads)'
+                ' WHERE earlier_bytes < (SELECT SUM(size) FROM uploads) - ? ORDER BY expires_at, name LIMIT ?',
+                (self.quota_bytes,),
+            )
+            if not rows:
+                break
+            count(rows, "over_quota")
+
+        with self._lock:
+            self.conn.execute(
+                'UPDATE sweeps SET finished_at = ?, files = ?, bytes = ?, expired = ?, over_quota = ? WHERE id = ?',
+                (time.time(), totals["files"], totals["bytes"], totals["expired"], totals["over_quota"], sweep_id),
+            )
+        if totals["files"]:
+            logging.info(f"Janitor removed {totals['files']} uploads, {totals['bytes']} bytes")
+        return totals
+
+    def _run(self):
+        self.adopt()
+        while True:
+            try:
+                self.sweep(due_only=True)
+            except Exception as e:
+                logging.error(f"Upload janitor sweep failed: {e}")
+            time.sleep(self.interval)
+
+    def start(self):
+        """Start this process's janitor thread (once per worker), unless the interval is 0."""
+        if self.interval <= 0 or self._thread_pid == os.getpid():
+            return
+        self._thread_pid = os.getpid()
+        threading.Thread(target=self._run, name="upload-janitor", daemon=True).start()
+
+    def stats(self):
+        with self._lock:
+            files, used = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM uploads').fetchone()
+            sweeps, reclaimed_files, reclaimed_bytes = self.conn.execute(
+                'SELECT COUNT(finished_at), COALESCE(SUM(files), 0), COALESCE(SUM(bytes), 0) FROM sweeps').fetchone()
+            last = self.conn.execute(
+                'SELECT started_at, finished_at, files, bytes, expired, over_quota FROM sweeps'
+                ' WHERE finished_at IS NOT NULL ORDER BY id DESC LIMIT 1').fetchone()
+        return {
+            "files": files,
+            "bytes": used,
+            "quota_bytes": self.quota_bytes,
+            "sweeps": sweeps,
+            "reclaimed_files": reclaimed_files,
+            "reclaimed_bytes": reclaimed_bytes,
+            "last_sweep": dict(zip(("started_at", "finished_at", "files", "bytes", "expired", "over_quota"), last))
+            if last else None,
+        }
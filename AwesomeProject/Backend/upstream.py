@@ -0,0 +1,200 @@
+# Shared HTTP client for every upstream call made by the backend
+# (openFDA, CDPH, bizfileonline, the FDA data dashboard, Elasticsearch, RASA, Confluence).
+#
+# A single requests.Session keeps connections alive between Flask requests, so we only
+# pay the TCP + TLS handshake once per pooled connection instead of once per search.
+#
+# Calls made inside `with deadline(at):` (every /search/firm source, see fanout.py) have
+# their timeouts cut to the time left and are not retried, so a slow backend gives its
+# thread back when the search stops waiting for it.
+
+import contextlib
+import logging
+import os
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Default pool/timeout/retry settings, all overridable through the environment
+POOL_CONNECTIONS = int(os.getenv('UPSTREAM_POOL_CONNECTIONS', 10))
+POOL_MAXSIZE = int(os.getenv('UPSTREAM_POOL_MAXSIZE', 20))
+CONNECT_TIMEOUT = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT = float(os.getenv('UPSTREAM_READ_TIMEOUT', 30))
+RETRIES = int(os.getenv('UPSTREAM_RETRIES', 3))
+BACKOFF_FACTOR = float(os.getenv('UPSTREAM_BACKOFF_FACTOR', 0.5))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# What requests uses when given no retries
+NO_RETRY = Retry(0, read=False)
+
+# Hosts we talk to on every search get their own pool (and their own counters).
+# The value is the maximum number of kept-alive connections to that host.
+HOST_POOL_SIZES = {
+    "https://api.fda.gov": int(os.getenv('UPSTREAM_POOL_MAXSIZE_FDA', POOL_MAXSIZE)),
+    "https://www.cdph.ca.gov": int(os.getenv('UPSTREAM_POOL_MAXSIZE_CDPH', 4)),
+    "https://bizfileonline.sos.ca.gov": int(os.getenv('UPSTREAM_POOL_MAXSIZE_BIZFILE', POOL_MAXSIZE)),
+    "https://api-datadashboard.fda.gov": int(os.getenv('UPSTREAM_POOL_MAXSIZE_DASHBOARD', POOL_MAXSIZE)),
+    "http://localhost:9200": int(os.getenv('UPSTREAM_POOL_MAXSIZE_ELASTIC', POOL_MAXSIZE)),
+    "http://localhost:5005": int(os.getenv('UPSTREAM_POOL_MAXSIZE_RASA', POOL_MAXSIZE)),
+}
+
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def deadline(at):
+    """Within the block, this thread's upstream calls give up at `at` (time.monotonic()) and are not retried."""
+    previous = getattr(_local, "deadline", None)
+    _local.deadline = at
+    try:
+        yield
+    finally:
+        _local.deadline = previous
+
+
+def remaining():
+    """Seconds left before this thread's deadline, or None outside deadline()."""
+    at = getattr(_local, "deadline", None)
+    return None if at is None else at - time.monotonic()
+
+
+class CountingAdapter(HTTPAdapter):
+    """HTTPAdapter that counts pool hits (reused connections) and misses (new connections)."""
+
+    def __init__(self, *args, **kwargs):
+        self._stats_lock = threading.Lock()
+        self._sending = threading.local()
+        self.stats = {}
+        super().__init__(*args, **kwargs)
+
+    @property
+    def max_retries(self):
+        # A retry would outlive the deadline, so calls under one get a single attempt
+        return NO_RETRY if remaining() is not None else self._max_retries
+
+    @max_retries.setter
+    def max_retries(self, retries):
+        self._max_retries = retries
+
+    def get_connection_with_tls_context(self, *args, **kwargs):
+        # The pool send() really uses (its key includes the TLS settings). Its _new_conn is
+        # wrapped once so every socket it opens is counted against the request opening it;
+        # num_connections is shared by every thread using the pool and cannot tell them apart.
+        pool = super().get_connection_with_tls_context(*args, **kwargs)
+        with self._stats_lock:
+            if not getattr(pool, "_counting", False):
+                pool._new_conn = self._counted(pool._new_conn)
+                pool._counting = True
+        return pool
+
+    def _counted(self, new_conn):
+        def counted_new_conn():
+            self._sending.opened += 1
+            return new_conn()
+        return counted_new_conn
+
+    def send(self, request, **kwargs):
+        self._sending.opened = 0
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            # urllib3 opens a socket only when no kept-alive one is free in the pool, so a
+            # request that opened none was served from a reused connection
+            opened = self._sending.opened
+            host = urlsplit(request.url).netloc
+            with self._stats_lock:
+                host_stats = self.stats.setdefault(host, {"requests": 0, "hits": 0, "misses": 0})
+                host_stats["requests"] += 1
+                if opened > 0:
+                    host_stats["misses"] += opened
+                else:
+                    host_stats["hits"] += 1
+
+
+def _build_retry():
+    # Connection errors are retried for every method; read errors and the statuses
+    # below only for idempotent methods, so a POST is never silently sent twice.
+    return Retry(
+        total=RETRIES,
+        connect=RETRIES,
+        read=RETRIES,
+        status=RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def _build_session():
+    session = requests.Session()
+    # Never carry cookies from one inspector's search over to another's
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    default_adapter = CountingAdapter(
+        pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=_build_retry()
+    )
+    session.mount("https://", default_adapter)
+    session.mount("http://", default_adapter)
+
+    for prefix, maxsize in HOST_POOL_SIZES.items():
+        session.mount(prefix, CountingAdapter(pool_connections=1, pool_maxsize=maxsize, max_retries=_build_retry()))
+
+    return session
+
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide session, creating a fresh one after a fork."""
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        with _session_lock:
+            if _session is None or _session_pid != os.getpid():
+                _session = _build_session()
+                _session_pid = os.getpid()
+                logging.info("Created upstream HTTP session")
+    return _session
+
+
+def request(method, url, **kwargs):
+    kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+    left = remaining()
+    if left is not None:
+        if left <= 0:
+            raise requests.Timeout(f"Deadline passed before {method} {url}")
+        timeouts = kwargs['timeout'] if isinstance(kwargs['timeout'], tuple) else (kwargs['timeout'],) * 2
+        kwargs['timeout'] = tuple(left if timeout is None else min(timeout, left) for timeout in timeouts)
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def pool_stats():
+    """Pool hit/miss counters per upstream host, summed over all mounted adapters."""
+    totals = {}
+    seen = set()
+    for adapter in get_session().adapters.values():
+        if id(adapter) in seen or not isinstance(adapter, CountingAdapter):
+            continue
+        seen.add(id(adapter))
+        with adapter._stats_lock:
+            for host, host_stats in adapter.stats.items():
+                merged = totals.setdefault(host, {"requests": 0, "hits": 0, "misses": 0})
+                for key, value in host_stats.items():
+                    merged[key] += value
+    return totals
@@ -19,6 +19,19 @@ import { logQuery } from './HomeScreen';
 const FDAScreen = () => {
     const [fromDate, setFromDate] = useState(new Date());
     const [toDate, setToDate] = useState(new Date());
+    // A date is only sent once picked: untouched pickers mean no date range
+    const [fromDatePicked, setFromDatePicked] = useState(false);
+    const [toDatePicked, setToDatePicked] = useState(false);
+
+    const pickFromDate = (date) => {
+        setFromDate(date);
+        setFromDatePicked(true);
+    };
+
+    const pickToDate = (date) => {
+        setToDate(date);
+        setToDatePicked(true);
+    };
     const [showFromDatePicker, setShowFromDatePicker] = useState(false);
     const [showToDatePicker, setShowToDatePicker] = useState(false);
     const [productDescription, setProductDescription] = useState('');
@@ -34,21 +47,21 @@ const FDAScreen = () => {
         setRecallingFirm(historyItem.recallingFirm || '');
         setRecallNumber(historyItem.recallNumber || '');
         setRecallClass(historyItem.recallClass || '');
-        if (historyItem.fromDate) setFromDate(new Date(historyItem.fromDate));
-        if (historyItem.toDate) setToDate(new Date(historyItem.toDate));
+        if (historyItem.fromDate) pickFromDate(new Date(historyItem.fromDate));
+        if (historyItem.toDate) pickToDate(new Date(historyItem.toDate));
     };
 
     const onChangeFrom = (event, selectedDate) => {
         setShowFromDatePicker(false);
         if (selectedDate) {
-            setFromDate(selectedDate);
+            pickFromDate(selectedDate);
         }
     };
 
     const onChangeTo = (event, selectedDate) => {
         setShowToDatePicker(false);
         if (selectedDate) {
-            setToDate(selectedDate);
+            pickToDate(selectedDate);
         }
     };
 
@@ -66,8 +79,8 @@ const FDAScreen = () => {
             recallingFirm,
             recallNumber,
             recallClass,
-            fromDate: fromDate.toISOString().split('T')[0],
-            toDate: toDate.toISOString().split('T')[0],
+            ...(fromDatePicked && { fromDate: fromDate.toISOString().split('T')[0] }),
+            ...(toDatePicked && { toDate: toDate.toISOString().split('T')[0] }),
         };
 
         logQuery("FDA");
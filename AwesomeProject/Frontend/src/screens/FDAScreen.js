@@ -20,6 +20,19 @@ import { BACKEND_URL } from '../../config.js';
 const FDAScreen = () => {
     const [fromDate, setFromDate] = useState(new Date());
     const [toDate, setToDate] = useState(new Date());
+    // A date is only sent once picked: untouched pickers mean no date range
+    const [fromDatePicked, setFromDatePicked] = useState(false);
+    const [toDatePicked, setToDatePicked] = useState(false);
+
+    const pickFromDate = (date) => {
+        setFromDate(date);
+        setFromDatePicked(true);
+    };
+
+    const pickToDate = (date) => {
+        setToDate(date);
+        setToDatePicked(true);
+    };
     const [showFromDatePicker, setShowFromDatePicker] = useState(false);
     const [showToDatePicker, setShowToDatePicker] = useState(false);
     const [productDescription, setProductDescription] = useState('');
@@ -59,14 +72,14 @@ const FDAScreen = () => {
         if (historyItem.fromDate) {
             const parsedFromDate = new Date(historyItem.fromDate);
             if (!isNaN(parsedFromDate.getTime())) {
-                setFromDate(parsedFromDate);
+                pickFromDate(parsedFromDate);
             }
         }
 
         if (historyItem.toDate) {
             const parsedToDate = new Date(historyItem.toDate);
             if (!isNaN(parsedToDate.getTime())) {
-                setToDate(parsedToDate);
+                pickToDate(parsedToDate);
             }
         }
 
@@ -112,23 +125,25 @@ const FDAScreen = () => {
         setRecallClass(historyItem.recallClass || '');
 
         if (historyItem.fromDate) {
-            setFromDate(new Date(historyItem.fromDate));
+            pickFromDate(new Date(historyItem.fromDate));
         }
         if (historyItem.toDate) {
-            setToDate(new Date(historyItem.toDate));
+            pickToDate(new Date(historyItem.toDate));
         }
     };
 
     const onChangeFrom = (event, selectedDate) => {
-        const currentDate = selectedDate || fromDate;
         setShowFromDatePicker(Platform.OS === 'ios');
-        setFromDate(currentDate);
+        if (selectedDate) {
+            pickFromDate(selectedDate);
+        }
     };
 
     const onChangeTo = (event, selectedDate) => {
-        const currentDate = selectedDate || toDate;
         setShowToDatePicker(Platform.OS === 'ios');
-        setToDate(currentDate);
+        if (selectedDate) {
+            pickToDate(selectedDate);
+        }
     };
 
     const handleSearch = async () => {
@@ -146,8 +161,8 @@ const FDAScreen = () => {
             recallingFirm: recallingFirm.trim(),
             recallNumber: recallNumber.trim(),
             recallClass: recallClass.trim(),
-            fromDate: fromDate.toISOString().split('T')[0],
-            toDate: toDate.toISOString().split('T')[0],
+            ...(fromDatePicked && { fromDate: fromDate.toISOString().split('T')[0] }),
+            ...(toDatePicked && { toDate: toDate.toISOString().split('T')[0] }),
         };
 
         try {
@@ -24,6 +24,19 @@ const K510Screen = () => {
     const [deviceName, setDeviceName] = useState('');
     const [fromDate, setFromDate] = useState(new Date());
     const [toDate, setToDate] = useState(new Date());
+    // A date is only sent once picked: untouched pickers mean no date range
+    const [fromDatePicked, setFromDatePicked] = useState(false);
+    const [toDatePicked, setToDatePicked] = useState(false);
+
+    const pickFromDate = (date) => {
+        setFromDate(date);
+        setFromDatePicked(true);
+    };
+
+    const pickToDate = (date) => {
+        setToDate(date);
+        setToDatePicked(true);
+    };
     const [showFromDatePicker, setShowFromDatePicker] = useState(false);
     const [showToDatePicker, setShowToDatePicker] = useState(false);
     const [isLoading, setIsLoading] = useState(false);
@@ -61,14 +74,14 @@ const K510Screen = () => {
         if (historyItem.fromDate) {
             const parsedFromDate = new Date(historyItem.fromDate);
             if (!isNaN(parsedFromDate.getTime())) {
-                setFromDate(parsedFromDate);
+                pickFromDate(parsedFromDate);
             }
         }
 
         if (historyItem.toDate) {
             const parsedToDate = new Date(historyItem.toDate);
             if (!isNaN(parsedToDate.getTime())) {
-                setToDate(parsedToDate);
+                pickToDate(parsedToDate);
             }
         }
 
@@ -111,23 +124,25 @@ const K510Screen = () => {
         setApplicantName(historyItem.applicantName || '');
         setDeviceName(historyItem.deviceName || '');
         if (historyItem.fromDate) {
-            setFromDate(new Date(historyItem.fromDate));
+            pickFromDate(new Date(historyItem.fromDate));
         }
         if (historyItem.toDate) {
-            setToDate(new Date(historyItem.toDate));
+            pickToDate(new Date(historyItem.toDate));
         }
     };
 
     const onChangeFrom = (event, selectedDate) => {
-        const currentDate = selectedDate || fromDate;
         setShowFromDatePicker(Platform.OS === 'ios');
-        setFromDate(currentDate);
+        if (selectedDate) {
+            pickFromDate(selectedDate);
+        }
     };
 
     const onChangeTo = (event, selectedDate) => {
-        const currentDate = selectedDate || toDate;
         setShowToDatePicker(Platform.OS === 'ios');
-        setToDate(currentDate);
+        if (selectedDate) {
+            pickToDate(selectedDate);
+        }
     };
 
     const handleSearch = async () => {
@@ -144,8 +159,8 @@ const K510Screen = () => {
             k510Number: k510Number.trim(),
             applicantName: applicantName.trim(),
             deviceName: deviceName.trim(),
-            fromDate: fromDate.toISOString().split('T')[0],
-            toDate: toDate.toISOString().split('T')[0],
+            ...(fromDatePicked && { fromDate: fromDate.toISOString().split('T')[0] }),
+            ...(toDatePicked && { toDate: toDate.toISOString().split('T')[0] }),
         };
 
         try {
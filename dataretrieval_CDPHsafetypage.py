@@ -1,35 +1,28 @@
 # this script is for Abby's device safety page
 # this script works and provides the hyperlink to the recall page
-import requests
-from bs4 import BeautifulSoup
-import re
+import os
+import sys
 from urllib.parse import urljoin
 
+import requests
+
+# Parsed and matched by the backend's cdph module, so the two never drift apart
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "AwesomeProject", "Backend"))
+import cdph  # noqa: E402
 
-def search_recall(query):
-    base_url = "https://www.cdph.ca.gov"
-    url = base_url + "/Programs/CEH/DFDCS/Pages/FDBPrograms/DeviceRecalls.aspx"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
-    }  # Some websites require a User-Agent header to mimic a web browser
 
-    response = requests.get(url, headers=headers)
+def search_recall(query):
+    response = requests.get(cdph.RECALLS_URL, headers=cdph.HEADERS)
 
     if response.status_code == 200:
-        soup = BeautifulSoup(response.content, "html.parser")
-        links = soup.find_all("a", href=True)
-
-        found = False
-        for link in links:
-            if re.search(r'\b{}\b'.format(re.escape(query)), link.text, re.IGNORECASE) or re.search(
-                    r'\b{}\b'.format(re.escape(query)), link["href"], re.IGNORECASE):
-                print("Match found:")
-                print("- Text:", link.text.strip())
-                full_url = urljoin(base_url, link["href"])
-                print("- URL:", full_url)
-                found = True
-
-        if not found:
+        links = cdph.matching_links(cdph.parse_links(response.content), cdph.compile_patterns(query))
+
+        for text, href in links:
+            print("Match found:")
+            print("- Text:", text.strip())
+            print("- URL:", urljoin(cdph.BASE_URL, href))
+
+        if not links:
             print("No results found for your query.")
     else:
         print("Failed to retrieve data from the website.")
@@ -42,4 +35,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-